@@ -1,9 +1,17 @@
 # --- Top-level functions for handling operations ---
 
-from typing import Any, Dict, List
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 from pydantic import ValidationError
 
-from agents.budget_agent.domain.schemas import TableNameEnum
+from agents.budget_agent.domain.schemas import (MonthlySummaryFilter,
+                                                MonthlySummaryRow,
+                                                SpendGroupByEnum,
+                                                SpendSummaryRow,
+                                                StatementImportProgress,
+                                                TableNameEnum,
+                                                TransactionPage,
+                                                TransactionQueryFilter)
 from core.logger import LOGGER
 from agents.budget_agent.domain.interface import AllRepositories
 from agents.budget_agent.domain.budget_aggregate import BudgetAggregate
@@ -12,6 +20,8 @@ class BudgetAgentUsecase:
     """
     This class encapsulates the business logic for budget-related operations.
     It orchestrates interactions with the database CRUD operations.
+    Each handler is one unit of work: the repository never commits, the
+    handler commits once at the end (or everything is rolled back).
     """
     def __init__(self, all_repos: AllRepositories):
         """
@@ -36,14 +46,63 @@ class BudgetAgentUsecase:
             
             try:
                 created_item_dict = BudgetAggregate.add_item(self.budget_repo, repo_context, table, payload)
-                return PydanticResponseModel(**created_item_dict)
+                response_item = PydanticResponseModel(**created_item_dict)
+                repo_context.commit()
+                return response_item
             except ValidationError as e:
-                LOGGER.error(f"Pydantic validation error for add operation: {e.errors()}", exc_info=True)
+                LOGGER.error("Pydantic validation error for add operation: %s", e.errors(), exc_info=True)
                 raise ValueError(f"Validation error: {e.errors()}")
             except Exception as e:
-                LOGGER.error(f"An unexpected error occurred during add operation: {e}", exc_info=True)
+                LOGGER.error("An unexpected error occurred during add operation: %s", e, exc_info=True)
                 raise RuntimeError(f"Failed to add item: {e}")
 
+    def handle_add_items_bulk(self, table: TableNameEnum, payloads: List[Dict[str, Any]]) -> List[Any]:
+        """Handles the bulk 'add' operation."""
+
+        with self.repo_context() as repo_context:
+            PydanticResponseModel = BudgetAggregate.get_pydantic_model(self.budget_repo, table, "response")
+
+            if not payloads:
+                LOGGER.error("Payload missing for bulk 'add' operation.")
+                raise ValueError("A non-empty list of payloads is required for bulk add operation.")
+
+            try:
+                created_items = BudgetAggregate.add_items_bulk(self.budget_repo, repo_context, table, payloads)
+                response_items = [PydanticResponseModel(**item_dict) for item_dict in created_items]
+                repo_context.commit()
+                return response_items
+            except ValidationError as e:
+                LOGGER.error("Pydantic validation error for bulk add operation: %s", e.errors(), exc_info=True)
+                raise ValueError(f"Validation error: {e.errors()}")
+            except Exception as e:
+                LOGGER.error("An unexpected error occurred during bulk add operation: %s", e, exc_info=True)
+                raise RuntimeError(f"Failed to add items: {e}")
+
+    def handle_import_transactions(self, columns: Sequence[str], chunks: Iterable[Any]) -> Iterator[StatementImportProgress]:
+        """
+        Handles a statement import: every validated chunk is bulk-loaded, the category
+        rollups are applied once at the end and the whole import commits once.
+        Yields a progress report after each chunk.
+        """
+
+        with self.repo_context() as repo_context:
+            progress = StatementImportProgress(event="progress")
+            amount_changes: Dict[str, float] = defaultdict(float)
+
+            for chunk in chunks:
+                progress.rows_imported += BudgetAggregate.copy_transactions(self.budget_repo, repo_context, columns, chunk.rows)
+                progress.rows_read += chunk.rows_read
+                progress.rows_rejected += chunk.rejected_count
+                progress.errors.extend(chunk.errors)
+                for category, amount in chunk.amount_changes.items():
+                    amount_changes[category] += amount
+                LOGGER.info("Statement import progress: %s imported, %s rejected.", progress.rows_imported, progress.rows_rejected)
+                yield progress.model_copy(update={"errors": []})
+
+            BudgetAggregate.apply_category_rollups(self.budget_repo, repo_context, amount_changes)
+            repo_context.commit()
+            yield progress.model_copy(update={"event": "completed"})
+
     def handle_get_one_item(self, table: TableNameEnum, payload: Dict[str, Any]) -> Any:
         """Handles the 'get_one' operation."""
         
@@ -57,7 +116,7 @@ class BudgetAgentUsecase:
             item_id = payload["id"]
             db_item_dict = BudgetAggregate.get_item_by_id(self.budget_repo, repo_context, table, item_id)
             if db_item_dict is None:
-                LOGGER.warning(f"Item not found for 'get_one': table='{table.value}', id='{item_id}'.")
+                LOGGER.warning("Item not found for 'get_one': table='%s', id='%s'.", table.value, item_id)
                 raise ValueError(f"{table.value} item not found")
             return PydanticResponseModel(**db_item_dict)
 
@@ -69,6 +128,53 @@ class BudgetAgentUsecase:
             items_list = BudgetAggregate.get_all_items(self.budget_repo, repo_context, table)
             return [PydanticResponseModel(**item_dict) for item_dict in items_list]
 
+    def handle_query_transactions(self, payload: Dict[str, Any]) -> TransactionPage:
+        """Handles the filtered, paginated transaction query."""
+
+        with self.repo_context() as repo_context:
+            try:
+                filters = TransactionQueryFilter(**(payload or {}))
+            except ValidationError as e:
+                LOGGER.error("Pydantic validation error for query operation: %s", e.errors(), exc_info=True)
+                raise ValueError(f"Validation error: {e.errors()}")
+
+            page_dict = BudgetAggregate.query_transactions(self.budget_repo, repo_context, filters)
+            return TransactionPage(**page_dict)
+
+    def handle_aggregate_transactions(self, group_by: SpendGroupByEnum, payload: Dict[str, Any], top_n: Optional[int] = None) -> List[SpendSummaryRow]:
+        """Handles the server-side spend aggregation."""
+
+        with self.repo_context() as repo_context:
+            try:
+                filters = TransactionQueryFilter(**(payload or {}))
+            except ValidationError as e:
+                LOGGER.error("Pydantic validation error for aggregate operation: %s", e.errors(), exc_info=True)
+                raise ValueError(f"Validation error: {e.errors()}")
+
+            rows = BudgetAggregate.aggregate_transactions(self.budget_repo, repo_context, group_by, filters, top_n)
+            return [SpendSummaryRow(**row) for row in rows]
+
+    def handle_get_monthly_summary(self, payload: Dict[str, Any]) -> List[MonthlySummaryRow]:
+        """Handles the monthly summary lookup."""
+
+        with self.repo_context() as repo_context:
+            try:
+                filters = MonthlySummaryFilter(**(payload or {}))
+            except ValidationError as e:
+                LOGGER.error("Pydantic validation error for monthly summary operation: %s", e.errors(), exc_info=True)
+                raise ValueError(f"Validation error: {e.errors()}")
+
+            rows = BudgetAggregate.get_monthly_summary(self.budget_repo, repo_context, filters)
+            return [MonthlySummaryRow(**row) for row in rows]
+
+    def handle_rebuild_monthly_summary(self) -> int:
+        """Handles the full rebuild of the monthly summary table."""
+
+        with self.repo_context() as repo_context:
+            row_count = BudgetAggregate.rebuild_monthly_summary(self.budget_repo, repo_context)
+            repo_context.commit()
+            return row_count
+
     def handle_update_item(self, table: TableNameEnum, payload: Dict[str, Any]) -> Any:
         """Handles the 'update' operation."""
 
@@ -85,14 +191,16 @@ class BudgetAgentUsecase:
             try:
                 updated_item_dict = BudgetAggregate.update_item(self.budget_repo, repo_context, table, item_id, update_data)
                 if updated_item_dict is None:
-                    LOGGER.warning(f"Item not found or no changes made for 'update': table='{table.value}', id='{item_id}'.")
+                    LOGGER.warning("Item not found or no changes made for 'update': table='%s', id='%s'.", table.value, item_id)
                     raise ValueError(f"{table.value} item not found or no changes made")
-                return PydanticResponseModel(**updated_item_dict)
+                response_item = PydanticResponseModel(**updated_item_dict)
+                repo_context.commit()
+                return response_item
             except ValidationError as e:
-                LOGGER.error(f"Pydantic validation error for update operation: {e.errors()}", exc_info=True)
+                LOGGER.error("Pydantic validation error for update operation: %s", e.errors(), exc_info=True)
                 raise ValueError(f"Validation error: {e.errors()}")
             except Exception as e:
-                LOGGER.error(f"An unexpected error occurred during update operation: {e}", exc_info=True)
+                LOGGER.error("An unexpected error occurred during update operation: %s", e, exc_info=True)
                 raise RuntimeError(f"Failed to update item: {e}")
 
     def handle_delete_item(self, table: TableNameEnum, payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -105,6 +213,7 @@ class BudgetAgentUsecase:
             
             item_id = payload["id"]
             if not BudgetAggregate.delete_item(self.budget_repo, repo_context, table, item_id):
-                LOGGER.warning(f"Item not found for 'delete': table='{table.value}', id='{item_id}'.")
+                LOGGER.warning("Item not found for 'delete': table='%s', id='%s'.", table.value, item_id)
                 raise ValueError(f"{table.value} item not found")
+            repo_context.commit()
             return {"message": f"{table.value} item deleted successfully", "id": item_id}
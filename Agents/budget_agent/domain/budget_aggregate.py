@@ -1,8 +1,8 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 from pydantic import BaseModel
 from agents.budget_agent.domain.interface.interface_budget_repo import IBudgetRepo
 from agents.budget_agent.domain.interface.interface_context_repo import IRepoContext
-from agents.budget_agent.domain.schemas import TableNameEnum
+from agents.budget_agent.domain.schemas import MonthlySummaryFilter, SpendGroupByEnum, TableNameEnum, TransactionQueryFilter
 
 class BudgetAggregate:
 
@@ -14,6 +14,18 @@ class BudgetAggregate:
     def add_item(budget_repo: IBudgetRepo, repo_context: IRepoContext, table_name: TableNameEnum, item_payload: Dict[str, Any]) -> Dict[str, Any]:
         return budget_repo.add_item(repo_context, table_name, item_payload)
 
+    @staticmethod
+    def add_items_bulk(budget_repo: IBudgetRepo, repo_context: IRepoContext, table_name: TableNameEnum, item_payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return budget_repo.add_items_bulk(repo_context, table_name, item_payloads)
+
+    @staticmethod
+    def copy_transactions(budget_repo: IBudgetRepo, repo_context: IRepoContext, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        return budget_repo.copy_transactions(repo_context, columns, rows)
+
+    @staticmethod
+    def apply_category_rollups(budget_repo: IBudgetRepo, repo_context: IRepoContext, amount_changes: Dict[str, float]) -> None:
+        budget_repo.apply_category_rollups(repo_context, amount_changes)
+
     @staticmethod
     def get_item_by_id(budget_repo: IBudgetRepo, repo_context: IRepoContext, table_name: TableNameEnum, item_id: int) -> Optional[Dict[str, Any]]:
         return budget_repo.get_item_by_id(repo_context, table_name, item_id)
@@ -22,6 +34,22 @@ class BudgetAggregate:
     def get_all_items(budget_repo: IBudgetRepo, repo_context: IRepoContext, table_name: TableNameEnum) -> List[Dict[str, Any]]:
         return budget_repo.get_all_items(repo_context, table_name)
 
+    @staticmethod
+    def query_transactions(budget_repo: IBudgetRepo, repo_context: IRepoContext, filters: TransactionQueryFilter) -> Dict[str, Any]:
+        return budget_repo.query_transactions(repo_context, filters)
+
+    @staticmethod
+    def aggregate_transactions(budget_repo: IBudgetRepo, repo_context: IRepoContext, group_by: SpendGroupByEnum, filters: TransactionQueryFilter, top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+        return budget_repo.aggregate_transactions(repo_context, group_by, filters, top_n)
+
+    @staticmethod
+    def get_monthly_summary(budget_repo: IBudgetRepo, repo_context: IRepoContext, filters: MonthlySummaryFilter) -> List[Dict[str, Any]]:
+        return budget_repo.get_monthly_summary(repo_context, filters)
+
+    @staticmethod
+    def rebuild_monthly_summary(budget_repo: IBudgetRepo, repo_context: IRepoContext) -> int:
+        return budget_repo.rebuild_monthly_summary(repo_context)
+
     @staticmethod
     def update_item(budget_repo: IBudgetRepo, repo_context: IRepoContext, table_name: TableNameEnum, item_id: int, item_payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return budget_repo.update_item(repo_context, table_name, item_id, item_payload)
@@ -49,3 +49,15 @@ transaction_details_table = Table(
 #     "location": "hyd"
 #   }
 # }
+
+# Incrementally maintained per-month totals, one row per (month, category, type).
+# month is the first day of the month.
+monthly_category_summary_table = Table(
+    "monthly_category_summary",
+    metadata,
+    Column("month", Date, primary_key=True),
+    Column("category", String, primary_key=True),
+    Column("type", String, primary_key=True),
+    Column("transaction_count", Integer, nullable=False, default=0),
+    Column("total_amount_inr", Float, nullable=False, default=0.0),
+)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+
+
+metadata = MetaData()
+
+# --- SQLAlchemy Table Definitions ---
+
+# Activity of the conversation threads; their messages live in the LangGraph checkpoint tables
+conversation_threads_table = Table(
+    "conversation_threads",
+    metadata,
+    Column("thread_id", String(128), primary_key=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("last_used_at", DateTime, index=True, nullable=False), # idle eviction
+    Column("turns", Integer, nullable=False, default=0),
+)
@@ -1,7 +1,7 @@
-from typing import Any, Dict, List, Optional, Protocol
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence
 
 from pydantic import BaseModel
-from agents.budget_agent.domain.schemas import TableNameEnum
+from agents.budget_agent.domain.schemas import MonthlySummaryFilter, SpendGroupByEnum, TableNameEnum, TransactionQueryFilter
 from agents.budget_agent.domain.interface.interface_context_repo import IRepoContext
 
 class IBudgetRepo(Protocol):
@@ -12,12 +12,33 @@ class IBudgetRepo(Protocol):
     def add_item(self, repo_context: IRepoContext, table_name: TableNameEnum, item_payload: Dict[str, Any]) -> Dict[str, Any]:
         ...
 
+    def add_items_bulk(self, repo_context: IRepoContext, table_name: TableNameEnum, item_payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ...
+
+    def copy_transactions(self, repo_context: IRepoContext, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        ...
+
+    def apply_category_rollups(self, repo_context: IRepoContext, amount_changes: Dict[str, float]) -> None:
+        ...
+
     def get_item_by_id(self, repo_context: IRepoContext, table_name: TableNameEnum, item_id: int) -> Optional[Dict[str, Any]]:
         ...
     
     def get_all_items(self, repo_context: IRepoContext, table_name: TableNameEnum) -> List[Dict[str, Any]]:
         ...
 
+    def query_transactions(self, repo_context: IRepoContext, filters: TransactionQueryFilter) -> Dict[str, Any]:
+        ...
+
+    def aggregate_transactions(self, repo_context: IRepoContext, group_by: SpendGroupByEnum, filters: TransactionQueryFilter, top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+        ...
+
+    def get_monthly_summary(self, repo_context: IRepoContext, filters: MonthlySummaryFilter) -> List[Dict[str, Any]]:
+        ...
+
+    def rebuild_monthly_summary(self, repo_context: IRepoContext) -> int:
+        ...
+
     def update_item(self, repo_context: IRepoContext, table_name: TableNameEnum, item_id: int, item_payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         ...
     
@@ -3,8 +3,16 @@ from sqlalchemy.orm.session import Session
 
 
 class IRepoContext(Protocol):
-    session: Session
+    @property
+    def session(self) -> Session: ...
+
+    @property
+    def is_connected(self) -> bool: ...
 
     def __enter__(self) -> "IRepoContext": ...
 
     def __exit__(self, *args: Any): ...
+
+    def commit(self) -> None: ...
+
+    def rollback(self) -> None: ...
@@ -1,8 +1,8 @@
 # --- Pydantic Models ---
 
 import datetime
-from typing import Any, Dict, Optional
-from pydantic import BaseModel, field_serializer, field_validator
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field, field_serializer, field_validator
 from enum import Enum as PyEnum # Renamed to avoid conflict with Pydantic's Enum if any
 
 # CategoryBudgetOverview Models
@@ -70,6 +70,70 @@ class TransactionDetail(TransactionDetailBase):
     class Config:
         from_attributes = True
 
+# Transaction Query Models
+class TransactionCursor(BaseModel):
+    transaction_date: datetime.date
+    id: int
+
+class TransactionQueryFilter(BaseModel):
+    start_date: Optional[datetime.date] = None
+    end_date: Optional[datetime.date] = None
+    category: Optional[str] = None
+    type: Optional[str] = None # e.g. "expense", "income"
+    min_amount_inr: Optional[float] = None
+    max_amount_inr: Optional[float] = None
+    location: Optional[str] = None
+    limit: int = 50
+    cursor: Optional[TransactionCursor] = None # next_cursor of the previous page
+
+    @field_validator('category', 'type', mode='before')
+    def lowercase_value(cls, value):
+        return value.lower() if value else value
+
+class TransactionPage(BaseModel):
+    items: List[TransactionDetail]
+    next_cursor: Optional[TransactionCursor] = None
+
+# Spend Summary Models
+class SpendGroupByEnum(str, PyEnum):
+    CATEGORY = "category"
+    MONTH = "month"
+    LOCATION = "location"
+    TYPE = "type"
+    DESCRIPTION = "description"
+
+class SpendSummaryRow(BaseModel):
+    key: Optional[str] = None # category / 'YYYY-MM' / location / type / description
+    transaction_count: int
+    total_amount_inr: float
+
+# Monthly Summary Models
+class MonthlySummaryFilter(BaseModel):
+    start_month: Optional[datetime.date] = None # any day of the first month
+    end_month: Optional[datetime.date] = None # any day of the last month
+    category: Optional[str] = None
+    type: Optional[str] = None
+
+    @field_validator('category', 'type', mode='before')
+    def lowercase_value(cls, value):
+        return value.lower() if value else value
+
+class MonthlySummaryRow(BaseModel):
+    month: str # 'YYYY-MM'
+    category: str
+    type: str
+    transaction_count: int
+    total_amount_inr: float
+
+# Statement Import Models
+class StatementImportProgress(BaseModel):
+    event: str # "progress", "completed" or "failed"
+    rows_read: int = 0
+    rows_imported: int = 0
+    rows_rejected: int = 0
+    errors: List[Dict[str, Any]] = []
+    detail: Optional[str] = None
+
 # --- Enum for Table Names and Operations ---
 class TableNameEnum(str, PyEnum):
     CATEGORY_BUDGET_OVERVIEW = "category_budget_overview"
@@ -91,6 +155,9 @@ class APIRequest(BaseModel):
 
 class QueryRequest(BaseModel):
     query: str
+    prompt_variant: Optional[str] = None # name of a prompt file in infrastructure/prompts, e.g. "prompt_1"
+    thread_id: Optional[str] = Field(default=None, min_length=1, max_length=128) # continue a multi-turn conversation
 
 class BudgetAgentResponse(BaseModel):
-    response: Dict[str, Any] | str | list[Dict[str, Any]]
\ No newline at end of file
+    response: Dict[str, Any] | str | list[Dict[str, Any]]
+    thread_id: Optional[str] = None # echoed when the request belongs to a conversation thread
\ No newline at end of file
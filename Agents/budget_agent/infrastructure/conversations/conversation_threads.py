@@ -0,0 +1,249 @@
+"""
+Multi-turn conversations with the budget agent (SQLite locally, Postgres in production).
+
+A request carrying a `thread_id` runs the agent with a LangGraph checkpointer,
+so the messages of the previous turns of the thread, including tool calls and
+their results, are restored instead of starting from an empty message list. A
+follow-up like "now delete the second one" can then use the transactions
+listed in the previous turn without fetching them again.
+
+The stored history keeps growing, but the model only sees its most recent
+part: `trim_history` (the agent's pre_model_hook) keeps the last turns that
+fit in `conversation_max_history_tokens`, always starting on a user message
+so a tool call is never separated from its result. Threads idle for longer
+than `conversation_thread_idle_ttl_s` are deleted, checkpoints included.
+"""
+
+import asyncio
+import datetime
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import IntegrityError
+
+from core.logger import LOGGER
+from core.settings import SETTINGS
+from agents.budget_agent.domain.conversation_thread_entity import conversation_threads_table, metadata
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def trim_history(state: Dict[str, Any]) -> Dict[str, Any]:
+    """pre_model_hook: sends the model the latest turns within the token budget, the stored history is untouched."""
+    messages: List[BaseMessage] = state["messages"]
+    max_tokens = SETTINGS.conversation_max_history_tokens
+    if count_tokens_approximately(messages) <= max_tokens:
+        return {"llm_input_messages": messages}
+    trimmed = trim_messages(
+        messages,
+        max_tokens=max_tokens,
+        token_counter=count_tokens_approximately,
+        strategy="last",
+        start_on="human",
+    )
+    if not trimmed:
+        # The current turn alone is over the budget: it is always sent whole
+        last_user_message = max((index for index, message in enumerate(messages) if message.type == "human"), default=0)
+        trimmed = messages[last_user_message:]
+    LOGGER.debug("Trimmed the conversation history from %s to %s messages", len(messages), len(trimmed))
+    return {"llm_input_messages": trimmed}
+
+
+class ThreadOffloadingSaver(BaseCheckpointSaver):
+    """
+    Gives a synchronous checkpointer (SqliteSaver, PostgresSaver) the async
+    interface used by ainvoke/astream_events: each async call runs the sync
+    method in a worker thread, the same way the tools keep their database
+    calls off the event loop. The sync calls of invoke go straight through.
+    """
+
+    def __init__(self, saver: BaseCheckpointSaver):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+
+    @property
+    def config_specs(self):
+        return self.saver.config_specs
+
+    def get_tuple(self, config):
+        return self.saver.get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None) -> Iterator:
+        return self.saver.list(config, filter=filter, before=before, limit=limit)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        return self.saver.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes: Sequence, task_id: str, task_path: str = "") -> None:
+        self.saver.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.saver.delete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.saver.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator:
+        checkpoints = await asyncio.to_thread(lambda: list(self.saver.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.saver.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes: Sequence, task_id: str, task_path: str = "") -> None:
+        await asyncio.to_thread(self.saver.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.saver.delete_thread, thread_id)
+
+
+def create_checkpointer(db_url: str) -> BaseCheckpointSaver:
+    """LangGraph checkpointer for a SQLAlchemy-style URL: sqlite:///file.db or postgresql://..."""
+    url = make_url(db_url)
+    if url.get_backend_name() == "sqlite":
+        from langgraph.checkpoint.sqlite import SqliteSaver
+
+        saver = SqliteSaver(sqlite3.connect(url.database or ":memory:", check_same_thread=False))
+    elif url.get_backend_name() == "postgresql":
+        from langgraph.checkpoint.postgres import PostgresSaver
+        from psycopg.rows import dict_row
+        from psycopg_pool import ConnectionPool
+
+        conninfo = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        pool = ConnectionPool(conninfo, max_size=SETTINGS.new_db_pool, kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row})
+        saver = PostgresSaver(pool)
+    else:
+        raise ValueError(f"Unsupported conversation store URL: {db_url}")
+    saver.setup()
+    return ThreadOffloadingSaver(saver)
+
+
+class ConversationThreads:
+
+    def __init__(self, db_url: str, idle_ttl_s: float, eviction_interval_s: float):
+        self.db_url = db_url
+        self.idle_ttl_s = idle_ttl_s
+        self.eviction_interval_s = eviction_interval_s
+        self._engine: Optional[Engine] = None
+        self._checkpointer: Optional[BaseCheckpointSaver] = None
+        self._lock = threading.Lock()
+        self._evicted_at = float("-inf")
+        self._counters_lock = threading.Lock()
+        self._counters = {"turns": 0, "new_threads": 0, "evicted_threads": 0, "deleted_threads": 0}
+
+    @property
+    def engine(self) -> Engine:
+        with self._lock:
+            if self._engine is None:
+                connect_args = {"check_same_thread": False, "timeout": 30} if self.db_url.startswith("sqlite") else {}
+                engine = create_engine(self.db_url, connect_args=connect_args, pool_pre_ping=True)
+                metadata.create_all(engine, tables=[conversation_threads_table])
+                self._engine = engine
+            return self._engine
+
+    @property
+    def checkpointer(self) -> BaseCheckpointSaver:
+        """Created on first use, so the store is only opened once a thread is actually used."""
+        with self._lock:
+            if self._checkpointer is None:
+                self._checkpointer = create_checkpointer(self.db_url)
+                LOGGER.info("Conversation checkpointer ready (%s)", make_url(self.db_url).get_backend_name())
+            return self._checkpointer
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._counters_lock:
+            self._counters[counter] += amount
+
+    def run_config(self, thread_id: str) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": thread_id}}
+
+    def touch(self, thread_id: str) -> None:
+        """Records a turn on the thread, and evicts the idle threads at most once per eviction interval."""
+        threads = conversation_threads_table
+        now = _utcnow()
+        with self.engine.begin() as connection:
+            updated = connection.execute(
+                threads.update().where(threads.c.thread_id == thread_id).values(last_used_at=now, turns=threads.c.turns + 1)
+            ).rowcount
+        if not updated:
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(threads.insert().values(thread_id=thread_id, created_at=now, last_used_at=now, turns=1))
+                self._count("new_threads")
+            except IntegrityError:
+                # Another request created it first
+                with self.engine.begin() as connection:
+                    connection.execute(
+                        threads.update().where(threads.c.thread_id == thread_id).values(last_used_at=now, turns=threads.c.turns + 1)
+                    )
+        self._count("turns")
+
+        monotonic_now = time.monotonic()
+        if monotonic_now - self._evicted_at >= self.eviction_interval_s:
+            self._evicted_at = monotonic_now
+            try:
+                self.evict_idle()
+            except Exception as e:
+                LOGGER.error("Conversation thread eviction failed: %s", e, exc_info=True)
+
+    def evict_idle(self) -> int:
+        """Deletes the threads (and their checkpoints) idle for longer than the idle TTL. Returns how many."""
+        threads = conversation_threads_table
+        cutoff = _utcnow() - datetime.timedelta(seconds=self.idle_ttl_s)
+        with self.engine.connect() as connection:
+            idle = connection.execute(select(threads.c.thread_id).where(threads.c.last_used_at < cutoff)).scalars().all()
+        for thread_id in idle:
+            self._delete(thread_id)
+        if idle:
+            LOGGER.info("Evicted %s idle conversation threads", len(idle))
+            self._count("evicted_threads", len(idle))
+        return len(idle)
+
+    def delete(self, thread_id: str) -> bool:
+        """Deletes a thread and its checkpoints; False when the thread is unknown."""
+        deleted = self._delete(thread_id)
+        if deleted:
+            self._count("deleted_threads")
+        return deleted
+
+    def _delete(self, thread_id: str) -> bool:
+        self.checkpointer.delete_thread(thread_id)
+        with self.engine.begin() as connection:
+            return connection.execute(
+                delete(conversation_threads_table).where(conversation_threads_table.c.thread_id == thread_id)
+            ).rowcount > 0
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self.engine.connect() as connection:
+                threads = connection.execute(select(func.count()).select_from(conversation_threads_table)).scalar_one()
+        except Exception as e:
+            LOGGER.error("Could not count conversation threads: %s", e)
+            threads = None
+        with self._counters_lock:
+            return {
+                **self._counters,
+                "threads": threads,
+                "idle_ttl_s": self.idle_ttl_s,
+                "max_history_tokens": SETTINGS.conversation_max_history_tokens,
+            }
+
+
+CONVERSATION_THREADS = ConversationThreads(
+    SETTINGS.conversation_threads_db_url,
+    idle_ttl_s=SETTINGS.conversation_thread_idle_ttl_s,
+    eviction_interval_s=SETTINGS.conversation_thread_eviction_interval_s,
+)
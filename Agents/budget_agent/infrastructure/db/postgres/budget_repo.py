@@ -1,18 +1,41 @@
 
-from typing import Any, Dict, List, Optional
-from pydantic import BaseModel
-from sqlalchemy import Table
-from core.logger import LOGGER
-
-from agents.budget_agent.domain.budget_entity import category_budget_table, transaction_details_table
+import csv
+import datetime
+import io
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from collections import defaultdict
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Date, Float, String, Table, cast, column, func, select, tuple_, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from core.logger import LOGGER, LazySQL
+
+from agents.budget_agent.domain.budget_entity import (category_budget_table,
+                                                       monthly_category_summary_table,
+                                                       transaction_details_table)
 from agents.budget_agent.domain.schemas import (TableNameEnum, 
                             TransactionDetail, 
                             TransactionDetailCreate, 
                             TransactionDetailUpdate, 
                             CategoryBudgetOverviewCreate, 
                             CategoryBudgetOverviewUpdate, 
-                            CategoryBudgetOverview) 
+                            CategoryBudgetOverview,
+                            TransactionQueryFilter,
+                            SpendGroupByEnum,
+                            MonthlySummaryFilter) 
 from agents.budget_agent.domain.interface.interface_context_repo import IRepoContext
+from agents.budget_agent.infrastructure.db.postgres.category_budget_cache import CATEGORY_BUDGET_CACHE
+from agents.budget_agent.infrastructure.db.postgres.data_version import BUDGET_DATA_VERSION
+
+# Hard cap on the number of rows a single transaction query may return
+MAX_TRANSACTION_PAGE_SIZE = 200
+# Rows per multi-row INSERT, keeps each statement well below Postgres' bind parameter limit
+BULK_INSERT_BATCH_SIZE = 1000
+
+# Statement logging is hot (one record per query): kept on its own logger so it can be sampled
+SQL_LOGGER = LOGGER.getChild("sql")
+
+# (month, category, type) -> [transaction count change, amount change]
+SummaryChanges = Dict[Tuple[datetime.date, str, str], List[float]]
 
 
 # --- Database CRUD Class ---
@@ -34,6 +57,8 @@ class BudgetRepo:
             TableNameEnum.CATEGORY_BUDGET_OVERVIEW: CategoryBudgetOverview,
             TableNameEnum.TRANSACTION_DETAILS: TransactionDetail,
         }
+        self.category_budget_cache = CATEGORY_BUDGET_CACHE
+        self.data_version = BUDGET_DATA_VERSION
 
     def _get_sqla_table(self, table_name: TableNameEnum) -> Table:
         sqla_table = self.table_map.get(table_name)
@@ -56,34 +81,98 @@ class BudgetRepo:
             raise ValueError(f"No Pydantic {model_type} model for table: {table_name.value}")
         return model
     
-    def _update_category_budget(self, repo_context: IRepoContext, category_name: str, amount_change: float):
+    def _update_category_budget(self, repo_context: IRepoContext, category_name: str, amount_change: float) -> Optional[Dict[str, Any]]:
         """
         Helper function to update total_spent and remaining_budget for a category.
         'amount_change' is positive for an expense, negative for an income or reversal.
+        The rollup is a single atomic UPDATE evaluated against the current row, so
+        concurrent expenses in the same category cannot lose updates. It is not
+        committed here; the use case commits it together with the transaction write.
         """
 
         category_budget_s = self._get_sqla_table(TableNameEnum.CATEGORY_BUDGET_OVERVIEW)
-        
-        # Fetch the current budget and spent amount
-        stmt = category_budget_s.select().where(category_budget_s.c.category == category_name)
-        category_row = repo_context.session.execute(stmt).fetchone()
-
-        if category_row:
-            new_total_spent = category_row.total_spent_inr + amount_change
-            remaining_budget = category_row.budget_inr - new_total_spent
-            update_stmt = category_budget_s.update().where(category_budget_s.c.category == category_name).values(total_spent_inr=new_total_spent, remaining_budget_inr=remaining_budget)
-            repo_context.session.execute(update_stmt)
-            repo_context.session.commit()
-        LOGGER.info(f"Updated the budget for the category {category_name}")
+        new_total_spent = func.coalesce(category_budget_s.c.total_spent_inr, 0.0) + amount_change
+
+        update_stmt = (
+            category_budget_s.update()
+            .where(category_budget_s.c.category == category_name)
+            .values(total_spent_inr=new_total_spent, remaining_budget_inr=category_budget_s.c.budget_inr - new_total_spent)
+            .returning(*category_budget_s.c)
+        )
+        category_row = repo_context.session.execute(update_stmt).fetchone()
+        self.category_budget_cache.mark_changed(repo_context.session)
+        self.data_version.mark_changed(repo_context.session)
+        LOGGER.info("Updated the budget for the category %s", category_name)
+        return dict(category_row._mapping) if category_row else None
+
+    def _update_category_budgets(self, repo_context: IRepoContext, amount_changes: Dict[str, float]) -> None:
+        """
+        Applies the rollup for several categories at once: a single
+        UPDATE ... FROM (VALUES (category, delta), ...) with one aggregated delta per category.
+        """
+
+        amount_changes = {category: amount for category, amount in amount_changes.items() if amount}
+        if not amount_changes:
+            return
+
+        category_budget_s = self._get_sqla_table(TableNameEnum.CATEGORY_BUDGET_OVERVIEW)
+        deltas = values(column("category", String), column("amount_change", Float), name="deltas").data(
+            sorted(amount_changes.items())
+        )
+        new_total_spent = func.coalesce(category_budget_s.c.total_spent_inr, 0.0) + deltas.c.amount_change
+
+        update_stmt = (
+            category_budget_s.update()
+            .where(category_budget_s.c.category == deltas.c.category)
+            .values(total_spent_inr=new_total_spent, remaining_budget_inr=category_budget_s.c.budget_inr - new_total_spent)
+        )
+        repo_context.session.execute(update_stmt)
+        self.category_budget_cache.mark_changed(repo_context.session)
+        self.data_version.mark_changed(repo_context.session)
+        LOGGER.info("Updated the budget for the categories %s", sorted(amount_changes))
+
+    @staticmethod
+    def _add_summary_change(summary_changes: SummaryChanges, transaction: Dict[str, Any], sign: int) -> None:
+        """Records the effect of adding (sign=1) or removing (sign=-1) a transaction on its monthly summary row."""
+        key = (transaction["transaction_date"].replace(day=1), transaction["category"], (transaction.get("type") or "").lower())
+        change = summary_changes.setdefault(key, [0, 0.0])
+        change[0] += sign
+        change[1] += sign * transaction["amount_inr"]
+
+    def _update_monthly_summary(self, repo_context: IRepoContext, summary_changes: SummaryChanges) -> None:
+        """
+        Applies transaction count/amount changes to monthly_category_summary with a single
+        INSERT ... ON CONFLICT DO UPDATE (one row per touched month, category and type).
+        """
+
+        summary_rows = [
+            {"month": month, "category": category, "type": type_, "transaction_count": count, "total_amount_inr": amount}
+            for (month, category, type_), (count, amount) in sorted(summary_changes.items())
+            if count or amount
+        ]
+        if not summary_rows:
+            return
+
+        summary_table = monthly_category_summary_table
+        insert_stmt = pg_insert(summary_table).values(summary_rows)
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[summary_table.c.month, summary_table.c.category, summary_table.c.type],
+            set_={
+                "transaction_count": summary_table.c.transaction_count + insert_stmt.excluded.transaction_count,
+                "total_amount_inr": summary_table.c.total_amount_inr + insert_stmt.excluded.total_amount_inr,
+            },
+        )
+        repo_context.session.execute(upsert_stmt)
+        LOGGER.debug("Updated %s monthly summary rows", len(summary_rows))
 
     def add_item(self, repo_context: IRepoContext, table_name: TableNameEnum, item_payload: Dict[str, Any]) -> Dict[str, Any]:
         sqla_table = self._get_sqla_table(table_name)
         PydanticCreateModel = self.get_pydantic_model(table_name, "create")
-        LOGGER.info(f"Attempting to add item to table '{table_name.value}' with payload: {item_payload}")
+        LOGGER.info("Attempting to add item to table '%s' with payload: %s", table_name.value, item_payload)
 
         # Calculate remaining_budget for category_budget_overview
         if table_name == TableNameEnum.CATEGORY_BUDGET_OVERVIEW:
-            LOGGER.debug(f"Calculating remaining budget for category: {item_payload.get('category')}")
+            LOGGER.debug("Calculating remaining budget for category: %s", item_payload.get('category'))
             budget = item_payload.get("budget_inr", 0.0)
             spent = item_payload.get("total_spent_inr", 0.0)
             item_payload["remaining_budget_inr"] = budget - spent
@@ -91,42 +180,357 @@ class BudgetRepo:
         item_create = PydanticCreateModel(**item_payload)
 
         insert_stmt = sqla_table.insert().values(**item_create.model_dump())
-        LOGGER.debug(f"Executing SQL (add_item): {insert_stmt.compile(compile_kwargs={'literal_binds': True})}")
+        SQL_LOGGER.debug("Executing SQL (add_item): %s", LazySQL(insert_stmt))
         result = repo_context.session.execute(insert_stmt)
-        repo_context.session.commit()
+        self.data_version.mark_changed(repo_context.session)
 
         inserted_id = result.inserted_primary_key[0]
-        LOGGER.info(f"Successfully added item with ID {inserted_id} to table '{table_name.value}'.")
+        LOGGER.info("Successfully added item with ID %s to table '%s'.", inserted_id, table_name.value)
+
+        if table_name == TableNameEnum.CATEGORY_BUDGET_OVERVIEW:
+            self.category_budget_cache.mark_changed(repo_context.session)
 
         # If a transaction was added, update category budget
         if table_name == TableNameEnum.TRANSACTION_DETAILS and item_create.type.lower() == 'expense':
-            LOGGER.info(f"Updating category budget for '{item_create.category}' due to new expense of {item_create.amount_inr}.")
+            LOGGER.info("Updating category budget for '%s' due to new expense of %s.", item_create.category, item_create.amount_inr)
             self._update_category_budget(repo_context, item_create.category, item_create.amount_inr)
+
+        if table_name == TableNameEnum.TRANSACTION_DETAILS:
+            summary_changes: SummaryChanges = {}
+            self._add_summary_change(summary_changes, item_create.model_dump(), 1)
+            self._update_monthly_summary(repo_context, summary_changes)
+
         return {"id": inserted_id, **item_create.model_dump()}
 
+    def add_items_bulk(self, repo_context: IRepoContext, table_name: TableNameEnum, item_payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Adds many items at once: the whole batch is validated in one pass, inserted with
+        multi-row INSERT ... RETURNING statements and, for transactions, rolled up with
+        one aggregated delta per distinct category.
+        """
+
+        sqla_table = self._get_sqla_table(table_name)
+        PydanticCreateModel = self.get_pydantic_model(table_name, "create")
+        LOGGER.info("Attempting to add %s items to table '%s'.", len(item_payloads), table_name.value)
+
+        if table_name == TableNameEnum.CATEGORY_BUDGET_OVERVIEW:
+            for item_payload in item_payloads:
+                item_payload["remaining_budget_inr"] = item_payload.get("budget_inr", 0.0) - item_payload.get("total_spent_inr", 0.0)
+
+        items_create = TypeAdapter(List[PydanticCreateModel]).validate_python(item_payloads)
+        rows = [item_create.model_dump() for item_create in items_create]
+
+        inserted_items = []
+        for batch_start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            insert_stmt = sqla_table.insert().values(rows[batch_start:batch_start + BULK_INSERT_BATCH_SIZE]).returning(*sqla_table.c)
+            results = repo_context.session.execute(insert_stmt).fetchall()
+            inserted_items.extend(dict(row._mapping) for row in results)
+        self.data_version.mark_changed(repo_context.session)
+        LOGGER.info("Successfully added %s items to table '%s'.", len(inserted_items), table_name.value)
+
+        if table_name == TableNameEnum.CATEGORY_BUDGET_OVERVIEW:
+            self.category_budget_cache.mark_changed(repo_context.session)
+
+        if table_name == TableNameEnum.TRANSACTION_DETAILS:
+            amount_changes: Dict[str, float] = defaultdict(float)
+            for item_create in items_create:
+                if item_create.type.lower() == 'expense':
+                    amount_changes[item_create.category] += item_create.amount_inr
+            self._update_category_budgets(repo_context, amount_changes)
+
+            summary_changes: SummaryChanges = {}
+            for inserted_item in inserted_items:
+                self._add_summary_change(summary_changes, inserted_item, 1)
+            self._update_monthly_summary(repo_context, summary_changes)
+
+        return inserted_items
+
+    def copy_transactions(self, repo_context: IRepoContext, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Bulk-loads already validated transaction rows with Postgres COPY and updates the monthly summary.
+        Category rollups are not applied here; see apply_category_rollups.
+        """
+
+        sqla_table = self._get_sqla_table(TableNameEnum.TRANSACTION_DETAILS)
+        csv_buffer = io.StringIO()
+        writer = csv.writer(csv_buffer)
+        summary_changes: SummaryChanges = {}
+        row_count = 0
+        for row in rows:
+            writer.writerow(row)
+            self._add_summary_change(summary_changes, dict(zip(columns, row)), 1)
+            row_count += 1
+        if not row_count:
+            return 0
+        csv_buffer.seek(0)
+
+        copy_sql = f"COPY {sqla_table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        dbapi_connection = repo_context.session.connection().connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(copy_sql, csv_buffer)
+        self.data_version.mark_changed(repo_context.session)
+        LOGGER.info("Copied %s rows into table '%s'.", row_count, sqla_table.name)
+
+        self._update_monthly_summary(repo_context, summary_changes)
+        return row_count
+
+    def apply_category_rollups(self, repo_context: IRepoContext, amount_changes: Dict[str, float]) -> None:
+        self._update_category_budgets(repo_context, amount_changes)
+
+    def _use_category_budget_cache(self, repo_context: IRepoContext, table_name: TableNameEnum) -> bool:
+        # A unit of work that wrote category budgets must see its own uncommitted rows
+        return table_name == TableNameEnum.CATEGORY_BUDGET_OVERVIEW and not self.category_budget_cache.is_dirty(repo_context)
+
     def get_item_by_id(self, repo_context: IRepoContext, table_name: TableNameEnum, item_id: int) -> Optional[Dict[str, Any]]:
 
+        if not self._use_category_budget_cache(repo_context, table_name):
+            return self._select_item_by_id(repo_context, table_name, item_id)
+
+        cached_item = self.category_budget_cache.get(("id", item_id))
+        if cached_item is not None:
+            return dict(cached_item)
+        generation = self.category_budget_cache.generation
+        item = self._select_item_by_id(repo_context, table_name, item_id)
+        if item is not None:
+            self.category_budget_cache.put(("id", item_id), dict(item), generation)
+        return item
+
+    def _select_item_by_id(self, repo_context: IRepoContext, table_name: TableNameEnum, item_id: int) -> Optional[Dict[str, Any]]:
+
         sqla_table = self._get_sqla_table(table_name)
-        LOGGER.info(f"Attempting to get item with ID {item_id} from table '{table_name.value}'.")
+        LOGGER.info("Attempting to get item with ID %s from table '%s'.", item_id, table_name.value)
         select_stmt = sqla_table.select().where(sqla_table.c.id == item_id)
-        LOGGER.debug(f"Executing SQL (get_item_by_id): {select_stmt.compile(compile_kwargs={'literal_binds': True})}")
+        SQL_LOGGER.debug("Executing SQL (get_item_by_id): %s", LazySQL(select_stmt))
         result = repo_context.session.execute(select_stmt).fetchone()
         if result:
-            LOGGER.info(f"Found item with ID {item_id} in table '{table_name.value}'.")
+            LOGGER.info("Found item with ID %s in table '%s'.", item_id, table_name.value)
             return dict(result._mapping)
-        LOGGER.warning(f"Item with ID {item_id} not found in table '{table_name.value}'.")
+        LOGGER.warning("Item with ID %s not found in table '%s'.", item_id, table_name.value)
         return None
 
     def get_all_items(self, repo_context: IRepoContext, table_name: TableNameEnum) -> List[Dict[str, Any]]:
 
+        if not self._use_category_budget_cache(repo_context, table_name):
+            return self._select_all_items(repo_context, table_name)
+
+        cached_items = self.category_budget_cache.get(("all",))
+        if cached_items is not None:
+            return [dict(item) for item in cached_items]
+        generation = self.category_budget_cache.generation
+        items = self._select_all_items(repo_context, table_name)
+        self.category_budget_cache.put(("all",), [dict(item) for item in items], generation)
+        return items
+
+    def _select_all_items(self, repo_context: IRepoContext, table_name: TableNameEnum) -> List[Dict[str, Any]]:
+
         sqla_table = self._get_sqla_table(table_name)
-        LOGGER.info(f"Attempting to get all items from table '{table_name.value}'.")
+        LOGGER.info("Attempting to get all items from table '%s'.", table_name.value)
         select_stmt = sqla_table.select()
-        LOGGER.debug(f"Executing SQL (get_all_items): {select_stmt.compile(compile_kwargs={'literal_binds': True})}")
+        SQL_LOGGER.debug("Executing SQL (get_all_items): %s", LazySQL(select_stmt))
         results = repo_context.session.execute(select_stmt).fetchall()
-        LOGGER.info(f"Retrieved {len(results)} items from table '{table_name.value}'.")
+        LOGGER.info("Retrieved %s items from table '%s'.", len(results), table_name.value)
         return [dict(row._mapping) for row in results]
         
+    def _build_transaction_filters(self, sqla_table: Table, filters: TransactionQueryFilter) -> List[Any]:
+        conditions = []
+        if filters.start_date is not None:
+            conditions.append(sqla_table.c.transaction_date >= filters.start_date)
+        if filters.end_date is not None:
+            conditions.append(sqla_table.c.transaction_date <= filters.end_date)
+        if filters.category:
+            conditions.append(sqla_table.c.category == filters.category)
+        if filters.type:
+            conditions.append(func.lower(sqla_table.c.type) == filters.type)
+        if filters.min_amount_inr is not None:
+            conditions.append(sqla_table.c.amount_inr >= filters.min_amount_inr)
+        if filters.max_amount_inr is not None:
+            conditions.append(sqla_table.c.amount_inr <= filters.max_amount_inr)
+        if filters.location:
+            conditions.append(sqla_table.c.location.ilike(f"%{filters.location}%"))
+        return conditions
+
+    def query_transactions(self, repo_context: IRepoContext, filters: TransactionQueryFilter) -> Dict[str, Any]:
+        """
+        Returns one page of transactions matching the filters, newest first.
+        Pagination is keyset based on (transaction_date, id), so deep pages cost the same as the first one.
+        """
+
+        sqla_table = self._get_sqla_table(TableNameEnum.TRANSACTION_DETAILS)
+        limit = max(1, min(filters.limit, MAX_TRANSACTION_PAGE_SIZE))
+        LOGGER.info("Querying transactions with filters: %s", filters.model_dump(exclude_none=True))
+
+        conditions = self._build_transaction_filters(sqla_table, filters)
+        if filters.cursor is not None:
+            conditions.append(
+                tuple_(sqla_table.c.transaction_date, sqla_table.c.id)
+                < tuple_(filters.cursor.transaction_date, filters.cursor.id)
+            )
+
+        select_stmt = (
+            sqla_table.select()
+            .where(*conditions)
+            .order_by(sqla_table.c.transaction_date.desc(), sqla_table.c.id.desc())
+            .limit(limit + 1)
+        )
+        SQL_LOGGER.debug("Executing SQL (query_transactions): %s", LazySQL(select_stmt))
+        results = repo_context.session.execute(select_stmt).fetchall()
+
+        items = [dict(row._mapping) for row in results[:limit]]
+        next_cursor = None
+        if len(results) > limit:
+            last_item = items[-1]
+            next_cursor = {"transaction_date": last_item["transaction_date"], "id": last_item["id"]}
+        LOGGER.info("Retrieved %s transactions (more available: %s).", len(items), next_cursor is not None)
+        return {"items": items, "next_cursor": next_cursor}
+
+    def aggregate_transactions(self, repo_context: IRepoContext, group_by: SpendGroupByEnum, filters: TransactionQueryFilter, top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the transaction count and total amount per group, computed by Postgres (GROUP BY).
+        With top_n, only the top_n groups by total amount are returned.
+        """
+
+        if top_n is None and self._monthly_summary_covers(group_by, filters):
+            return self._aggregate_from_monthly_summary(repo_context, group_by, filters)
+
+        sqla_table = self._get_sqla_table(TableNameEnum.TRANSACTION_DETAILS)
+        LOGGER.info("Aggregating transactions by '%s' with filters: %s", group_by.value, filters.model_dump(exclude_none=True))
+
+        group_columns = {
+            SpendGroupByEnum.CATEGORY: sqla_table.c.category,
+            SpendGroupByEnum.MONTH: func.to_char(func.date_trunc('month', sqla_table.c.transaction_date), 'YYYY-MM'),
+            SpendGroupByEnum.LOCATION: sqla_table.c.location,
+            SpendGroupByEnum.TYPE: func.lower(sqla_table.c.type),
+            SpendGroupByEnum.DESCRIPTION: sqla_table.c.description,
+        }
+        group_column = group_columns[group_by].label("key")
+        total_column = func.sum(sqla_table.c.amount_inr).label("total_amount_inr")
+        conditions = self._build_transaction_filters(sqla_table, filters)
+
+        if top_n is not None:
+            # A missing description/location is not a merchant, keep it out of the ranking
+            conditions.append(group_columns[group_by].isnot(None))
+
+        select_stmt = (
+            select(group_column, func.count().label("transaction_count"), total_column)
+            .where(*conditions)
+            .group_by(group_column)
+        )
+        if top_n is not None:
+            select_stmt = select_stmt.order_by(total_column.desc()).limit(max(1, min(top_n, MAX_TRANSACTION_PAGE_SIZE)))
+        else:
+            select_stmt = select_stmt.order_by(group_column)
+
+        SQL_LOGGER.debug("Executing SQL (aggregate_transactions): %s", LazySQL(select_stmt))
+        results = repo_context.session.execute(select_stmt).fetchall()
+        LOGGER.info("Aggregated transactions into %s groups.", len(results))
+        return [dict(row._mapping) for row in results]
+
+    @staticmethod
+    def _monthly_summary_covers(group_by: SpendGroupByEnum, filters: TransactionQueryFilter) -> bool:
+        """True when the aggregation can be answered from whole months of monthly_category_summary."""
+        if group_by not in (SpendGroupByEnum.CATEGORY, SpendGroupByEnum.MONTH, SpendGroupByEnum.TYPE):
+            return False
+        if any(value is not None for value in (filters.min_amount_inr, filters.max_amount_inr, filters.location)):
+            return False
+        if filters.start_date is not None and filters.start_date.day != 1:
+            return False
+        if filters.end_date is not None and (filters.end_date + datetime.timedelta(days=1)).day != 1:
+            return False
+        return True
+
+    def _aggregate_from_monthly_summary(self, repo_context: IRepoContext, group_by: SpendGroupByEnum, filters: TransactionQueryFilter) -> List[Dict[str, Any]]:
+        summary_table = monthly_category_summary_table
+        LOGGER.info("Aggregating monthly summary by '%s' with filters: %s", group_by.value, filters.model_dump(exclude_none=True))
+
+        group_columns = {
+            SpendGroupByEnum.CATEGORY: summary_table.c.category,
+            SpendGroupByEnum.MONTH: func.to_char(summary_table.c.month, 'YYYY-MM'),
+            SpendGroupByEnum.TYPE: summary_table.c.type,
+        }
+        group_column = group_columns[group_by].label("key")
+
+        conditions = [summary_table.c.transaction_count > 0]
+        if filters.start_date is not None:
+            conditions.append(summary_table.c.month >= filters.start_date)
+        if filters.end_date is not None:
+            conditions.append(summary_table.c.month <= filters.end_date)
+        if filters.category:
+            conditions.append(summary_table.c.category == filters.category)
+        if filters.type:
+            conditions.append(summary_table.c.type == filters.type)
+
+        select_stmt = (
+            select(
+                group_column,
+                func.sum(summary_table.c.transaction_count).label("transaction_count"),
+                func.sum(summary_table.c.total_amount_inr).label("total_amount_inr"),
+            )
+            .where(*conditions)
+            .group_by(group_column)
+            .order_by(group_column)
+        )
+        SQL_LOGGER.debug("Executing SQL (aggregate_from_monthly_summary): %s", LazySQL(select_stmt))
+        results = repo_context.session.execute(select_stmt).fetchall()
+        return [dict(row._mapping) for row in results]
+
+    def get_monthly_summary(self, repo_context: IRepoContext, filters: MonthlySummaryFilter) -> List[Dict[str, Any]]:
+        """Returns rows of monthly_category_summary (an index lookup, no scan of transaction_details)."""
+
+        summary_table = monthly_category_summary_table
+        conditions = [summary_table.c.transaction_count > 0]
+        if filters.start_month is not None:
+            conditions.append(summary_table.c.month >= filters.start_month.replace(day=1))
+        if filters.end_month is not None:
+            conditions.append(summary_table.c.month <= filters.end_month.replace(day=1))
+        if filters.category:
+            conditions.append(summary_table.c.category == filters.category)
+        if filters.type:
+            conditions.append(summary_table.c.type == filters.type)
+
+        select_stmt = (
+            select(
+                func.to_char(summary_table.c.month, 'YYYY-MM').label("month"),
+                summary_table.c.category,
+                summary_table.c.type,
+                summary_table.c.transaction_count,
+                summary_table.c.total_amount_inr,
+            )
+            .where(*conditions)
+            .order_by(summary_table.c.month, summary_table.c.category, summary_table.c.type)
+        )
+        SQL_LOGGER.debug("Executing SQL (get_monthly_summary): %s", LazySQL(select_stmt))
+        results = repo_context.session.execute(select_stmt).fetchall()
+        LOGGER.info("Retrieved %s monthly summary rows.", len(results))
+        return [dict(row._mapping) for row in results]
+
+    def rebuild_monthly_summary(self, repo_context: IRepoContext) -> int:
+        """Recomputes monthly_category_summary from scratch out of transaction_details."""
+
+        transactions = self._get_sqla_table(TableNameEnum.TRANSACTION_DETAILS)
+        summary_table = monthly_category_summary_table
+        month_column = cast(func.date_trunc('month', transactions.c.transaction_date), Date)
+        type_column = func.lower(transactions.c.type)
+
+        totals_select = (
+            select(
+                month_column,
+                transactions.c.category,
+                type_column,
+                func.count(),
+                func.sum(transactions.c.amount_inr),
+            )
+            .group_by(month_column, transactions.c.category, type_column)
+        )
+        repo_context.session.execute(summary_table.delete())
+        result = repo_context.session.execute(
+            summary_table.insert().from_select(
+                ["month", "category", "type", "transaction_count", "total_amount_inr"], totals_select
+            )
+        )
+        self.data_version.mark_changed(repo_context.session)
+        LOGGER.info("Rebuilt monthly summary with %s rows.", result.rowcount)
+        return result.rowcount
+
     def update_item(self, repo_context: IRepoContext, table_name: TableNameEnum, item_id: int, item_payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
 
         sqla_table = self._get_sqla_table(table_name)
@@ -141,7 +545,8 @@ class BudgetRepo:
             return self.get_item_by_id(repo_context, table_name, item_id)
 
         if table_name == TableNameEnum.CATEGORY_BUDGET_OVERVIEW:
-            update_data = self._recalculate_remaining_budget(repo_context, item_id, update_data)
+            self.category_budget_cache.mark_changed(repo_context.session)
+            update_data = self._recalculate_remaining_budget(update_data)
 
         update_stmt = (
         sqla_table.update()
@@ -149,13 +554,18 @@ class BudgetRepo:
         .values(**update_data)
         .returning(*sqla_table.c)
         )
-        LOGGER.debug(f"Executing SQL (update_item): {update_stmt.compile(compile_kwargs={'literal_binds': True})}")
+        SQL_LOGGER.debug("Executing SQL (update_item): %s", LazySQL(update_stmt))
         result = repo_context.session.execute(update_stmt).fetchone()
-        repo_context.session.commit()
+        self.data_version.mark_changed(repo_context.session)
 
         if table_name == TableNameEnum.TRANSACTION_DETAILS and result:
             self._handle_transaction_budget_update(repo_context, item_id, old_item_dict, dict(result._mapping))
 
+            summary_changes: SummaryChanges = {}
+            self._add_summary_change(summary_changes, old_item_dict, -1)
+            self._add_summary_change(summary_changes, dict(result._mapping), 1)
+            self._update_monthly_summary(repo_context, summary_changes)
+
         if not result:
             return None
 
@@ -165,20 +575,22 @@ class BudgetRepo:
 
     def _fetch_old_item_if_needed(self, repo_context: IRepoContext, table_name: TableNameEnum, item_id: int) -> Optional[Dict[str, Any]]:
         if table_name == TableNameEnum.TRANSACTION_DETAILS:
-            return self.get_item_by_id(repo_context, table_name, item_id)
+            # Lock the row, so a concurrent update cannot change the amount the rollup delta is based on
+            sqla_table = self._get_sqla_table(table_name)
+            select_stmt = sqla_table.select().where(sqla_table.c.id == item_id).with_for_update()
+            result = repo_context.session.execute(select_stmt).fetchone()
+            return dict(result._mapping) if result else None
         return None
 
     def _prepare_update_data(self, PydanticUpdateModel, item_payload: Dict[str, Any]) -> Dict[str, Any]:
         item_update = PydanticUpdateModel(**item_payload)
         return item_update.model_dump(exclude_unset=True)
 
-    def _recalculate_remaining_budget(self, repo_context: IRepoContext, item_id: int, update_data: Dict[str, Any]) -> Dict[str, Any]:
-        current_item = self.get_item_by_id(repo_context, TableNameEnum.CATEGORY_BUDGET_OVERVIEW, item_id)
-        if not current_item:
-            return update_data
-
-        budget = update_data.get('budget_inr', current_item.get('budget_inr'))
-        spent = update_data.get('total_spent_inr', current_item.get('total_spent_inr'))
+    def _recalculate_remaining_budget(self, update_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Evaluated by the UPDATE against the current row, so a rollup committed meanwhile is not overwritten
+        category_budget_s = self._get_sqla_table(TableNameEnum.CATEGORY_BUDGET_OVERVIEW)
+        budget = update_data.get('budget_inr', category_budget_s.c.budget_inr)
+        spent = update_data.get('total_spent_inr', func.coalesce(category_budget_s.c.total_spent_inr, 0.0))
         update_data['remaining_budget_inr'] = budget - spent
         return update_data
 
@@ -198,22 +610,24 @@ class BudgetRepo:
     def delete_item(self, repo_context: IRepoContext, table_name: TableNameEnum, item_id: int) -> bool:
 
         sqla_table = self._get_sqla_table(table_name)
-        LOGGER.info(f"Attempting to delete item with ID {item_id} from table '{table_name.value}'.")
-        delete_stmt = sqla_table.delete().where(sqla_table.c.id == item_id)
-        item_to_delete_dict = None
+        LOGGER.info("Attempting to delete item with ID %s from table '%s'.", item_id, table_name.value)
+        delete_stmt = sqla_table.delete().where(sqla_table.c.id == item_id).returning(*sqla_table.c)
 
-        if table_name == TableNameEnum.TRANSACTION_DETAILS:
-            item_to_delete_dict = self.get_item_by_id(repo_context, table_name, item_id)
-            if not item_to_delete_dict:
-                LOGGER.warning(f"Item with ID {item_id} not found in table '{TableNameEnum.TRANSACTION_DETAILS.value}' for pre-delete budget adjustment.")
+        SQL_LOGGER.debug("Executing SQL (delete_item): %s", LazySQL(delete_stmt))
+        deleted_row = repo_context.session.execute(delete_stmt).fetchone()
+        self.data_version.mark_changed(repo_context.session)
+        LOGGER.info("Delete operation for item ID %s in table '%s' completed. Rows affected: %s", item_id, table_name.value, 1 if deleted_row else 0)
 
-        LOGGER.debug(f"Executing SQL (delete_item): {delete_stmt.compile(compile_kwargs={'literal_binds': True})}")
-        result = repo_context.session.execute(delete_stmt)
-        repo_context.session.commit()
-        LOGGER.info(f"Delete operation for item ID {item_id} in table '{table_name.value}' completed. Rows affected: {result.rowcount}")
+        if table_name == TableNameEnum.CATEGORY_BUDGET_OVERVIEW and deleted_row:
+            self.category_budget_cache.mark_changed(repo_context.session)
 
-        if table_name == TableNameEnum.TRANSACTION_DETAILS and item_to_delete_dict and result.rowcount > 0:
+        if table_name == TableNameEnum.TRANSACTION_DETAILS and deleted_row:
+            item_to_delete_dict = dict(deleted_row._mapping)
             if item_to_delete_dict.get('type','').lower() == 'expense':
                 self._update_category_budget(repo_context, item_to_delete_dict['category'], -item_to_delete_dict['amount_inr'])
 
-        return result.rowcount > 0
+            summary_changes: SummaryChanges = {}
+            self._add_summary_change(summary_changes, item_to_delete_dict, -1)
+            self._update_monthly_summary(repo_context, summary_changes)
+
+        return deleted_row is not None
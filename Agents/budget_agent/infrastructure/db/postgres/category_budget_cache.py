@@ -0,0 +1,180 @@
+"""
+In-process read-through cache for the category_budget_overview table.
+
+BudgetRepo serves category budget reads from here and invalidates the cache
+from its own write paths. Invalidation is also applied again after the unit
+of work commits, and optionally broadcast to other worker processes with
+Postgres LISTEN/NOTIFY. The same listener bumps the budget data version on
+the writes of other workers, so their cached agent responses are dropped too.
+"""
+
+import select
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session
+
+from core.logger import LOGGER
+from core.settings import SETTINGS
+from agents.budget_agent.infrastructure.db.postgres.data_version import BUDGET_DATA_NOTIFY_CHANNEL, BUDGET_DATA_VERSION
+from agents.budget_agent.infrastructure.db.postgres.engine_registry import ENGINE_REGISTRY
+
+CATEGORY_BUDGET_NOTIFY_CHANNEL = "category_budget_changed"
+# session.info key marking a unit of work that wrote category budgets
+CATEGORY_BUDGET_DIRTY_FLAG = "category_budget_dirty"
+# Seconds the listener waits on the socket before re-checking for shutdown
+LISTENER_POLL_INTERVAL_S = 5.0
+
+
+class CategoryBudgetCache:
+    """
+    TTL + LRU cache of category budget rows (already-read dicts, keyed by query).
+
+    A generation counter guards against a reader that started before an
+    invalidation storing what it read afterwards.
+    """
+
+    def __init__(self, ttl_s: float, max_entries: int):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._listener_thread: Optional[threading.Thread] = None
+        self._listener_stop = threading.Event()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for `key`, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        """Stores `value` unless the cache was invalidated since `generation` was read."""
+        if self.ttl_s <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._counters["invalidations"] += 1
+
+    def mark_changed(self, session: Session) -> None:
+        """
+        Called by BudgetRepo whenever a unit of work writes category budgets.
+        Reads in that session bypass the cache until it commits, when the cache
+        is invalidated again (and, if enabled, other workers are notified).
+        """
+        self.invalidate()
+        session.info[CATEGORY_BUDGET_DIRTY_FLAG] = True
+        if SETTINGS.category_budget_cache_notify:
+            # NOTIFY is transactional: listeners only hear about it once we commit
+            session.execute(sql_select(func.pg_notify(CATEGORY_BUDGET_NOTIFY_CHANNEL, "")))
+
+    @staticmethod
+    def is_dirty(repo_context: Any) -> bool:
+        # A unit of work that has not connected yet cannot have written anything
+        return repo_context.is_connected and repo_context.session.info.get(CATEGORY_BUDGET_DIRTY_FLAG, False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_ratio": self._counters["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "listening": self._listener_thread is not None and self._listener_thread.is_alive(),
+            }
+
+    # --- Cross-process invalidation ---
+
+    def start_listener(self, url: Any) -> None:
+        """Starts a daemon thread that applies the NOTIFYs of other workers (cache invalidation, data version)."""
+        if self._listener_thread is not None and self._listener_thread.is_alive():
+            return
+        self._listener_stop.clear()
+        self._listener_thread = threading.Thread(
+            target=self._listen, args=(url,), name="category-budget-cache-listener", daemon=True
+        )
+        self._listener_thread.start()
+
+    def stop_listener(self) -> None:
+        self._listener_stop.set()
+        if self._listener_thread is not None:
+            self._listener_thread.join(timeout=LISTENER_POLL_INTERVAL_S + 1)
+            self._listener_thread = None
+
+    def _listen(self, url: Any) -> None:
+        while not self._listener_stop.is_set():
+            connection = None
+            try:
+                # A dedicated connection, detached so it never holds a pool slot
+                connection = ENGINE_REGISTRY.get_engine(url).raw_connection()
+                dbapi_connection = connection.driver_connection
+                connection.detach()
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CATEGORY_BUDGET_NOTIFY_CHANNEL}")
+                    cursor.execute(f"LISTEN {BUDGET_DATA_NOTIFY_CHANNEL}")
+                # Anything may have changed while we were not listening
+                self.invalidate()
+                BUDGET_DATA_VERSION.bump()
+                LOGGER.info("Listening for budget changes on '%s' and '%s'", CATEGORY_BUDGET_NOTIFY_CHANNEL, BUDGET_DATA_NOTIFY_CHANNEL)
+
+                while not self._listener_stop.is_set():
+                    readable, _, _ = select.select([dbapi_connection], [], [], LISTENER_POLL_INTERVAL_S)
+                    if not readable:
+                        continue
+                    dbapi_connection.poll()
+                    channels = {notify.channel for notify in dbapi_connection.notifies}
+                    dbapi_connection.notifies.clear()
+                    if CATEGORY_BUDGET_NOTIFY_CHANNEL in channels:
+                        self.invalidate()
+                    if BUDGET_DATA_NOTIFY_CHANNEL in channels:
+                        BUDGET_DATA_VERSION.bump()
+            except Exception as e:
+                LOGGER.error("Category budget cache listener failed, retrying: %s", e, exc_info=True)
+                self._listener_stop.wait(LISTENER_POLL_INTERVAL_S)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+CATEGORY_BUDGET_CACHE = CategoryBudgetCache(
+    ttl_s=SETTINGS.category_budget_cache_ttl_s,
+    max_entries=SETTINGS.category_budget_cache_max_entries,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    # Readers in other sessions may have re-cached pre-commit rows in the meantime
+    if session.info.pop(CATEGORY_BUDGET_DIRTY_FLAG, False):
+        CATEGORY_BUDGET_CACHE.invalidate()
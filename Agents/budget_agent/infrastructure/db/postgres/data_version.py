@@ -0,0 +1,55 @@
+"""
+Process-wide version counter of the budget data.
+
+BudgetRepo bumps it from every write path, and again once the unit of work
+commits; caches of derived results (e.g. agent responses) include it in
+their keys, so a write makes every older entry unreachable. With
+CATEGORY_BUDGET_CACHE_NOTIFY, writes are also broadcast with Postgres NOTIFY
+and the other workers bump their own counter (see the listener of
+category_budget_cache).
+"""
+
+import threading
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from core.settings import SETTINGS
+
+BUDGET_DATA_NOTIFY_CHANNEL = "budget_data_changed"
+
+# session.info key marking a unit of work that wrote budget data
+BUDGET_DATA_DIRTY_FLAG = "budget_data_dirty"
+
+
+class BudgetDataVersion:
+
+    def __init__(self):
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> int:
+        return self._version
+
+    def bump(self) -> None:
+        with self._lock:
+            self._version += 1
+
+    def mark_changed(self, session: Session) -> None:
+        """Called by BudgetRepo for every write; bumped now and again when `session` commits."""
+        self.bump()
+        session.info[BUDGET_DATA_DIRTY_FLAG] = True
+        if SETTINGS.category_budget_cache_notify:
+            # Sent on commit only; Postgres folds the repeats of one transaction into one notification
+            session.execute(select(func.pg_notify(BUDGET_DATA_NOTIFY_CHANNEL, "")))
+
+
+BUDGET_DATA_VERSION = BudgetDataVersion()
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session: Session) -> None:
+    # A response computed while the write was in flight saw the old data
+    if session.info.pop(BUDGET_DATA_DIRTY_FLAG, False):
+        BUDGET_DATA_VERSION.bump()
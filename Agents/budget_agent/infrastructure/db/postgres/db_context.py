@@ -2,14 +2,14 @@
 Module to connect to database for interactign with it
 """
 
-from sqlalchemy import create_engine
+import time
+
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.session import Session
 
-from sqlalchemy.pool import QueuePool
-
 from core.logger import LOGGER
 from core.settings import SETTINGS
+from agents.budget_agent.infrastructure.db.postgres.engine_registry import ENGINE_REGISTRY
 
 class SQLAlchemyConnection:
     """
@@ -17,44 +17,61 @@ class SQLAlchemyConnection:
     for interacting with database
     """
 
-    session: Session
-
     def __init__(self):
         """Initialize the session as None."""
         self.connection = None
-        self.session = None
+        self._session = None
 
     def __enter__(self):
-        """Initialize the session when called using with statement."""
-        if self.session is None:
+        """
+        Enter the unit of work. The pooled connection is checked out lazily, on the
+        first access to `session`, so a unit of work served from cache never takes one.
+        """
+        return self
+
+    @property
+    def session(self) -> Session:
+        """Return the session, checking a connection out of the pool on first use."""
+        if self._session is None:
             try:
                 session_maker = sessionmaker()
                 engine = self.fetch_tenant_engine()
+                checkout_started = time.perf_counter()
                 self.connection = engine.connect()
-                self.session = session_maker(bind=self.connection)
+                ENGINE_REGISTRY.record_checkout_wait(engine.url, time.perf_counter() - checkout_started)
+                self._session = session_maker(bind=self.connection)
             except Exception as why:
                 LOGGER.error(
                     "Error while establishing a connection with database: %s", why
                 )
+                raise
+        return self._session
 
-        return self
+    @property
+    def is_connected(self) -> bool:
+        """Whether this unit of work has touched the database yet."""
+        return self._session is not None
 
-    def __exit__(self, *args):
-        """Close the session on exit."""
+    def __exit__(self, exc_type, *args):
+        """Roll back anything left uncommitted and close the session on exit."""
         if self.connection is not None:
-            self.session.close()
+            if exc_type is not None:
+                self.session.rollback()
+            self._session.close()
             self.connection.close()
+            self._session = None
+            self.connection = None
+
+    def commit(self):
+        """Commit the unit of work. Called once by the use case at the end of an operation."""
+        if self._session is not None:
+            self._session.commit()
+
+    def rollback(self):
+        """Discard every change made in the unit of work."""
+        if self._session is not None:
+            self._session.rollback()
 
     def fetch_tenant_engine(self):
-        """create the engine connection"""
-        engine = None
-        try:
-            engine = create_engine(
-                SETTINGS.postgres_connection_string,
-                poolclass=QueuePool,
-                pool_size=SETTINGS.new_db_pool,
-            )
-        except AssertionError as e:
-            print(e)
-
-        return engine
+        """return the shared, pooled engine for the tenant database"""
+        return ENGINE_REGISTRY.get_engine(SETTINGS.postgres_connection_string)
@@ -0,0 +1,94 @@
+"""
+Process-wide registry of SQLAlchemy engines, keyed by connection URL
+"""
+
+import threading
+from typing import Any, Dict
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from core.logger import LOGGER
+from core.settings import SETTINGS
+
+
+class EngineRegistry:
+    """
+    Holds one engine (and therefore one connection pool) per connection URL,
+    so every repository context reuses pooled connections instead of paying
+    a new TCP + auth handshake.
+    """
+
+    def __init__(self):
+        self._engines: Dict[str, Engine] = {}
+        self._wait_stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_engine(self, url: Any) -> Engine:
+        """Returns the shared engine for `url`, creating it on first use."""
+        key = self._key(url)
+        engine = self._engines.get(key)
+        if engine is not None:
+            return engine
+
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = create_engine(
+                    url,
+                    poolclass=QueuePool,
+                    pool_size=SETTINGS.new_db_pool,
+                    max_overflow=SETTINGS.new_db_max_overflow,
+                    pool_timeout=SETTINGS.new_db_pool_timeout,
+                    pool_recycle=SETTINGS.new_db_pool_recycle,
+                    pool_pre_ping=SETTINGS.new_db_pool_pre_ping,
+                )
+                self._engines[key] = engine
+                self._wait_stats[key] = {"checkouts": 0, "total_wait_s": 0.0, "max_wait_s": 0.0}
+                LOGGER.info("Created database engine with pool size %s", SETTINGS.new_db_pool)
+        return engine
+
+    def record_checkout_wait(self, url: Any, wait_s: float) -> None:
+        """Records how long a caller waited to check a connection out of the pool."""
+        stats = self._wait_stats.get(self._key(url))
+        if stats is None:
+            return
+        with self._lock:
+            stats["checkouts"] += 1
+            stats["total_wait_s"] += wait_s
+            stats["max_wait_s"] = max(stats["max_wait_s"], wait_s)
+
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns live statistics for every pool, keyed by the (password-masked) URL."""
+        stats = {}
+        for key, engine in list(self._engines.items()):
+            pool = engine.pool
+            wait_stats = self._wait_stats.get(key, {})
+            checkouts = wait_stats.get("checkouts", 0)
+            stats[engine.url.render_as_string(hide_password=True)] = {
+                "pool_size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "checkouts": checkouts,
+                "avg_wait_ms": (wait_stats.get("total_wait_s", 0.0) / checkouts * 1000) if checkouts else 0.0,
+                "max_wait_ms": wait_stats.get("max_wait_s", 0.0) * 1000,
+            }
+        return stats
+
+    def dispose_all(self) -> None:
+        """Closes every pooled connection; called on application shutdown."""
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+            self._wait_stats.clear()
+        LOGGER.info("Disposed all database engines")
+
+    @staticmethod
+    def _key(url: Any) -> str:
+        return url.render_as_string(hide_password=False) if hasattr(url, "render_as_string") else str(url)
+
+
+ENGINE_REGISTRY = EngineRegistry()
@@ -0,0 +1,37 @@
+"""
+Maintenance of the monthly_category_summary table.
+
+Rebuild it from transaction_details with:
+    python -m agents.budget_agent.infrastructure.db.postgres.monthly_summary
+"""
+
+from core.logger import LOGGER
+from core.settings import SETTINGS
+from agents.budget_agent.domain.budget_entity import monthly_category_summary_table
+from agents.budget_agent.infrastructure.db.postgres.engine_registry import ENGINE_REGISTRY
+from agents.budget_agent.infrastructure.webhooks import BUDGET_USECASE
+
+
+def ensure_monthly_summary_table() -> None:
+    """Creates monthly_category_summary if it does not exist yet and fills it from transaction_details."""
+    engine = ENGINE_REGISTRY.get_engine(SETTINGS.postgres_connection_string)
+    with engine.connect() as connection:
+        exists = engine.dialect.has_table(connection, monthly_category_summary_table.name)
+
+    if not exists:
+        monthly_category_summary_table.create(engine, checkfirst=True)
+        LOGGER.info("Created monthly_category_summary table")
+        BUDGET_USECASE.handle_rebuild_monthly_summary()
+
+
+def rebuild_monthly_summary() -> int:
+    """Recomputes every row of monthly_category_summary from transaction_details."""
+    engine = ENGINE_REGISTRY.get_engine(SETTINGS.postgres_connection_string)
+    monthly_category_summary_table.create(engine, checkfirst=True)
+    return BUDGET_USECASE.handle_rebuild_monthly_summary()
+
+
+if __name__ == "__main__":
+    row_count = rebuild_monthly_summary()
+    LOGGER.info("Monthly summary rebuilt: %s rows", row_count)
+    ENGINE_REGISTRY.dispose_all()
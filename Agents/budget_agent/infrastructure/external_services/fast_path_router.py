@@ -0,0 +1,373 @@
+"""
+Deterministic fast path in front of the budget agent.
+
+Trivially structured commands ("list all transactions", "delete transaction 42",
+"add 300 expense shopping hyd yesterday") are parsed locally and executed
+directly against the budget agent tools, without an LLM call. Anything the
+parser does not recognize completely falls through to the agent.
+"""
+
+import calendar
+import datetime
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pydantic_core import to_jsonable_python
+
+from core.logger import LOGGER
+from agents.budget_agent.domain.schemas import (BudgetAgentResponse,
+                                                TransactionDetailCreate,
+                                                TransactionQueryFilter)
+from agents.budget_agent.infrastructure.tools import budget_agent_tools
+
+DateRange = Tuple[datetime.date, datetime.date]
+
+MONTH_NAMES = {name.lower() for name in calendar.month_name[1:]} | {name.lower() for name in calendar.month_abbr[1:]}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+NUMBER_WORDS = {"a": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "ten": 10, "thirty": 30}
+TYPE_WORDS = {"expense": "expense", "expenses": "expense", "debit": "expense", "income": "income", "credit": "income"}
+LIST_VERBS = {"list", "show", "get", "view", "display", "fetch"}
+FILLER_WORDS = {"me", "all", "my", "of", "the", "please"}
+DATE_PREPOSITIONS = {"on", "from", "in", "during", "for", "dated", "since"}
+CURRENCY_WORDS = {"rs", "inr", "rupees", "rupee"}
+# A date phrase is at most this many tokens long ("day before yesterday", "last 30 days")
+MAX_DATE_PHRASE_TOKENS = 3
+
+AMOUNT_PATTERN = re.compile(r"^(?:rs|inr)?(\d+(?:\.\d+)?)(?:rs|inr|/-)?$")
+ID_PATTERN = re.compile(r"^(?:id|no|number)?#?(\d+)$")
+DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d")
+
+
+def _normalize(query: str) -> List[str]:
+    """Lower-cases and tokenizes; keeps the characters that matter for amounts, ids and dates."""
+    text = re.sub(r"[^\w\s.\-/#]", " ", query.casefold())
+    return [token.rstrip(".") for token in text.split() if token.rstrip(".")]
+
+
+def _month_range(year: int, month: int) -> DateRange:
+    return datetime.date(year, month, 1), datetime.date(year, month, calendar.monthrange(year, month)[1])
+
+
+def parse_relative_date(tokens: Sequence[str], today: datetime.date) -> Optional[DateRange]:
+    """
+    Parses a date phrase ("yesterday", "last week", "3 days ago", "2 weeks ago", "last friday",
+    "2024-07-01", ...) into an inclusive date range. Returns None if the whole
+    phrase is not understood.
+    """
+
+    phrase = " ".join(tokens)
+    if phrase == "today":
+        return today, today
+    if phrase == "yesterday":
+        day = today - datetime.timedelta(days=1)
+        return day, day
+    if phrase == "day before yesterday":
+        day = today - datetime.timedelta(days=2)
+        return day, day
+
+    if phrase in ("this week", "last week"):
+        week_start = today - datetime.timedelta(days=today.weekday())
+        if phrase == "this week":
+            return week_start, today
+        return week_start - datetime.timedelta(days=7), week_start - datetime.timedelta(days=1)
+    if phrase == "this month":
+        return today.replace(day=1), today
+    if phrase == "last month":
+        last_month_end = today.replace(day=1) - datetime.timedelta(days=1)
+        return _month_range(last_month_end.year, last_month_end.month)
+    if phrase == "this year":
+        return today.replace(month=1, day=1), today
+    if phrase == "last year":
+        return datetime.date(today.year - 1, 1, 1), datetime.date(today.year - 1, 12, 31)
+
+    match = re.fullmatch(r"(?:last|past) (\w+) days", phrase)
+    if match and (match.group(1).isdigit() or match.group(1) in NUMBER_WORDS):
+        days = int(match.group(1)) if match.group(1).isdigit() else NUMBER_WORDS[match.group(1)]
+        return today - datetime.timedelta(days=days - 1), today
+
+    match = re.fullmatch(r"(\w+) (day|days|week|weeks) ago", phrase)
+    if match and (match.group(1).isdigit() or match.group(1) in NUMBER_WORDS):
+        count = int(match.group(1)) if match.group(1).isdigit() else NUMBER_WORDS[match.group(1)]
+        if match.group(2).startswith("week"):
+            # The Monday-Sunday week, like "last week" (= "1 week ago")
+            week_start = today - datetime.timedelta(days=today.weekday() + 7 * count)
+            return week_start, week_start + datetime.timedelta(days=6)
+        day = today - datetime.timedelta(days=count)
+        return day, day
+
+    match = re.fullmatch(r"(?:last )?(" + "|".join(WEEKDAYS) + ")", phrase)
+    if match:
+        # The most recent past occurrence of that weekday
+        days_back = (today.weekday() - WEEKDAYS.index(match.group(1))) % 7 or 7
+        day = today - datetime.timedelta(days=days_back)
+        return day, day
+
+    for date_format in DATE_FORMATS:
+        try:
+            day = datetime.datetime.strptime(phrase, date_format).date()
+            return day, day
+        except ValueError:
+            continue
+    return None
+
+
+def _split_date_suffix(tokens: List[str], today: datetime.date) -> Tuple[List[str], Optional[DateRange], bool]:
+    """
+    Looks for a date phrase at the end of `tokens`.
+    Returns (remaining tokens, date range or None, whether the phrase started with "since").
+    """
+
+    for length in range(min(MAX_DATE_PHRASE_TOKENS, len(tokens)), 0, -1):
+        date_range = parse_relative_date(tokens[-length:], today)
+        if date_range is None:
+            continue
+        remaining = tokens[:-length]
+        since = False
+        if remaining and remaining[-1] in DATE_PREPOSITIONS:
+            since = remaining[-1] == "since"
+            remaining = remaining[:-1]
+        return remaining, date_range, since
+    return tokens, None, False
+
+
+@dataclass
+class FastPathStats:
+    attempts: int = 0
+    hits: int = 0
+    fall_throughs: int = 0
+    errors: int = 0
+    fast_path_total_s: float = 0.0
+    llm_runs: int = 0
+    llm_total_s: float = 0.0
+    hits_by_intent: Dict[str, int] = field(default_factory=dict)
+
+
+class FastPathRouter:
+    """
+    Local intent parser for the budget agent. `route` returns the response for a
+    recognized command, or None to let the LLM agent handle the query.
+    """
+
+    def __init__(self, today: Callable[[], datetime.date] = datetime.date.today):
+        self._today = today
+        self._stats = FastPathStats()
+        self._lock = threading.Lock()
+        self._intents: List[Callable[[List[str], str], Optional[Tuple[str, Callable[[], Any]]]]] = [
+            self._parse_list_categories,
+            self._parse_list_transactions,
+            self._parse_get_transaction,
+            self._parse_delete,
+            self._parse_add_transaction,
+        ]
+
+    def route(self, query: str) -> Optional[BudgetAgentResponse]:
+        started = time.perf_counter()
+        tokens = _normalize(query)
+        intent_name, result = None, None
+        try:
+            for parse in self._intents:
+                parsed = parse(tokens, query)
+                if parsed is not None:
+                    intent_name, run_tool = parsed
+                    result = run_tool()
+                    break
+        except Exception as e:
+            # Let the agent deal with it (and explain the error); the unit of work was rolled back
+            LOGGER.warning("Fast path '%s' failed, falling through to the agent: %s", intent_name, e)
+            self._record(None, started, error=True)
+            return None
+
+        if intent_name is None:
+            self._record(None, started)
+            return None
+        self._record(intent_name, started)
+        LOGGER.info("Fast path '%s' handled query without the LLM", intent_name)
+        return BudgetAgentResponse(response=to_jsonable_python(result))
+
+    def record_llm_latency(self, elapsed_s: float) -> None:
+        """Called by the agent after every LLM run, to estimate what a fast-path hit saves."""
+        with self._lock:
+            self._stats.llm_runs += 1
+            self._stats.llm_total_s += elapsed_s
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = self._stats
+            avg_llm_s = stats.llm_total_s / stats.llm_runs if stats.llm_runs else 0.0
+            avg_fast_path_s = stats.fast_path_total_s / stats.hits if stats.hits else 0.0
+            return {
+                "attempts": stats.attempts,
+                "hits": stats.hits,
+                "fall_throughs": stats.fall_throughs,
+                "errors": stats.errors,
+                "hit_rate": stats.hits / stats.attempts if stats.attempts else 0.0,
+                "hits_by_intent": dict(stats.hits_by_intent),
+                "avg_fast_path_ms": avg_fast_path_s * 1000,
+                "avg_llm_ms": avg_llm_s * 1000,
+                "estimated_latency_saved_s": max(stats.hits * (avg_llm_s - avg_fast_path_s), 0.0) if stats.llm_runs else None,
+            }
+
+    def _record(self, intent_name: Optional[str], started: float, error: bool = False) -> None:
+        with self._lock:
+            self._stats.attempts += 1
+            if intent_name is None:
+                self._stats.fall_throughs += 1
+                self._stats.errors += int(error)
+                return
+            self._stats.hits += 1
+            self._stats.fast_path_total_s += time.perf_counter() - started
+            self._stats.hits_by_intent[intent_name] = self._stats.hits_by_intent.get(intent_name, 0) + 1
+
+    # --- Intents ---
+
+    @staticmethod
+    def _strip_list_prefix(tokens: List[str]) -> Optional[List[str]]:
+        if not tokens or tokens[0] not in LIST_VERBS:
+            return None
+        remaining = tokens[1:]
+        while remaining and remaining[0] in FILLER_WORDS:
+            remaining = remaining[1:]
+        return remaining
+
+    def _parse_list_categories(self, tokens: List[str], query: str):
+        remaining = self._strip_list_prefix(tokens)
+        if remaining in (["categories"], ["budgets"], ["category", "budgets"], ["categories", "budgets"]):
+            return "list_categories", budget_agent_tools.get_all_category_budgets
+        return None
+
+    def _parse_list_transactions(self, tokens: List[str], query: str):
+        remaining = self._strip_list_prefix(tokens)
+        if not remaining:
+            return None
+        remaining, date_range, since = self._split_date_suffix(remaining)
+
+        if remaining and remaining[-1] == "history":
+            remaining = remaining[:-1]
+        if not remaining or remaining[-1] not in ("transactions", "transaction", "txns"):
+            return None
+        filter_tokens = remaining[:-1]
+
+        transaction_type = None
+        if filter_tokens and filter_tokens[-1] in TYPE_WORDS:
+            transaction_type = TYPE_WORDS[filter_tokens[-1]]
+            filter_tokens = filter_tokens[:-1]
+        category = None
+        if filter_tokens:
+            category, location_tokens = self._match_category(filter_tokens)
+            if category is None or location_tokens:
+                return None
+
+        if date_range is None and transaction_type is None and category is None:
+            return "list_transactions", budget_agent_tools.get_all_transactions
+
+        filters = TransactionQueryFilter(
+            start_date=date_range[0] if date_range else None,
+            end_date=(self._today() if since else date_range[1]) if date_range else None,
+            category=category,
+            type=transaction_type,
+        )
+        return "query_transactions", lambda: budget_agent_tools.query_transactions(filters)
+
+    def _parse_get_transaction(self, tokens: List[str], query: str):
+        if len(tokens) < 3 or tokens[0] not in LIST_VERBS or tokens[1] not in ("transaction", "txn"):
+            return None
+        item_id = self._parse_id(tokens[2:])
+        if item_id is None:
+            return None
+        return "get_transaction", lambda: budget_agent_tools.get_transaction_by_id(item_id)
+
+    def _parse_delete(self, tokens: List[str], query: str):
+        if len(tokens) < 3 or tokens[0] not in ("delete", "remove"):
+            return None
+        remaining = tokens[2:] if tokens[1] == "the" else tokens[1:]
+        if remaining[:1] in (["transaction"], ["txn"]):
+            item_id = self._parse_id(remaining[1:])
+            if item_id is not None:
+                return "delete_transaction", lambda: budget_agent_tools.delete_transaction(item_id)
+        elif remaining[:2] == ["category", "budget"] or remaining[:1] == ["budget"]:
+            item_id = self._parse_id(remaining[2:] if remaining[0] == "category" else remaining[1:])
+            if item_id is not None:
+                return "delete_category_budget", lambda: budget_agent_tools.delete_category_budget(item_id)
+        return None
+
+    def _parse_add_transaction(self, tokens: List[str], query: str):
+        """add <amount> <expense|income> <category> [at|in <location>] [<date phrase>]"""
+        if len(tokens) < 4 or tokens[0] != "add":
+            return None
+        remaining = tokens[1:]
+        if remaining[0] in CURRENCY_WORDS:
+            remaining = remaining[1:]
+        amount_match = AMOUNT_PATTERN.fullmatch(remaining[0]) if remaining else None
+        if amount_match is None:
+            return None
+        amount = float(amount_match.group(1))
+        remaining = remaining[1:]
+        if remaining and remaining[0] in CURRENCY_WORDS:
+            remaining = remaining[1:]
+
+        # The type is required: without it the command is not unambiguous enough
+        if not remaining or remaining[0] not in TYPE_WORDS:
+            return None
+        transaction_type = TYPE_WORDS[remaining[0]]
+        remaining, date_range, since = self._split_date_suffix(remaining[1:])
+        if since or (date_range is not None and date_range[0] != date_range[1]):
+            return None
+
+        category, location_tokens = self._match_category(remaining)
+        if category is None:
+            return None
+        if location_tokens and location_tokens[0] in ("at", "in"):
+            location_tokens = location_tokens[1:]
+        # "in march" is a date the parser does not handle, not a location
+        if any(token in MONTH_NAMES or token in DATE_PREPOSITIONS for token in location_tokens):
+            return None
+
+        payload = TransactionDetailCreate(
+            transaction_date=date_range[0] if date_range else self._today(),
+            category=category,
+            amount_inr=amount,
+            type=transaction_type,
+            location=self._original_text(query, location_tokens),
+        )
+        return "add_transaction", lambda: budget_agent_tools.add_transaction(payload)
+
+    # --- Helpers ---
+
+    def _split_date_suffix(self, tokens: List[str]) -> Tuple[List[str], Optional[DateRange], bool]:
+        return _split_date_suffix(tokens, self._today())
+
+    @staticmethod
+    def _original_text(query: str, tokens: List[str]) -> Optional[str]:
+        """Returns `tokens` as the user typed them (original casing), or None if there are none."""
+        if not tokens:
+            return None
+        pattern = r"\W+".join(re.escape(token) for token in tokens)
+        match = re.search(pattern, query, re.IGNORECASE)
+        return match.group(0) if match else " ".join(tokens)
+
+    @staticmethod
+    def _parse_id(tokens: List[str]) -> Optional[int]:
+        if len(tokens) == 2 and tokens[0] in ("id", "no", "number"):
+            tokens = tokens[1:]
+        if len(tokens) != 1:
+            return None
+        match = ID_PATTERN.fullmatch(tokens[0])
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def _match_category(tokens: List[str]) -> Tuple[Optional[str], List[str]]:
+        """Matches the longest known category at the start of `tokens`; returns it and the tokens left over."""
+        if not tokens:
+            return None, tokens
+        known_categories = {category["category"].lower() for category in budget_agent_tools.get_all_category_budgets()}
+        for length in range(len(tokens), 0, -1):
+            candidate = " ".join(tokens[:length])
+            if candidate in known_categories:
+                return candidate, tokens[length:]
+        return None, tokens
+
+
+FAST_PATH_ROUTER = FastPathRouter()
@@ -1,84 +1,271 @@
-import ast
-import json
-from typing import Union
+import asyncio
+import datetime
+import functools
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Hashable, Optional, Tuple
 from langgraph.prebuilt import create_react_agent
 from langchain.chat_models import init_chat_model
+from core.agent_registry import AGENT_REGISTRY
+from core.agent_streaming import sse_event, stream_agent_run
 from core.logger import LOGGER
+from core.output_parsing import to_response_model
+from core.prompt_registry import PROMPT_REGISTRY, Prompt
+from core.response_cache import ResponseCache, is_mutating_query, normalize_query
+from core.settings import SETTINGS
 from agents.budget_agent.domain.schemas import (BudgetAgentResponse, QueryRequest)
-from agents.budget_agent.infrastructure.tools.budget_agent_tools import (add_category_budget,  
-                                      add_transaction,
-                                      get_all_category_budgets,
-                                      get_all_transactions,
-                                      update_category_budget,
-                                      update_transaction,
-                                      delete_category_budget,
-                                      delete_transaction
-                                      )
-               
+from agents.budget_agent.infrastructure.conversations.conversation_threads import CONVERSATION_THREADS, trim_history
+from agents.budget_agent.infrastructure.db.postgres.data_version import BUDGET_DATA_VERSION
+from agents.budget_agent.infrastructure.external_services.fast_path_router import FAST_PATH_ROUTER
+from agents.budget_agent.infrastructure.tools.budget_agent_tools import BUDGET_AGENT_TOOLS, BUDGET_AGENT_WRITE_TOOL_NAMES
+from agents.budget_agent.infrastructure.tools.tool_result_encoding import expand_columnar_rows
+
 
 class LangGraphBudgetAgent:
 
-    def _deep_json_eval(self, data):
-        if isinstance(data, dict):
-            return {k: self._deep_json_eval(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._deep_json_eval(item) for item in data]
-        elif isinstance(data, str):
-            try:
-                parsed = json.loads(data)
-                return self._deep_json_eval(parsed)
-            except (json.JSONDecodeError, TypeError):
-                return data
-        else:
-            return data
+    model_name = "gemini-2.5-flash"
+    model_provider = "google_genai"
+    temperature = 0
+    prompt_namespace = "budget_agent"
+    prompt_name = "prompt_2" # default variant, overridden per request by QueryRequest.prompt_variant
+    prompts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts")
 
+    def __init__(self):
+        PROMPT_REGISTRY.register_directory(self.prompt_namespace, self.prompts_dir)
+        AGENT_REGISTRY.register("budget_agent", self._build_agent, self._fingerprint)
+        self.response_cache = ResponseCache(
+            ttl_s=SETTINGS.response_cache_ttl_s,
+            max_entries=SETTINGS.response_cache_max_entries,
+            similarity_threshold=SETTINGS.response_cache_similarity_threshold,
+        )
+        self.fast_path = FAST_PATH_ROUTER
 
-    def invoke_agent(self, request: QueryRequest) -> BudgetAgentResponse:
-        model = init_chat_model("gemini-2.5-flash", model_provider="google_genai", temperature=0)
-
-        file_path = 'agents/budget_agent/infrastructure/prompts/prompt_2.txt'
-
-        try:
-            with open(file_path, 'r') as file:
-                prompt_content = file.read()
-            LOGGER.info(f"Prompt imported successfully:\n{prompt_content}")
-        except FileNotFoundError:
-            LOGGER.error(f"Prompt file not found: {file_path}")
-            raise Exception(f"Prompt file not found: {file_path}")
-        except Exception as e:
-            LOGGER.error(f"Error reading prompt file: {e}")
-            raise Exception(f"Error reading prompt file: {e}")
-
-        budget_agent = create_react_agent(
+    def get_prompt(self, prompt_variant: Optional[str] = None) -> Prompt:
+        """Returns the loaded prompt; raises KeyError for an unknown variant."""
+        return PROMPT_REGISTRY.get(self.prompt_namespace, prompt_variant or self.prompt_name)
+
+    def _fingerprint(self, prompt_variant: Optional[str] = None):
+        return (self.model_name, self.model_provider, self.temperature, self.get_prompt(prompt_variant).version)
+
+    def _build_agent(self, prompt_variant: Optional[str] = None, threaded: bool = False):
+        """`threaded` agents keep their messages per thread_id in the conversation checkpointer."""
+        model = init_chat_model(self.model_name, model_provider=self.model_provider, temperature=self.temperature)
+
+        return create_react_agent(
             model=model,
-            tools=[
-                add_category_budget, add_transaction, get_all_category_budgets,
-                get_all_transactions, update_transaction, update_category_budget,
-                delete_transaction, delete_category_budget
-            ],
-            prompt=prompt_content,
+            tools=BUDGET_AGENT_TOOLS,
+            prompt=self.get_prompt(prompt_variant).content,
+            pre_model_hook=trim_history if threaded else None,
+            checkpointer=CONVERSATION_THREADS.checkpointer if threaded else None,
             name="budget_agent",
         )
 
-        response = budget_agent.invoke({
-            "messages": [{"role": "user", "content": request.query}]
-        })
+    def _get_agent(self, prompt_variant: Optional[str], threaded: bool = False) -> Tuple[Any, Prompt]:
+        """Compiled agent for the prompt variant (each variant is compiled once) and its prompt."""
+        prompt = self.get_prompt(prompt_variant)
+        if prompt.name == self.prompt_name and not threaded:
+            return AGENT_REGISTRY.get("budget_agent"), prompt
+        agent_name = "budget_agent" + ("" if prompt.name == self.prompt_name else f":{prompt.name}") + (":threads" if threaded else "")
+        AGENT_REGISTRY.register(
+            agent_name,
+            functools.partial(self._build_agent, prompt.name, threaded),
+            functools.partial(self._fingerprint, prompt.name),
+            replace=False,
+        )
+        return AGENT_REGISTRY.get(agent_name), prompt
+
+    def _run_config(self, prompt: Prompt, thread_id: Optional[str] = None) -> Dict[str, Any]:
+        config = {
+            # Bounds the tool calls of one step that the tool node runs in parallel
+            "max_concurrency": SETTINGS.tool_max_concurrency,
+            # Lets traces be grouped and compared per prompt version
+            "metadata": {"prompt_version": prompt.version},
+        }
+        if thread_id is not None:
+            config["configurable"] = {"thread_id": thread_id}
+            config["metadata"]["thread_id"] = thread_id
+        return config
+
+    def _thread_response(self, response: Dict[str, Any], thread_id: str) -> BudgetAgentResponse:
+        parsed_response = self._parse_response(response)
+        parsed_response.thread_id = thread_id
+        return parsed_response
+
+    def _parse_response(self, response) -> BudgetAgentResponse:
+        parsed_response = to_response_model(response['messages'][-1].content, BudgetAgentResponse)
+        # The compact tool result form is for the model only: clients get row objects, as from the fast path
+        parsed_response.response = expand_columnar_rows(parsed_response.response)
+        return parsed_response
+
+    def _cache_lookup(self, request: QueryRequest) -> Tuple[Optional[BudgetAgentResponse], str, Optional[Hashable]]:
+        """
+        Returns (cached response or None, normalized query, cache version).
+        The version is None when the answer must not be cached (cache off or a mutating query).
+        """
+        normalized_query = normalize_query(request.query)
+        if not SETTINGS.response_cache_enabled:
+            return None, normalized_query, None
+        if is_mutating_query(normalized_query):
+            self.response_cache.record_bypass()
+            return None, normalized_query, None
+
+        # Today's date is part of the key: relative dates ("this month") resolve differently tomorrow
+        version = (self._fingerprint(request.prompt_variant), BUDGET_DATA_VERSION.current, datetime.date.today())
+        cached_response = self.response_cache.get(normalized_query, version)
+        if cached_response is not None:
+            LOGGER.info("Serving budget agent response from cache for query: %s", normalized_query)
+            return cached_response.model_copy(deep=True), normalized_query, version
+        return None, normalized_query, version
+
+    def _cache_store(self, normalized_query: str, version: Optional[Hashable], response: Dict[str, Any], parsed_response: BudgetAgentResponse) -> None:
+        if version is None:
+            return
+        called_write_tool = any(
+            tool_call["name"] in BUDGET_AGENT_WRITE_TOOL_NAMES
+            for message in response['messages']
+            for tool_call in getattr(message, "tool_calls", None) or []
+        )
+        # The data changed while the agent was running (or the agent changed it itself)
+        if called_write_tool or BUDGET_DATA_VERSION.current != version[1]:
+            self.response_cache.record_bypass()
+            return
+        self.response_cache.put(normalized_query, version, parsed_response.model_copy(deep=True))
+
+    def invoke_agent(self, request: QueryRequest) -> BudgetAgentResponse:
+        if request.thread_id is not None:
+            return self._invoke_thread(request)
+
+        if SETTINGS.fast_path_enabled:
+            fast_response = self.fast_path.route(request.query)
+            if fast_response is not None:
+                return fast_response
+
+        cached_response, normalized_query, version = self._cache_lookup(request)
+        if cached_response is not None:
+            return cached_response
+
+        budget_agent, prompt = self._get_agent(request.prompt_variant)
+
+        started = time.perf_counter()
+        response = budget_agent.invoke(
+            {"messages": [{"role": "user", "content": request.query}]},
+            config=self._run_config(prompt),
+        )
+        self.fast_path.record_llm_latency(time.perf_counter() - started)
+
+        parsed_response = self._parse_response(response)
+        self._cache_store(normalized_query, version, response, parsed_response)
+        return parsed_response
+
+    async def ainvoke_agent(self, request: QueryRequest) -> BudgetAgentResponse:
+        if request.thread_id is not None:
+            return await self._ainvoke_thread(request)
+
+        if SETTINGS.fast_path_enabled:
+            # The tools hit the database synchronously, keep that off the event loop
+            fast_response = await asyncio.to_thread(self.fast_path.route, request.query)
+            if fast_response is not None:
+                return fast_response
+
+        cached_response, normalized_query, version = self._cache_lookup(request)
+        if cached_response is not None:
+            return cached_response
+
+        budget_agent, prompt = self._get_agent(request.prompt_variant)
+
+        started = time.perf_counter()
+        response = await budget_agent.ainvoke(
+            {"messages": [{"role": "user", "content": request.query}]},
+            config=self._run_config(prompt),
+        )
+        self.fast_path.record_llm_latency(time.perf_counter() - started)
+
+        parsed_response = self._parse_response(response)
+        self._cache_store(normalized_query, version, response, parsed_response)
+        return parsed_response
+
+    async def astream_agent(self, request: QueryRequest) -> AsyncIterator[str]:
+        """Same as ainvoke_agent, but yields the run as Server-Sent Events."""
+        if request.thread_id is not None:
+            async for frame in self._astream_thread(request):
+                yield frame
+            return
+
+        if SETTINGS.fast_path_enabled:
+            fast_response = await asyncio.to_thread(self.fast_path.route, request.query)
+            if fast_response is not None:
+                yield sse_event("start", {})
+                yield sse_event("final", fast_response)
+                return
+
+        cached_response, normalized_query, version = self._cache_lookup(request)
+        if cached_response is not None:
+            yield sse_event("start", {})
+            yield sse_event("final", cached_response)
+            return
 
-        raw_response = response['messages'][-1].content
+        budget_agent, prompt = self._get_agent(request.prompt_variant)
+        started = time.perf_counter()
 
-        # Clean up formatting artifacts
-        cleaned_response = raw_response.replace("json", "").replace("\n", "").replace("```", "").strip()
+        def on_final(final_state: Dict[str, Any], parsed_response: BudgetAgentResponse) -> None:
+            self.fast_path.record_llm_latency(time.perf_counter() - started)
+            self._cache_store(normalized_query, version, final_state, parsed_response)
 
-        # Try to parse as JSON or Python literal
-        parsed_response: Union[str, dict]
-        try:
-            # evaluated_response = ast.literal_eval(cleaned_response)
-            # parsed_response = self._deep_json_eval(evaluated_response)
-            parsed_response = self._deep_json_eval(cleaned_response)
-        except (ValueError, SyntaxError):
-            parsed_response = cleaned_response  # Return as plain string
+        async for frame in stream_agent_run(
+            budget_agent,
+            {"messages": [{"role": "user", "content": request.query}]},
+            parse_final=self._parse_response,
+            config=self._run_config(prompt),
+            on_final=on_final,
+        ):
+            yield frame
 
-        return BudgetAgentResponse(response=parsed_response)
+    # A thread turn always runs the agent: the fast path and the response cache
+    # answer from the query alone, without the previous turns of the thread.
+
+    def _invoke_thread(self, request: QueryRequest) -> BudgetAgentResponse:
+        CONVERSATION_THREADS.touch(request.thread_id)
+        budget_agent, prompt = self._get_agent(request.prompt_variant, threaded=True)
+
+        started = time.perf_counter()
+        # Only the new message: the checkpointer restores the previous ones
+        response = budget_agent.invoke(
+            {"messages": [{"role": "user", "content": request.query}]},
+            config=self._run_config(prompt, request.thread_id),
+        )
+        self.fast_path.record_llm_latency(time.perf_counter() - started)
+        return self._thread_response(response, request.thread_id)
+
+    async def _ainvoke_thread(self, request: QueryRequest) -> BudgetAgentResponse:
+        await asyncio.to_thread(CONVERSATION_THREADS.touch, request.thread_id)
+        # The first threaded request opens the checkpointer, keep that off the event loop too
+        budget_agent, prompt = await asyncio.to_thread(self._get_agent, request.prompt_variant, True)
+
+        started = time.perf_counter()
+        response = await budget_agent.ainvoke(
+            {"messages": [{"role": "user", "content": request.query}]},
+            config=self._run_config(prompt, request.thread_id),
+        )
+        self.fast_path.record_llm_latency(time.perf_counter() - started)
+        return self._thread_response(response, request.thread_id)
+
+    async def _astream_thread(self, request: QueryRequest) -> AsyncIterator[str]:
+        await asyncio.to_thread(CONVERSATION_THREADS.touch, request.thread_id)
+        budget_agent, prompt = await asyncio.to_thread(self._get_agent, request.prompt_variant, True)
+        started = time.perf_counter()
+
+        def on_final(final_state: Dict[str, Any], parsed_response: BudgetAgentResponse) -> None:
+            self.fast_path.record_llm_latency(time.perf_counter() - started)
+
+        async for frame in stream_agent_run(
+            budget_agent,
+            {"messages": [{"role": "user", "content": request.query}]},
+            parse_final=functools.partial(self._thread_response, thread_id=request.thread_id),
+            config=self._run_config(prompt, request.thread_id),
+            on_final=on_final,
+        ):
+            yield frame
 
     
 LANGGRAPH_BUDGET_AGENT = LangGraphBudgetAgent()
+
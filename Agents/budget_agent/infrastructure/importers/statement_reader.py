@@ -0,0 +1,168 @@
+"""
+Streaming reader for Excel/CSV transaction statements.
+
+Files are read chunk by chunk (openpyxl read-only mode for .xlsx, chunked
+pandas reader for .csv), so memory stays bounded whatever the file size.
+Each chunk is validated with vectorized pandas operations that apply the
+same rules as TransactionDetailCreate.
+"""
+
+import datetime
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, Iterator, List, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from core.logger import LOGGER
+
+# Columns of the downloadable statement template
+STATEMENT_TEMPLATE_COLUMNS = [
+    "date",
+    "category",
+    "description",
+    "amount",
+    "type(credit/debit)",
+    "location",
+]
+
+# Template column -> transaction_details column
+STATEMENT_COLUMN_MAP = {
+    "date": "transaction_date",
+    "category": "category",
+    "description": "description",
+    "amount": "amount_inr",
+    "type(credit/debit)": "type",
+    "location": "location",
+}
+
+# Statement wording -> transaction type stored in transaction_details
+STATEMENT_TYPE_MAP = {
+    "debit": "expense",
+    "credit": "income",
+    "expense": "expense",
+    "income": "income",
+}
+
+# Column order of the rows handed to BudgetRepo.copy_transactions
+TRANSACTION_COPY_COLUMNS = ["transaction_date", "category", "description", "amount_inr", "type", "location"]
+
+SUPPORTED_STATEMENT_EXTENSIONS = (".xlsx", ".csv")
+
+# Maximum number of row errors kept per chunk for the import report
+MAX_ERRORS_PER_CHUNK = 20
+
+
+@dataclass
+class StatementChunk:
+    rows_read: int
+    rows: List[Tuple[Any, ...]]
+    amount_changes: Dict[str, float]
+    rejected_count: int
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _iter_xlsx_frames(file_obj: IO[bytes], chunk_size: int) -> Iterator[pd.DataFrame]:
+    workbook = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name).strip() if name is not None else "" for name in header]
+
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _iter_csv_frames(file_obj: IO[bytes], chunk_size: int) -> Iterator[pd.DataFrame]:
+    for frame in pd.read_csv(file_obj, chunksize=chunk_size):
+        frame.columns = [str(name).strip() for name in frame.columns]
+        yield frame
+
+
+def _normalize_chunk(frame: pd.DataFrame, first_row_number: int) -> StatementChunk:
+    frame = frame.rename(columns=STATEMENT_COLUMN_MAP)
+    row_numbers = pd.RangeIndex(first_row_number, first_row_number + len(frame))
+    frame.index = row_numbers
+
+    dates = pd.to_datetime(frame["transaction_date"], errors="coerce", format="mixed")
+    amounts = pd.to_numeric(frame["amount_inr"], errors="coerce")
+    categories = frame["category"].astype("string").str.strip().str.lower()
+    types = frame["type"].astype("string").str.strip().str.lower().map(STATEMENT_TYPE_MAP)
+
+    invalid_reasons = pd.Series("", index=row_numbers)
+    invalid_reasons[frame["transaction_date"].notna() & dates.isna()] += "invalid date; "
+    invalid_reasons[amounts.isna()] += "invalid amount; "
+    invalid_reasons[categories.isna() | (categories == "")] += "missing category; "
+    invalid_reasons[types.isna()] += "invalid type; "
+    invalid = invalid_reasons != ""
+
+    valid = ~invalid
+    today = datetime.date.today()
+    normalized = pd.DataFrame({
+        # Same default as TransactionDetailBase: no date means today
+        "transaction_date": dates[valid].dt.date.where(dates[valid].notna(), today),
+        "category": categories[valid],
+        "description": frame.loc[valid, "description"].astype("string"),
+        "amount_inr": amounts[valid].astype(float),
+        "type": types[valid],
+        "location": frame.loc[valid, "location"].astype("string"),
+    })
+    normalized = normalized.astype(object).where(normalized.notna(), None)
+
+    amount_changes: Dict[str, float] = defaultdict(float)
+    expenses = normalized[normalized["type"] == "expense"]
+    for category, total in expenses.groupby("category")["amount_inr"].sum().items():
+        amount_changes[category] += float(total)
+
+    errors = [
+        {"row": int(row_number), "reason": reason.rstrip("; ")}
+        for row_number, reason in invalid_reasons[invalid].head(MAX_ERRORS_PER_CHUNK).items()
+    ]
+    return StatementChunk(
+        rows_read=len(frame),
+        rows=list(normalized[TRANSACTION_COPY_COLUMNS].itertuples(index=False, name=None)),
+        amount_changes=dict(amount_changes),
+        rejected_count=int(invalid.sum()),
+        errors=errors,
+    )
+
+
+def missing_statement_columns(columns: List[str]) -> List[str]:
+    return [column for column in STATEMENT_TEMPLATE_COLUMNS if column not in columns]
+
+
+def iter_statement_chunks(file_obj: IO[bytes], filename: str, chunk_size: int) -> Iterator[StatementChunk]:
+    """
+    Reads an uploaded statement and yields validated chunks of at most `chunk_size` rows.
+    Raises ValueError for unsupported files or missing template columns.
+    """
+
+    if filename.lower().endswith(".xlsx"):
+        frames = _iter_xlsx_frames(file_obj, chunk_size)
+    elif filename.lower().endswith(".csv"):
+        frames = _iter_csv_frames(file_obj, chunk_size)
+    else:
+        raise ValueError(f"Only {', '.join(SUPPORTED_STATEMENT_EXTENSIONS)} files are allowed.")
+
+    # Row numbers match the spreadsheet: row 1 is the header
+    next_row_number = 2
+    for frame in frames:
+        missing_columns = missing_statement_columns(list(frame.columns))
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+
+        chunk = _normalize_chunk(frame, next_row_number)
+        next_row_number += chunk.rows_read
+        LOGGER.debug("Read statement chunk of %s rows (%s rejected)", chunk.rows_read, chunk.rejected_count)
+        yield chunk
@@ -1,4 +1,7 @@
-from typing import Dict, Any, List
+import asyncio
+from typing import Dict, Any, List, Optional
+
+from langchain_core.tools import StructuredTool
 
 from core.logger import LOGGER
 from agents.budget_agent.domain.schemas import (TableNameEnum, 
@@ -7,8 +10,15 @@ from agents.budget_agent.domain.schemas import (TableNameEnum,
                       CategoryBudgetOverview, 
                       TransactionDetailCreate, 
                       TransactionDetailUpdate, 
-                      TransactionDetail)
+                      TransactionDetail,
+                      TransactionPage,
+                      TransactionQueryFilter,
+                      SpendGroupByEnum,
+                      SpendSummaryRow,
+                      MonthlySummaryFilter,
+                      MonthlySummaryRow)
 from agents.budget_agent.infrastructure.webhooks import BUDGET_USECASE
+from agents.budget_agent.infrastructure.tools.tool_result_encoding import compact_result_tool
 
 
 def add_category_budget(payload: CategoryBudgetOverviewCreate) -> CategoryBudgetOverview:
@@ -16,16 +26,16 @@ def add_category_budget(payload: CategoryBudgetOverviewCreate) -> CategoryBudget
     Adds a category budget to the database.
     :param payload: A Pydantic model containing the category budget data.
     """
-    LOGGER.info(f"Adding category budget with payload: {payload}")
+    LOGGER.info("Adding category budget with payload: %s", payload)
     try:
 
         added_category = BUDGET_USECASE.handle_add_item(
             TableNameEnum.CATEGORY_BUDGET_OVERVIEW, payload.model_dump()
         )
-        LOGGER.info(f"Added category: {added_category}")
+        LOGGER.info("Added category: %s", added_category)
         return added_category.model_dump()
     except Exception as e:
-        LOGGER.error(f"Error adding category: {e}", exc_info=True)
+        LOGGER.error("Error adding category: %s", e, exc_info=True)
         raise
 
 
@@ -35,15 +45,34 @@ def add_transaction(payload: TransactionDetailCreate) -> TransactionDetail:
     :param payload: A Pydantic model containing the transaction data.
     """
 
-    LOGGER.info(f"Adding transaction with payload: {payload}")
+    LOGGER.info("Adding transaction with payload: %s", payload)
     try:
         added_transaction = BUDGET_USECASE.handle_add_item(
             TableNameEnum.TRANSACTION_DETAILS, payload.model_dump()
         )
-        LOGGER.info(f"Added transaction: {added_transaction}")
+        LOGGER.info("Added transaction: %s", added_transaction)
         return added_transaction.model_dump()
     except Exception as e:
-        LOGGER.error(f"Error adding transaction: {e}", exc_info=True)
+        LOGGER.error("Error adding transaction: %s", e, exc_info=True)
+        raise
+
+
+def add_transactions_bulk(payload: List[TransactionDetailCreate]) -> List[TransactionDetail]:
+    """
+    Adds many transactions to the database in one call (e.g. all the lines of a pasted statement).
+    Always prefer this over calling add_transaction repeatedly.
+    :param payload: A list of Pydantic models containing the transactions data.
+    """
+
+    LOGGER.info("Adding %s transactions in bulk", len(payload))
+    try:
+        added_transactions = BUDGET_USECASE.handle_add_items_bulk(
+            TableNameEnum.TRANSACTION_DETAILS, [transaction.model_dump() for transaction in payload]
+        )
+        LOGGER.info("Added %s transactions.", len(added_transactions))
+        return [transaction.model_dump() for transaction in added_transactions]
+    except Exception as e:
+        LOGGER.error("Error adding transactions in bulk: %s", e, exc_info=True)
         raise
 
 
@@ -55,11 +84,11 @@ def get_all_category_budgets() -> List[CategoryBudgetOverview]:
     LOGGER.info("Getting all category budgets")
     try:
         all_categories = BUDGET_USECASE.handle_get_all_items(TableNameEnum.CATEGORY_BUDGET_OVERVIEW)
-        LOGGER.info(f"Found {len(all_categories)} category budgets.")
+        LOGGER.info("Found %s category budgets.", len(all_categories))
         all_categories = [category.model_dump() for category in all_categories]
         return all_categories
     except Exception as e:
-        LOGGER.error(f"Error getting all categories: {e}", exc_info=True)
+        LOGGER.error("Error getting all categories: %s", e, exc_info=True)
         raise
 
 
@@ -71,13 +100,125 @@ def get_all_transactions() -> List[TransactionDetail]:
     LOGGER.info("Getting all transactions")
     try:
         all_transactions = BUDGET_USECASE.handle_get_all_items(TableNameEnum.TRANSACTION_DETAILS)
-        LOGGER.info(f"Found {len(all_transactions)} transactions.")
+        LOGGER.info("Found %s transactions.", len(all_transactions))
         all_transactions = [transaction.model_dump() for transaction in all_transactions]
         return all_transactions
     except Exception as e:
-        LOGGER.error(f"Error getting all transactions: {e}", exc_info=True)
+        LOGGER.error("Error getting all transactions: %s", e, exc_info=True)
+        raise
+
+
+def query_transactions(filters: TransactionQueryFilter) -> TransactionPage:
+    """
+    Gets the transactions matching the given filters, newest first, one page at a time.
+    Prefer this over get_all_transactions whenever the request mentions a date range,
+    category, type, amount range or location.
+    :param filters: Optional filters (start_date, end_date, category, type, min_amount_inr,
+                    max_amount_inr, location), the page size (limit) and the cursor of the
+                    next page (next_cursor from the previous result).
+    """
+
+    LOGGER.info("Querying transactions with filters: %s", filters)
+    try:
+        transaction_page = BUDGET_USECASE.handle_query_transactions(filters.model_dump())
+        LOGGER.info("Found %s transactions.", len(transaction_page.items))
+        return transaction_page.model_dump()
+    except Exception as e:
+        LOGGER.error("Error querying transactions: %s", e, exc_info=True)
+        raise
+
+
+def get_transaction_by_id(item_id: int) -> TransactionDetail:
+    """
+    Gets a single transaction from the database.
+    :param item_id: The ID of the transaction to fetch.
+    """
+
+    LOGGER.info("Getting transaction ID %s", item_id)
+    try:
+        transaction = BUDGET_USECASE.handle_get_one_item(TableNameEnum.TRANSACTION_DETAILS, {"id": item_id})
+        return transaction.model_dump()
+    except Exception as e:
+        LOGGER.error("Error getting transaction: %s", e, exc_info=True)
         raise
-        
+
+def _summarize_transactions(group_by: SpendGroupByEnum, filters: Optional[TransactionQueryFilter], top_n: Optional[int] = None, default_type: Optional[str] = "expense") -> List[Dict[str, Any]]:
+    filters = filters or TransactionQueryFilter()
+    if default_type and not filters.type:
+        filters = filters.model_copy(update={"type": default_type})
+
+    LOGGER.info("Summarizing transactions by %s with filters: %s", group_by.value, filters)
+    try:
+        summary_rows = BUDGET_USECASE.handle_aggregate_transactions(group_by, filters.model_dump(), top_n)
+        LOGGER.info("Found %s %s groups.", len(summary_rows), group_by.value)
+        return [row.model_dump() for row in summary_rows]
+    except Exception as e:
+        LOGGER.error("Error summarizing transactions by %s: %s", group_by.value, e, exc_info=True)
+        raise
+
+
+def get_spend_by_category(filters: Optional[TransactionQueryFilter] = None) -> List[SpendSummaryRow]:
+    """
+    Gets the number of transactions and the total amount spent per category, already computed.
+    Only expenses are counted unless filters.type says otherwise.
+    :param filters: Optional filters (date range, category, type, amount range, location).
+    """
+    return _summarize_transactions(SpendGroupByEnum.CATEGORY, filters)
+
+
+def get_spend_by_month(filters: Optional[TransactionQueryFilter] = None) -> List[SpendSummaryRow]:
+    """
+    Gets the number of transactions and the total amount spent per month ('YYYY-MM'), already computed.
+    Only expenses are counted unless filters.type says otherwise.
+    :param filters: Optional filters (date range, category, type, amount range, location).
+    """
+    return _summarize_transactions(SpendGroupByEnum.MONTH, filters)
+
+
+def get_spend_by_location(filters: Optional[TransactionQueryFilter] = None) -> List[SpendSummaryRow]:
+    """
+    Gets the number of transactions and the total amount spent per location, already computed.
+    Only expenses are counted unless filters.type says otherwise.
+    :param filters: Optional filters (date range, category, type, amount range, location).
+    """
+    return _summarize_transactions(SpendGroupByEnum.LOCATION, filters)
+
+
+def get_totals_by_type(filters: Optional[TransactionQueryFilter] = None) -> List[SpendSummaryRow]:
+    """
+    Gets the number of transactions and the total amount per transaction type (e.g. expense, income), already computed.
+    :param filters: Optional filters (date range, category, type, amount range, location).
+    """
+    return _summarize_transactions(SpendGroupByEnum.TYPE, filters, default_type=None)
+
+
+def get_top_spend_descriptions(top_n: int = 5, filters: Optional[TransactionQueryFilter] = None) -> List[SpendSummaryRow]:
+    """
+    Gets the top N merchants/descriptions by total amount spent, already computed.
+    Only expenses are counted unless filters.type says otherwise.
+    :param top_n: How many merchants/descriptions to return.
+    :param filters: Optional filters (date range, category, type, amount range, location).
+    """
+    return _summarize_transactions(SpendGroupByEnum.DESCRIPTION, filters, top_n=top_n)
+
+
+def get_monthly_category_summary(filters: Optional[MonthlySummaryFilter] = None) -> List[MonthlySummaryRow]:
+    """
+    Gets the precomputed number of transactions and total amount per month, category and type.
+    Use it for questions about whole months (e.g. "food expenses in each month of 2024").
+    :param filters: Optional filters (start_month, end_month, category, type).
+    """
+
+    filters = filters or MonthlySummaryFilter()
+    LOGGER.info("Getting monthly category summary with filters: %s", filters)
+    try:
+        summary_rows = BUDGET_USECASE.handle_get_monthly_summary(filters.model_dump())
+        LOGGER.info("Found %s monthly summary rows.", len(summary_rows))
+        return [row.model_dump() for row in summary_rows]
+    except Exception as e:
+        LOGGER.error("Error getting monthly category summary: %s", e, exc_info=True)
+        raise
+
 def update_transaction(item_id: int, update_data: TransactionDetailUpdate) -> TransactionDetail:
     """
     Updates a transaction in the database.
@@ -85,14 +226,14 @@ def update_transaction(item_id: int, update_data: TransactionDetailUpdate) -> Tr
     :param update_data: A Pydantic model with the fields to update.
     """
 
-    LOGGER.info(f"Updating transaction ID {item_id} with data: {update_data}")
+    LOGGER.info("Updating transaction ID %s with data: %s", item_id, update_data)
     try:
         payload: Dict[str, Any] = {"id": item_id, "update_data": update_data.model_dump(exclude_unset=True)}
         updated_transaction = BUDGET_USECASE.handle_update_item(TableNameEnum.TRANSACTION_DETAILS, payload)
-        LOGGER.info(f"Updated transaction: {updated_transaction}")
+        LOGGER.info("Updated transaction: %s", updated_transaction)
         return updated_transaction.model_dump()
     except Exception as e:
-        LOGGER.error(f"Error updating transaction: {e}", exc_info=True)
+        LOGGER.error("Error updating transaction: %s", e, exc_info=True)
         raise
 
 def update_category_budget(item_id: int, update_data: CategoryBudgetOverviewUpdate) -> CategoryBudgetOverview:
@@ -102,14 +243,14 @@ def update_category_budget(item_id: int, update_data: CategoryBudgetOverviewUpda
     :param update_data: A Pydantic model with the fields to update.
     """
 
-    LOGGER.info(f"Updating category budget ID {item_id} with data: {update_data}")
+    LOGGER.info("Updating category budget ID %s with data: %s", item_id, update_data)
     try:
         payload: Dict[str, Any] = {"id": item_id, "update_data": update_data.model_dump(exclude_unset=True)}
         updated_category = BUDGET_USECASE.handle_update_item(TableNameEnum.CATEGORY_BUDGET_OVERVIEW, payload)
-        LOGGER.info(f"Updated category: {updated_category}")
+        LOGGER.info("Updated category: %s", updated_category)
         return updated_category.model_dump()
     except Exception as e:
-        LOGGER.error(f"Error updating category: {e}", exc_info=True)
+        LOGGER.error("Error updating category: %s", e, exc_info=True)
         raise
 
 def delete_transaction(item_id: int) -> Dict[str, Any]:
@@ -117,14 +258,14 @@ def delete_transaction(item_id: int) -> Dict[str, Any]:
     Deletes a transaction from the database.
     :param item_id: The ID of the transaction to delete.
     """
-    LOGGER.info(f"Deleting transaction ID {item_id}")
+    LOGGER.info("Deleting transaction ID %s", item_id)
     try:
         payload = {"id": item_id}
         delete_response = BUDGET_USECASE.handle_delete_item(TableNameEnum.TRANSACTION_DETAILS, payload)
         LOGGER.info(delete_response)
         return delete_response
     except Exception as e:
-        LOGGER.error(f"Error deleting transaction: {e}", exc_info=True)
+        LOGGER.error("Error deleting transaction: %s", e, exc_info=True)
         raise
 
 def delete_category_budget(item_id: int) -> Dict[str, Any]:
@@ -133,13 +274,207 @@ def delete_category_budget(item_id: int) -> Dict[str, Any]:
     :param item_id: The ID of the category budget to delete.
     """
 
-    LOGGER.info(f"Deleting category budget ID {item_id}")
+    LOGGER.info("Deleting category budget ID %s", item_id)
     try:
         payload = {"id": item_id}
         delete_response = BUDGET_USECASE.handle_delete_item(TableNameEnum.CATEGORY_BUDGET_OVERVIEW, payload)
         LOGGER.info(delete_response)
         return delete_response
     except Exception as e:
-        LOGGER.error(f"Error deleting category budget: {e}", exc_info=True)
+        LOGGER.error("Error deleting category budget: %s", e, exc_info=True)
         raise
 
+
+# --- Async tool variants ---
+# The repository layer uses a synchronous driver, so the async variants run the
+# sync tool in a worker thread and keep the event loop free while the DB works.
+# Independent tool calls of one agent step therefore run concurrently, at most
+# TOOL_MAX_CONCURRENCY per run (the agent's max_concurrency run config). Writes
+# need no lock: the category rollup is a single atomic UPDATE.
+
+async def aadd_category_budget(payload: CategoryBudgetOverviewCreate) -> CategoryBudgetOverview:
+    """
+    Adds a category budget to the database.
+    :param payload: A Pydantic model containing the category budget data.
+    """
+    return await asyncio.to_thread(add_category_budget, payload)
+
+
+async def aadd_transaction(payload: TransactionDetailCreate) -> TransactionDetail:
+    """
+    Adds a transaction to the database.
+    :param payload: A Pydantic model containing the transaction data.
+    """
+    return await asyncio.to_thread(add_transaction, payload)
+
+
+async def aadd_transactions_bulk(payload: List[TransactionDetailCreate]) -> List[TransactionDetail]:
+    """
+    Adds many transactions to the database in one call (e.g. all the lines of a pasted statement).
+    Always prefer this over calling add_transaction repeatedly.
+    :param payload: A list of Pydantic models containing the transactions data.
+    """
+    return await asyncio.to_thread(add_transactions_bulk, payload)
+
+
+async def aget_all_category_budgets() -> List[CategoryBudgetOverview]:
+    """
+    Gets all category budgets from the database.
+    """
+    return await asyncio.to_thread(get_all_category_budgets)
+
+
+async def aget_all_transactions() -> List[TransactionDetail]:
+    """
+    Gets all transactions from the database.
+    """
+    return await asyncio.to_thread(get_all_transactions)
+
+
+async def aquery_transactions(filters: TransactionQueryFilter) -> TransactionPage:
+    """
+    Gets the transactions matching the given filters, newest first, one page at a time.
+    Prefer this over get_all_transactions whenever the request mentions a date range,
+    category, type, amount range or location.
+    :param filters: Optional filters (start_date, end_date, category, type, min_amount_inr,
+                    max_amount_inr, location), the page size (limit) and the cursor of the
+                    next page (next_cursor from the previous result).
+    """
+    return await asyncio.to_thread(query_transactions, filters)
+
+
+async def aget_transaction_by_id(item_id: int) -> TransactionDetail:
+    """
+    Gets a single transaction from the database.
+    :param item_id: The ID of the transaction to fetch.
+    """
+    return await asyncio.to_thread(get_transaction_by_id, item_id)
+
+
+async def aget_spend_by_category(filters: Optional[TransactionQueryFilter] = None) -> List[SpendSummaryRow]:
+    """
+    Gets the number of transactions and the total amount spent per category, already computed.
+    Only expenses are counted unless filters.type says otherwise.
+    :param filters: Optional filters (date range, category, type, amount range, location).
+    """
+    return await asyncio.to_thread(get_spend_by_category, filters)
+
+
+async def aget_spend_by_month(filters: Optional[TransactionQueryFilter] = None) -> List[SpendSummaryRow]:
+    """
+    Gets the number of transactions and the total amount spent per month ('YYYY-MM'), already computed.
+    Only expenses are counted unless filters.type says otherwise.
+    :param filters: Optional filters (date range, category, type, amount range, location).
+    """
+    return await asyncio.to_thread(get_spend_by_month, filters)
+
+
+async def aget_spend_by_location(filters: Optional[TransactionQueryFilter] = None) -> List[SpendSummaryRow]:
+    """
+    Gets the number of transactions and the total amount spent per location, already computed.
+    Only expenses are counted unless filters.type says otherwise.
+    :param filters: Optional filters (date range, category, type, amount range, location).
+    """
+    return await asyncio.to_thread(get_spend_by_location, filters)
+
+
+async def aget_totals_by_type(filters: Optional[TransactionQueryFilter] = None) -> List[SpendSummaryRow]:
+    """
+    Gets the number of transactions and the total amount per transaction type (e.g. expense, income), already computed.
+    :param filters: Optional filters (date range, category, type, amount range, location).
+    """
+    return await asyncio.to_thread(get_totals_by_type, filters)
+
+
+async def aget_top_spend_descriptions(top_n: int = 5, filters: Optional[TransactionQueryFilter] = None) -> List[SpendSummaryRow]:
+    """
+    Gets the top N merchants/descriptions by total amount spent, already computed.
+    Only expenses are counted unless filters.type says otherwise.
+    :param top_n: How many merchants/descriptions to return.
+    :param filters: Optional filters (date range, category, type, amount range, location).
+    """
+    return await asyncio.to_thread(get_top_spend_descriptions, top_n, filters)
+
+
+async def aget_monthly_category_summary(filters: Optional[MonthlySummaryFilter] = None) -> List[MonthlySummaryRow]:
+    """
+    Gets the precomputed number of transactions and total amount per month, category and type.
+    Use it for questions about whole months (e.g. "food expenses in each month of 2024").
+    :param filters: Optional filters (start_month, end_month, category, type).
+    """
+    return await asyncio.to_thread(get_monthly_category_summary, filters)
+
+
+async def aupdate_transaction(item_id: int, update_data: TransactionDetailUpdate) -> TransactionDetail:
+    """
+    Updates a transaction in the database.
+    :param item_id: The ID of the transaction to update.
+    :param update_data: A Pydantic model with the fields to update.
+    """
+    return await asyncio.to_thread(update_transaction, item_id, update_data)
+
+
+async def aupdate_category_budget(item_id: int, update_data: CategoryBudgetOverviewUpdate) -> CategoryBudgetOverview:
+    """
+    Updates a category budget in the database.
+    :param item_id: The ID of the category budget to update.
+    :param update_data: A Pydantic model with the fields to update.
+    """
+    return await asyncio.to_thread(update_category_budget, item_id, update_data)
+
+
+async def adelete_transaction(item_id: int) -> Dict[str, Any]:
+    """
+    Deletes a transaction from the database.
+    :param item_id: The ID of the transaction to delete.
+    """
+    return await asyncio.to_thread(delete_transaction, item_id)
+
+
+async def adelete_category_budget(item_id: int) -> Dict[str, Any]:
+    """
+    Deletes a category budget from the database.
+    :param item_id: The ID of the category budget to delete.
+    """
+    return await asyncio.to_thread(delete_category_budget, item_id)
+
+
+# --- Tools exposed to the agent (sync + async implementations) ---
+# Read tools return their rows compactly encoded and cut to a token budget (see tool_result_encoding)
+
+REFINE_CATEGORIES = "refine your request to specific categories"
+REFINE_ALL_TRANSACTIONS = "refine your filter with query_transactions (date range, category, type, amount range or location)"
+REFINE_TRANSACTIONS = "refine your filter or continue with next_cursor"
+REFINE_SUMMARY = "refine your filter (date range, category, type, amount range or location)"
+REFINE_MONTHLY_SUMMARY = "refine your filter (start_month, end_month, category or type)"
+
+BUDGET_AGENT_TOOLS = [
+    StructuredTool.from_function(func=add_category_budget, coroutine=aadd_category_budget),
+    StructuredTool.from_function(func=add_transaction, coroutine=aadd_transaction),
+    StructuredTool.from_function(func=add_transactions_bulk, coroutine=aadd_transactions_bulk),
+    compact_result_tool(get_all_category_budgets, aget_all_category_budgets, REFINE_CATEGORIES),
+    compact_result_tool(get_all_transactions, aget_all_transactions, REFINE_ALL_TRANSACTIONS),
+    compact_result_tool(query_transactions, aquery_transactions, REFINE_TRANSACTIONS),
+    StructuredTool.from_function(func=get_transaction_by_id, coroutine=aget_transaction_by_id),
+    compact_result_tool(get_spend_by_category, aget_spend_by_category, REFINE_SUMMARY),
+    compact_result_tool(get_spend_by_month, aget_spend_by_month, REFINE_SUMMARY),
+    compact_result_tool(get_spend_by_location, aget_spend_by_location, REFINE_SUMMARY),
+    compact_result_tool(get_totals_by_type, aget_totals_by_type, REFINE_SUMMARY),
+    compact_result_tool(get_top_spend_descriptions, aget_top_spend_descriptions, REFINE_SUMMARY),
+    compact_result_tool(get_monthly_category_summary, aget_monthly_category_summary, REFINE_MONTHLY_SUMMARY),
+    StructuredTool.from_function(func=update_transaction, coroutine=aupdate_transaction),
+    StructuredTool.from_function(func=update_category_budget, coroutine=aupdate_category_budget),
+    StructuredTool.from_function(func=delete_transaction, coroutine=adelete_transaction),
+    StructuredTool.from_function(func=delete_category_budget, coroutine=adelete_category_budget),
+]
+
+# Tools that modify budget data; an agent run that called any of them is never cached
+BUDGET_AGENT_WRITE_TOOL_NAMES = frozenset({
+    "add_category_budget",
+    "add_transaction",
+    "add_transactions_bulk",
+    "update_transaction",
+    "update_category_budget",
+    "delete_transaction",
+    "delete_category_budget",
+})
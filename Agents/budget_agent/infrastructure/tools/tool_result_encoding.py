@@ -0,0 +1,170 @@
+"""
+Compact encoding of the budget agent's read tool results.
+
+A tool result is put in the model context as is, so a list of row dicts
+repeats every key on every row, and the dates (datetime.date, not JSON
+serializable) made the tool node fall back to the Python repr of the list.
+The read tools are exposed to the agent through `compact_result_tool`, which
+encodes their rows per TOOL_RESULT_FORMAT:
+- "columnar" (default): {"columns": [...], "rows": [[...], ...]}, compact JSON;
+- "csv": a header line and one line per row;
+- "json": the row objects, compact JSON.
+Dates become ISO strings, floats are rounded to 2 decimals (whole amounts
+lose their ".0"). Rows beyond TOOL_RESULT_MAX_TOKENS (approximate, 4 chars per
+token) are cut and replaced by a "N more rows, refine your filter" note.
+
+The compact form only lives in the model context. The plain tool functions
+keep returning row dicts (the fast path and other Python callers are not
+affected), and an agent answer in the columnar form is expanded back to row
+objects by `expand_columnar_rows` before it reaches the API client: both
+paths answer with the same shape. Only the agent's rows can be cut; the cut
+is then reported by the "note" kept next to them.
+"""
+
+import csv
+import datetime
+import enum
+import functools
+import io
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.tools import StructuredTool
+
+from core.settings import SETTINGS
+
+TOOL_RESULT_FORMATS = ("columnar", "csv", "json")
+# Same ratio as langchain's count_tokens_approximately
+CHARS_PER_TOKEN = 4.0
+# Room kept for the truncation note and the page cursor
+RESERVED_CHARS = 200
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, float):
+        value = round(value, 2)
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _columns(rows: Sequence[Dict[str, Any]]) -> List[str]:
+    columns: Dict[str, None] = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    return list(columns)
+
+
+def _encode_row(row: Dict[str, Any], columns: List[str], result_format: str) -> str:
+    if result_format == "json":
+        return _dumps({column: _normalize(row.get(column)) for column in columns})
+    values = [_normalize(row.get(column)) for column in columns]
+    if result_format == "columnar":
+        return _dumps(values)
+    line = io.StringIO()
+    csv.writer(line, lineterminator="").writerow(["" if value is None else value for value in values])
+    return line.getvalue()
+
+
+def _fit_rows(encoded_rows: List[str], budget_chars: int) -> int:
+    """How many of the encoded rows fit in the budget (separators included)."""
+    used = 0
+    for count, encoded_row in enumerate(encoded_rows):
+        used += len(encoded_row) + 1
+        if used > budget_chars:
+            return count
+    return len(encoded_rows)
+
+
+def encode_rows(rows: Sequence[Dict[str, Any]], result_format: str, max_tokens: int, refine_hint: str,
+                extra: Optional[Dict[str, Any]] = None) -> Tuple[str, int]:
+    """
+    Encodes the rows within the token budget; `extra` (e.g. the next page cursor)
+    is appended as is. Returns the text and the number of rows included.
+    """
+    if result_format not in TOOL_RESULT_FORMATS:
+        raise ValueError(f"Unknown tool result format '{result_format}', expected one of {TOOL_RESULT_FORMATS}")
+    columns = _columns(rows)
+    encoded_rows = [_encode_row(row, columns, result_format) for row in rows]
+    header = ",".join(columns) if result_format == "csv" else _dumps(columns)
+    budget_chars = int(max_tokens * CHARS_PER_TOKEN) - len(header) - RESERVED_CHARS
+    shown = _fit_rows(encoded_rows, budget_chars)
+    hidden = len(rows) - shown
+    note = f"{hidden} more rows not shown, {refine_hint}" if hidden else None
+    extra = {key: _normalize(value) for key, value in (extra or {}).items()}
+
+    if result_format == "csv":
+        lines = [header, *encoded_rows[:shown]]
+        lines += [f"# {key}: {_dumps(value)}" for key, value in extra.items() if value is not None]
+        if note:
+            lines.append(f"# {note}")
+        return "\n".join(lines), shown
+
+    body = "[" + ",".join(encoded_rows[:shown]) + "]"
+    if result_format == "columnar":
+        fields = [f'"columns":{header}', f'"rows":{body}']
+    else:
+        fields = [f'"items":{body}'] if extra or note else []
+    fields += [f"{_dumps(key)}:{_dumps(value)}" for key, value in extra.items()]
+    if note:
+        fields += [f'"total_rows":{len(rows)}', f'"note":{_dumps(note)}']
+    # "json" without a cursor or a note keeps the plain list of rows
+    return ("{" + ",".join(fields) + "}") if fields else body, shown
+
+
+def encode_tool_result(result: Any, refine_hint: str) -> Any:
+    """Encodes a list of rows, or a page ({"items": [...], "next_cursor": ...}); other results are returned unchanged."""
+    result_format = SETTINGS.tool_result_format
+    max_tokens = SETTINGS.tool_result_max_tokens
+    if isinstance(result, list) and all(isinstance(row, dict) for row in result):
+        return encode_rows(result, result_format, max_tokens, refine_hint)[0]
+    if isinstance(result, dict) and isinstance(result.get("items"), list):
+        items = result["items"]
+        extra = {key: value for key, value in result.items() if key != "items"}
+        text, shown = encode_rows(items, result_format, max_tokens, refine_hint, extra)
+        if 0 < shown < len(items) and "next_cursor" in extra:
+            # Continue right after the last row shown, so paging does not skip the cut rows
+            last_row = items[shown - 1]
+            extra["next_cursor"] = {"transaction_date": last_row["transaction_date"], "id": last_row["id"]}
+            text, _ = encode_rows(items, result_format, max_tokens, refine_hint, extra)
+        return text
+    return result
+
+
+def expand_columnar_rows(response: Any) -> Any:
+    """
+    Turns a {"columns": [...], "rows": [[...], ...]} answer into a list of row
+    objects, or {"items": [...], <other keys>} when it carries a cursor or a
+    note (the shape of a TransactionPage). Anything else is returned unchanged.
+    """
+    if not isinstance(response, dict):
+        return response
+    columns, rows = response.get("columns"), response.get("rows")
+    if not (isinstance(columns, list) and all(isinstance(column, str) for column in columns)):
+        return response
+    if not (isinstance(rows, list) and all(isinstance(row, list) and len(row) == len(columns) for row in rows)):
+        return response
+    items = [dict(zip(columns, row)) for row in rows]
+    extra = {key: value for key, value in response.items() if key not in ("columns", "rows")}
+    return {"items": items, **extra} if extra else items
+
+
+def compact_result_tool(func: Callable[..., Any], coroutine: Callable[..., Any], refine_hint: str) -> StructuredTool:
+    """StructuredTool over a read tool (sync + async implementations) whose result is compactly encoded."""
+
+    @functools.wraps(func)
+    def encoded_func(*args, **kwargs):
+        return encode_tool_result(func(*args, **kwargs), refine_hint)
+
+    @functools.wraps(coroutine)
+    async def encoded_coroutine(*args, **kwargs):
+        return encode_tool_result(await coroutine(*args, **kwargs), refine_hint)
+
+    return StructuredTool.from_function(func=encoded_func, coroutine=encoded_coroutine)
@@ -0,0 +1,72 @@
+import io
+import shutil
+import tempfile
+
+from fastapi import APIRouter, File, HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
+
+from core.logger import LOGGER
+from core.settings import SETTINGS
+from agents.budget_agent.domain.schemas import StatementImportProgress
+from agents.budget_agent.infrastructure.importers.statement_reader import (STATEMENT_TEMPLATE_COLUMNS,
+                                                                          SUPPORTED_STATEMENT_EXTENSIONS,
+                                                                          TRANSACTION_COPY_COLUMNS,
+                                                                          iter_statement_chunks)
+from agents.budget_agent.infrastructure.webhooks import BUDGET_USECASE
+
+STATEMENT_IMPORT_WEBHOOK = APIRouter()
+
+
+@STATEMENT_IMPORT_WEBHOOK.get("/transactions/import/template", summary="Get Excel Template")
+def get_statement_template():
+    """
+    Generates and returns an Excel file template with the statement columns.
+    """
+    workbook = Workbook()
+    workbook.active.append(STATEMENT_TEMPLATE_COLUMNS)
+
+    excel_buffer = io.BytesIO()
+    workbook.save(excel_buffer)
+    excel_buffer.seek(0)
+
+    return StreamingResponse(
+        excel_buffer,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={
+            "Content-Disposition": "attachment; filename=transaction_template.xlsx"
+        },
+    )
+
+
+@STATEMENT_IMPORT_WEBHOOK.post("/transactions/import", summary="Import Excel/CSV Statement")
+def import_statement(file: UploadFile = File(...)):
+    """
+    Imports an Excel (.xlsx) or CSV statement into transaction_details.
+    The response is a stream of JSON lines reporting progress after each chunk,
+    followed by a final "completed" (or "failed") report.
+    """
+    if not file.filename or not file.filename.lower().endswith(SUPPORTED_STATEMENT_EXTENSIONS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only {', '.join(SUPPORTED_STATEMENT_EXTENSIONS)} files are allowed.",
+        )
+
+    # The upload is closed once this handler returns, so keep a disk-backed copy for the stream
+    statement_file = tempfile.TemporaryFile()
+    shutil.copyfileobj(file.file, statement_file)
+    statement_file.seek(0)
+    filename = file.filename
+
+    def import_progress():
+        try:
+            chunks = iter_statement_chunks(statement_file, filename, SETTINGS.statement_import_chunk_size)
+            for progress in BUDGET_USECASE.handle_import_transactions(TRANSACTION_COPY_COLUMNS, chunks):
+                yield progress.model_dump_json() + "\n"
+        except Exception as e:
+            LOGGER.error("Error importing statement '%s': %s", filename, e, exc_info=True)
+            yield StatementImportProgress(event="failed", detail=str(e)).model_dump_json() + "\n"
+        finally:
+            statement_file.close()
+
+    return StreamingResponse(import_progress(), media_type="application/x-ndjson")
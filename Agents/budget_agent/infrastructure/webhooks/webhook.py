@@ -1,7 +1,12 @@
 from dotenv import load_dotenv
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 
+from core.agent_streaming import SSE_HEADERS
 from agents.budget_agent.domain.schemas import (BudgetAgentResponse, QueryRequest)
+from agents.budget_agent.infrastructure.conversations.conversation_threads import CONVERSATION_THREADS
+from agents.budget_agent.infrastructure.db.postgres.category_budget_cache import CATEGORY_BUDGET_CACHE
+from agents.budget_agent.infrastructure.db.postgres.engine_registry import ENGINE_REGISTRY
 from agents.budget_agent.infrastructure.external_services.langgraph_budget_agent import LANGGRAPH_BUDGET_AGENT
 
 load_dotenv()
@@ -9,11 +14,61 @@ load_dotenv()
 BUDGET_AGENT_WEBHOOK = APIRouter()
 
 
+def _validate_prompt_variant(request: QueryRequest) -> None:
+    try:
+        LANGGRAPH_BUDGET_AGENT.get_prompt(request.prompt_variant)
+    except KeyError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e.args[0]))
+
+
 @BUDGET_AGENT_WEBHOOK.post("/invoke_budget_agent", response_model=BudgetAgentResponse)
-def invoke_agent(request: QueryRequest):
-    response = LANGGRAPH_BUDGET_AGENT.invoke_agent(request)
+async def invoke_agent(request: QueryRequest):
+    _validate_prompt_variant(request)
+    response = await LANGGRAPH_BUDGET_AGENT.ainvoke_agent(request)
     return response
 
+
+@BUDGET_AGENT_WEBHOOK.post("/invoke_budget_agent/stream")
+async def stream_agent(request: QueryRequest):
+    """
+    Streams the agent run as Server-Sent Events: start, tool_start, tool_end,
+    token and a final event carrying the BudgetAgentResponse (or error).
+    """
+    _validate_prompt_variant(request)
+    return StreamingResponse(LANGGRAPH_BUDGET_AGENT.astream_agent(request), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@BUDGET_AGENT_WEBHOOK.delete("/conversation_threads/{thread_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_conversation_thread(thread_id: str):
+    """Forgets a conversation thread: its activity record and its checkpointed messages."""
+    if not CONVERSATION_THREADS.delete(thread_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Conversation thread {thread_id} not found")
+
+
+@BUDGET_AGENT_WEBHOOK.get("/conversation_threads_stats")
+def conversation_threads_stats():
+    return CONVERSATION_THREADS.stats()
+
+
+@BUDGET_AGENT_WEBHOOK.get("/db_pool_stats")
+def db_pool_stats():
+    return ENGINE_REGISTRY.pool_stats()
+
+
+@BUDGET_AGENT_WEBHOOK.get("/category_budget_cache_stats")
+def category_budget_cache_stats():
+    return CATEGORY_BUDGET_CACHE.stats()
+
+
+@BUDGET_AGENT_WEBHOOK.get("/response_cache_stats")
+def response_cache_stats():
+    return LANGGRAPH_BUDGET_AGENT.response_cache.stats()
+
+
+@BUDGET_AGENT_WEBHOOK.get("/fast_path_stats")
+def fast_path_stats():
+    return LANGGRAPH_BUDGET_AGENT.fast_path.stats()
+
 # {
 #   "query": "I want to view the trasactions history. List all the transactions"
 # }
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, Text
+
+
+metadata = MetaData()
+
+# --- SQLAlchemy Table Definitions ---
+
+extraction_jobs_table = Table(
+    "extraction_jobs",
+    metadata,
+    Column("job_id", String(36), primary_key=True),
+    Column("status", String(16), index=True, nullable=False), # queued / running / succeeded / failed
+    Column("request_json", Text, nullable=False), # StagesExtractInputDetails
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("max_attempts", Integer, nullable=False),
+    Column("deadline_s", Float, nullable=False), # per attempt
+    Column("available_at", DateTime, index=True, nullable=False), # not picked up before (retry backoff)
+    Column("created_at", DateTime, nullable=False),
+    Column("started_at", DateTime),
+    Column("finished_at", DateTime),
+    Column("error", Text),
+    Column("result", Text), # raw model output
+)
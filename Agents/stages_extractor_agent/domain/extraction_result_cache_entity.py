@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text
+
+
+metadata = MetaData()
+
+# --- SQLAlchemy Table Definitions ---
+
+extraction_result_cache_table = Table(
+    "extraction_result_cache",
+    metadata,
+    Column("cache_key", String(64), primary_key=True), # sha256 of video, generation, prompt and model config
+    Column("video_gcs_uri", Text, nullable=False),
+    Column("model_name", String(100), nullable=False),
+    Column("created_at", DateTime, index=True, nullable=False), # TTL
+    Column("last_used_at", DateTime, index=True, nullable=False), # size eviction (least recently used first)
+    Column("hits", Integer, nullable=False, default=0),
+    Column("result", Text, nullable=False), # raw model output
+)
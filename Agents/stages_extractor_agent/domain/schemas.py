@@ -1,12 +1,71 @@
-from typing import Any, Dict
-from pydantic import BaseModel
+import datetime
+from enum import Enum as PyEnum
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
 
 
 class QueryRequest(BaseModel):
     query: str
+    prompt_variant: Optional[str] = None # name of a prompt file in infrastructure/prompts
 
 class StagesExtractorAgentResponse(BaseModel):
     response: Dict[str, Any] | str | list[Dict[str, Any]]
 
+# Output of the extraction model (see stages_extract_tool_prompt)
+class ProcessStage(BaseModel):
+    stage_number: int
+    stage_name: str
+    stage_description: str = ""
+    steps: List[str] = []
+
+class StagesWorkflow(BaseModel):
+    process_title: Optional[str] = None
+    video_analysis_summary: str = ""
+    stages: List[ProcessStage]
+    completeness_check: str = ""
+
 class StagesExtractInputDetails(BaseModel):
     video_gcs_uri: str
+    video_generation: Optional[str] = None # GCS object generation/etag; looked up when not given
+    bypass_cache: bool = False # always run the model, then refresh the cached result
+    segment_length_s: Optional[float] = Field(default=None, gt=0) # extract long videos in parallel windows of this length
+    video_duration_s: Optional[float] = Field(default=None, gt=0) # needed to segment gs:// videos; probed for local files
+    prompt_variant: Optional[str] = None # extraction prompt file in infrastructure/prompts, defaults to stages_extract_tool_prompt
+
+# Extraction Job Models
+class ExtractionJobStatusEnum(str, PyEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class ExtractionJobSubmitRequest(StagesExtractInputDetails):
+    deadline_s: Optional[float] = None # per attempt, defaults to the configured deadline
+    max_attempts: Optional[int] = None # defaults to the configured number of attempts
+
+class ExtractionJob(BaseModel):
+    job_id: str
+    status: ExtractionJobStatusEnum
+    video_gcs_uri: str
+    attempts: int
+    max_attempts: int
+    deadline_s: float
+    created_at: datetime.datetime
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+    error: Optional[str] = None
+
+# Batch Extraction Models
+class StagesExtractBatchRequest(BaseModel):
+    video_gcs_uris: List[str] = Field(min_length=1)
+    max_concurrency: Optional[int] = Field(default=None, ge=1) # capped at the configured batch concurrency
+    deadline_s: Optional[float] = Field(default=None, gt=0) # per video, defaults to the configured job deadline
+    bypass_cache: bool = False
+
+class StagesExtractBatchItemResult(BaseModel):
+    index: int # position in video_gcs_uris
+    video_gcs_uri: str
+    status: ExtractionJobStatusEnum # succeeded / failed
+    response: Optional[StagesExtractorAgentResponse] = None
+    error: Optional[str] = None
+    elapsed_s: float
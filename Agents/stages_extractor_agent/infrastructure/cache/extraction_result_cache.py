@@ -0,0 +1,156 @@
+"""
+Persistent cache of stage extraction results (SQLite locally, Postgres in production).
+
+A multimodal extraction of the same video with the same prompt and model
+configuration gives the same answer, so its raw output is stored under a
+hash of everything that can change it: video URI, GCS object generation
+(when known), prompt text, model name, temperature and output token limit.
+Entries expire after a TTL, and the least recently used ones are evicted
+beyond the configured size. The cache never fails an extraction: database
+errors are logged and treated as a miss.
+"""
+
+import datetime
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.engine import Engine
+
+from core.logger import LOGGER
+from core.settings import SETTINGS
+from agents.stages_extractor_agent.domain.extraction_result_cache_entity import extraction_result_cache_table, metadata
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def make_cache_key(video_gcs_uri: str, video_generation: Optional[str], prompt: str, model_name: str,
+                   temperature: float, max_output_tokens: int) -> str:
+    payload = json.dumps(
+        {
+            "video_gcs_uri": video_gcs_uri,
+            "video_generation": video_generation,
+            "prompt_sha256": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+            "model_name": model_name,
+            "temperature": temperature,
+            "max_output_tokens": max_output_tokens,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExtractionResultCache:
+
+    def __init__(self, db_url: str, ttl_s: float, max_entries: int):
+        self.db_url = db_url
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._engine: Optional[Engine] = None
+        self._engine_lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "bypassed": 0, "stored": 0, "evictions": 0, "errors": 0}
+
+    @property
+    def engine(self) -> Engine:
+        with self._engine_lock:
+            if self._engine is None:
+                connect_args = {"check_same_thread": False, "timeout": 30} if self.db_url.startswith("sqlite") else {}
+                engine = create_engine(self.db_url, connect_args=connect_args, pool_pre_ping=True)
+                metadata.create_all(engine, tables=[extraction_result_cache_table])
+                self._engine = engine
+            return self._engine
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._counters_lock:
+            self._counters[counter] += amount
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """Returns the cached raw output for the key, or None on a miss (or an expired entry)."""
+        cache = extraction_result_cache_table
+        now = _utcnow()
+        try:
+            with self.engine.begin() as connection:
+                row = connection.execute(select(cache.c.result, cache.c.created_at).where(cache.c.cache_key == cache_key)).fetchone()
+                if row is None:
+                    self._count("misses")
+                    return None
+                if row.created_at + datetime.timedelta(seconds=self.ttl_s) < now:
+                    connection.execute(delete(cache).where(cache.c.cache_key == cache_key))
+                    self._count("expired")
+                    self._count("misses")
+                    return None
+                connection.execute(
+                    cache.update().where(cache.c.cache_key == cache_key).values(last_used_at=now, hits=cache.c.hits + 1)
+                )
+        except Exception as e:
+            LOGGER.error("Extraction result cache lookup failed: %s", e, exc_info=True)
+            self._count("errors")
+            return None
+        self._count("hits")
+        return row.result
+
+    def put(self, cache_key: str, video_gcs_uri: str, model_name: str, result: str) -> None:
+        cache = extraction_result_cache_table
+        now = _utcnow()
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(delete(cache).where(cache.c.cache_key == cache_key))
+                connection.execute(cache.insert().values(
+                    cache_key=cache_key, video_gcs_uri=video_gcs_uri, model_name=model_name,
+                    created_at=now, last_used_at=now, hits=0, result=result,
+                ))
+                evicted = self._evict(connection, now)
+        except Exception as e:
+            LOGGER.error("Extraction result cache store failed: %s", e, exc_info=True)
+            self._count("errors")
+            return
+        self._count("stored")
+        self._count("evictions", evicted)
+
+    def _evict(self, connection, now: datetime.datetime) -> int:
+        """Drops expired entries, then the least recently used ones beyond max_entries."""
+        cache = extraction_result_cache_table
+        expired = connection.execute(
+            delete(cache).where(cache.c.created_at < now - datetime.timedelta(seconds=self.ttl_s))
+        ).rowcount
+        overflow = connection.execute(select(func.count()).select_from(cache)).scalar_one() - self.max_entries
+        if overflow <= 0:
+            return expired
+        oldest = select(cache.c.cache_key).order_by(cache.c.last_used_at).limit(overflow).scalar_subquery()
+        return expired + connection.execute(delete(cache).where(cache.c.cache_key.in_(oldest))).rowcount
+
+    def record_bypass(self) -> None:
+        self._count("bypassed")
+
+    def clear(self) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(delete(extraction_result_cache_table))
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self.engine.connect() as connection:
+                entries = connection.execute(select(func.count()).select_from(extraction_result_cache_table)).scalar_one()
+        except Exception as e:
+            LOGGER.error("Could not count extraction result cache entries: %s", e)
+            entries = None
+        with self._counters_lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_ratio": self._counters["hits"] / lookups if lookups else 0.0,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+            }
+
+
+EXTRACTION_RESULT_CACHE = ExtractionResultCache(
+    SETTINGS.extraction_result_cache_db_url,
+    ttl_s=SETTINGS.extraction_result_cache_ttl_s,
+    max_entries=SETTINGS.extraction_result_cache_max_entries,
+)
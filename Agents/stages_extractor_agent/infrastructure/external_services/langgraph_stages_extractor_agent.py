@@ -1,71 +1,95 @@
-import json
-from typing import Union
+import functools
+import os
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 from langgraph.prebuilt import create_react_agent
 from langchain.chat_models import init_chat_model
+from core.agent_registry import AGENT_REGISTRY
+from core.agent_streaming import stream_agent_run
 from core.logger import LOGGER
+from core.output_parsing import to_response_model
+from core.prompt_registry import PROMPT_REGISTRY, Prompt
 from agents.stages_extractor_agent.domain.schemas import (QueryRequest, StagesExtractorAgentResponse)
-from agents.stages_extractor_agent.infrastructure.tools.stages_extract_agent_tools import process_video
+from agents.stages_extractor_agent.infrastructure.tools.stages_extract_agent_tools import PROMPT_NAMESPACE, STAGES_EXTRACT_AGENT_TOOLS
                
 
 class LangGraphStagesExtractorAgent:
 
-    def _deep_json_eval(self, data):
-        if isinstance(data, dict):
-            return {k: self._deep_json_eval(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._deep_json_eval(item) for item in data]
-        elif isinstance(data, str):
-            try:
-                parsed = json.loads(data)
-                return self._deep_json_eval(parsed)
-            except (json.JSONDecodeError, TypeError):
-                return data
-        else:
-            return data
+    model_name = "gemini-2.5-flash"
+    model_provider = "google_genai"
+    temperature = 0
+    prompt_name = "agent_prompt" # default variant, overridden per request by QueryRequest.prompt_variant
 
-    def invoke_agent(self, request: QueryRequest) -> StagesExtractorAgentResponse:
-        model = init_chat_model("gemini-2.5-flash", model_provider="google_genai", temperature=0)
+    def __init__(self):
+        AGENT_REGISTRY.register("stages_extract_agent", self._build_agent, self._fingerprint)
 
-        file_path = 'agents/stages_extractor_agent/infrastructure/prompts/agent_prompt.txt'
+    def get_prompt(self, prompt_variant: Optional[str] = None) -> Prompt:
+        """Returns the loaded prompt; raises KeyError for an unknown variant."""
+        return PROMPT_REGISTRY.get(PROMPT_NAMESPACE, prompt_variant or self.prompt_name)
 
+    def _fingerprint(self, prompt_variant: Optional[str] = None):
+        return (self.model_name, self.model_provider, self.temperature, self.get_prompt(prompt_variant).version)
 
-        try:
-            with open(file_path, 'r') as file:
-                prompt_content = file.read()
-            LOGGER.info(f"Prompt imported successfully:\n{prompt_content}")
-        except FileNotFoundError:
-            LOGGER.error(f"Prompt file not found: {file_path}")
-            raise Exception(f"Prompt file not found: {file_path}")
-        except Exception as e:
-            LOGGER.error(f"Error reading prompt file: {e}")
-            raise Exception(f"Error reading prompt file: {e}")
+    def _build_agent(self, prompt_variant: Optional[str] = None):
+        model = init_chat_model(self.model_name, model_provider=self.model_provider, temperature=self.temperature)
 
-        stages_extract_agent = create_react_agent(
+        return create_react_agent(
             model=model,
-            tools=[process_video],
-            prompt=prompt_content,
+            tools=STAGES_EXTRACT_AGENT_TOOLS,
+            prompt=self.get_prompt(prompt_variant).content,
             name="stages_extract_agent",
         )
 
+    def _get_agent(self, prompt_variant: Optional[str]) -> Tuple[Any, Prompt]:
+        """Compiled agent for the prompt variant (each variant is compiled once) and its prompt."""
+        prompt = self.get_prompt(prompt_variant)
+        if prompt.name == self.prompt_name:
+            return AGENT_REGISTRY.get("stages_extract_agent"), prompt
+        agent_name = f"stages_extract_agent:{prompt.name}"
+        AGENT_REGISTRY.register(
+            agent_name,
+            functools.partial(self._build_agent, prompt.name),
+            functools.partial(self._fingerprint, prompt.name),
+            replace=False,
+        )
+        return AGENT_REGISTRY.get(agent_name), prompt
+
+    @staticmethod
+    def _run_config(prompt: Prompt) -> Dict[str, Any]:
+        # Lets traces be grouped and compared per prompt version
+        return {"metadata": {"prompt_version": prompt.version}}
+
+    def _parse_response(self, response) -> StagesExtractorAgentResponse:
+        return to_response_model(response['messages'][-1].content, StagesExtractorAgentResponse)
+
+    def invoke_agent(self, request: QueryRequest) -> StagesExtractorAgentResponse:
+        stages_extract_agent, prompt = self._get_agent(request.prompt_variant)
+
         response = stages_extract_agent.invoke({
             "messages": [{"role": "user", "content": request.query}]
-        })
+        }, config=self._run_config(prompt))
+
+        return self._parse_response(response)
 
-        raw_response = response['messages'][-1].content
+    async def ainvoke_agent(self, request: QueryRequest) -> StagesExtractorAgentResponse:
+        stages_extract_agent, prompt = self._get_agent(request.prompt_variant)
+
+        response = await stages_extract_agent.ainvoke({
+            "messages": [{"role": "user", "content": request.query}]
+        }, config=self._run_config(prompt))
 
-        # Clean up formatting artifacts
-        cleaned_response = raw_response.replace("json", "").replace("\n", "").replace("```", "").strip()
+        return self._parse_response(response)
 
-        # Try to parse as JSON or Python literal
-        parsed_response: Union[str, dict]
-        try:
-            # evaluated_response = ast.literal_eval(cleaned_response)
-            # parsed_response = self._deep_json_eval(evaluated_response)
-            parsed_response = self._deep_json_eval(cleaned_response)
-        except (ValueError, SyntaxError):
-            parsed_response = cleaned_response  # Return as plain string
+    async def astream_agent(self, request: QueryRequest) -> AsyncIterator[str]:
+        """Same as ainvoke_agent, but yields the run as Server-Sent Events."""
+        stages_extract_agent, prompt = self._get_agent(request.prompt_variant)
 
-        return StagesExtractorAgentResponse(response=parsed_response)
+        async for frame in stream_agent_run(
+            stages_extract_agent,
+            {"messages": [{"role": "user", "content": request.query}]},
+            parse_final=self._parse_response,
+            config=self._run_config(prompt),
+        ):
+            yield frame
 
     
 LANGGRAPH_STAGES_EXTRACT_AGENT = LangGraphStagesExtractorAgent()
@@ -0,0 +1,64 @@
+"""
+Local stand-in for the multimodal extraction model.
+
+Enabled with STAGES_EXTRACT_USE_STUB_MODEL=true, so the extraction job
+pipeline (queue, workers, retries, deadlines, segments) can be exercised
+without Vertex AI. The answer is derived from the media part only:
+- a URI containing "stub-fail" makes every call raise;
+- a URI containing "stub-slow" waits 10x the configured delay.
+"""
+
+import asyncio
+import json
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+
+class StubVideoModel:
+
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+
+    @staticmethod
+    def _media_part(messages) -> dict:
+        for message in messages:
+            if isinstance(message, HumanMessage) and isinstance(message.content, list):
+                for part in message.content:
+                    if isinstance(part, dict) and part.get("type") == "media":
+                        return part
+        return {}
+
+    def _delay_for(self, video_uri: str) -> float:
+        return self.delay_s * 10 if "stub-slow" in video_uri else self.delay_s
+
+    @staticmethod
+    def _answer(media_part: dict) -> AIMessage:
+        video_uri = media_part.get("file_uri", "")
+        if "stub-fail" in video_uri:
+            raise RuntimeError(f"Stub model failure for {video_uri}")
+        # A segment request gets a step naming its window
+        start_s = media_part.get("video_metadata", {}).get("start_offset", {}).get("seconds", 0)
+        return AIMessage(content=json.dumps({
+            "process_title": f"Stub process for {video_uri}",
+            "video_analysis_summary": "Generated by the local stub model.",
+            "stages": [
+                {
+                    "stage_number": 1,
+                    "stage_name": "Stub stage",
+                    "stage_description": "Placeholder stage produced without calling the model.",
+                    "steps": [f"Step 1.1: Placeholder step at {start_s}s."],
+                }
+            ],
+            "completeness_check": "Stub output.",
+        }))
+
+    def invoke(self, messages) -> AIMessage:
+        media_part = self._media_part(messages)
+        time.sleep(self._delay_for(media_part.get("file_uri", "")))
+        return self._answer(media_part)
+
+    async def ainvoke(self, messages) -> AIMessage:
+        media_part = self._media_part(messages)
+        await asyncio.sleep(self._delay_for(media_part.get("file_uri", "")))
+        return self._answer(media_part)
@@ -0,0 +1,85 @@
+"""
+Batch stage extraction streamed as Server-Sent Events.
+
+Every video of the batch runs through extract_stages (so the result cache
+applies), at most `max_concurrency` at a time and each under its own
+deadline. Results are sent in completion order, not request order; a failed
+or timed-out video is reported as its own "result" event and does not stop
+the others.
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator
+
+from core.agent_streaming import SSE_KEEPALIVE_INTERVAL_S, sse_event
+from core.logger import LOGGER
+from core.settings import SETTINGS
+from agents.stages_extractor_agent.domain.schemas import (ExtractionJobStatusEnum,
+                                                          StagesExtractBatchItemResult,
+                                                          StagesExtractBatchRequest,
+                                                          StagesExtractInputDetails)
+from agents.stages_extractor_agent.infrastructure.tools.stages_extract_agent_tools import aextract_stages, parse_extraction_output
+
+
+async def _extract_one(index: int, request: StagesExtractInputDetails, semaphore: asyncio.Semaphore,
+                       deadline_s: float) -> StagesExtractBatchItemResult:
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            raw_output = await asyncio.wait_for(aextract_stages(request), timeout=deadline_s)
+            response = parse_extraction_output(raw_output)
+        except asyncio.TimeoutError:
+            error = f"Deadline of {deadline_s}s exceeded"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            return StagesExtractBatchItemResult(
+                index=index, video_gcs_uri=request.video_gcs_uri, status=ExtractionJobStatusEnum.SUCCEEDED,
+                response=response, elapsed_s=round(time.perf_counter() - started, 3),
+            )
+
+    LOGGER.warning("Batch extraction of %s failed: %s", request.video_gcs_uri, error)
+    return StagesExtractBatchItemResult(
+        index=index, video_gcs_uri=request.video_gcs_uri, status=ExtractionJobStatusEnum.FAILED,
+        error=error, elapsed_s=round(time.perf_counter() - started, 3),
+    )
+
+
+async def astream_batch_extraction(request: StagesExtractBatchRequest) -> AsyncIterator[str]:
+    """Yields SSE frames: start, one result per video as it completes, then done."""
+    max_concurrency = min(request.max_concurrency or SETTINGS.extraction_batch_max_concurrency,
+                          SETTINGS.extraction_batch_max_concurrency)
+    deadline_s = request.deadline_s or SETTINGS.extraction_job_deadline_s
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    yield sse_event("start", {"total": len(request.video_gcs_uris), "max_concurrency": max_concurrency, "deadline_s": deadline_s})
+
+    pending = {
+        asyncio.create_task(_extract_one(
+            index, StagesExtractInputDetails(video_gcs_uri=video_gcs_uri, bypass_cache=request.bypass_cache), semaphore, deadline_s,
+        ))
+        for index, video_gcs_uri in enumerate(request.video_gcs_uris)
+    }
+    started = time.perf_counter()
+    succeeded = failed = 0
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=SSE_KEEPALIVE_INTERVAL_S, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                yield ": keep-alive\n\n"
+                continue
+            for task in done:
+                result = task.result()
+                if result.status == ExtractionJobStatusEnum.SUCCEEDED:
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield sse_event("result", result)
+    finally:
+        # The client went away: stop the videos that are still running or waiting
+        for task in pending:
+            task.cancel()
+
+    LOGGER.info("Batch extraction finished: %s succeeded, %s failed", succeeded, failed)
+    yield sse_event("done", {"succeeded": succeeded, "failed": failed, "elapsed_s": round(time.perf_counter() - started, 3)})
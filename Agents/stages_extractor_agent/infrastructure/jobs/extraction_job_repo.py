@@ -0,0 +1,164 @@
+"""
+Persistent state of the video extraction jobs (SQLite locally, Postgres in production).
+"""
+
+import datetime
+import uuid
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import Engine
+
+from core.logger import LOGGER
+from agents.stages_extractor_agent.domain.extraction_job_entity import extraction_jobs_table, metadata
+from agents.stages_extractor_agent.domain.schemas import ExtractionJobStatusEnum, StagesExtractInputDetails
+
+# Extra time a running job gets past its deadline before it is considered lost (worker crashed)
+LOST_JOB_GRACE_S = 60.0
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class ExtractionJobRepo:
+    """
+    Job table access. Every method is its own short transaction; claiming a job
+    is a conditional UPDATE, so several workers (or processes sharing Postgres)
+    never run the same attempt twice.
+    """
+
+    def __init__(self, db_url: str):
+        self.db_url = db_url
+        self._engine: Optional[Engine] = None
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            connect_args = {"check_same_thread": False, "timeout": 30} if self.db_url.startswith("sqlite") else {}
+            self._engine = create_engine(self.db_url, connect_args=connect_args, pool_pre_ping=True)
+        return self._engine
+
+    def ensure_table(self) -> None:
+        metadata.create_all(self.engine, tables=[extraction_jobs_table])
+
+    def create_job(self, request: StagesExtractInputDetails, max_attempts: int, deadline_s: float) -> Dict[str, Any]:
+        now = _utcnow()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "status": ExtractionJobStatusEnum.QUEUED.value,
+            "request_json": request.model_dump_json(),
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "deadline_s": deadline_s,
+            "available_at": now,
+            "created_at": now,
+        }
+        with self.engine.begin() as connection:
+            connection.execute(extraction_jobs_table.insert().values(**job))
+        LOGGER.info("Queued extraction job %s for %s", job['job_id'], request.video_gcs_uri)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as connection:
+            row = connection.execute(extraction_jobs_table.select().where(extraction_jobs_table.c.job_id == job_id)).fetchone()
+        return dict(row._mapping) if row else None
+
+    def claim_next_job(self) -> Optional[Dict[str, Any]]:
+        """Moves the oldest runnable queued job to running and returns it, or None."""
+        jobs = extraction_jobs_table
+        now = _utcnow()
+        with self.engine.begin() as connection:
+            row = connection.execute(
+                select(jobs.c.job_id)
+                .where(jobs.c.status == ExtractionJobStatusEnum.QUEUED.value, jobs.c.available_at <= now)
+                .order_by(jobs.c.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = connection.execute(
+                jobs.update()
+                .where(jobs.c.job_id == row.job_id, jobs.c.status == ExtractionJobStatusEnum.QUEUED.value)
+                .values(status=ExtractionJobStatusEnum.RUNNING.value, attempts=jobs.c.attempts + 1, started_at=now, error=None)
+            )
+            if claimed.rowcount != 1:
+                # Another worker claimed it first
+                return None
+            job = connection.execute(jobs.select().where(jobs.c.job_id == row.job_id)).fetchone()
+        return dict(job._mapping)
+
+    def _current_status(self, connection, job_id: str) -> Optional[str]:
+        jobs = extraction_jobs_table
+        return connection.execute(select(jobs.c.status).where(jobs.c.job_id == job_id)).scalar()
+
+    def mark_succeeded(self, job_id: str, result: str) -> Optional[str]:
+        """Stores the result of a running job. Returns the job's status afterwards (None if the job is gone)."""
+        jobs = extraction_jobs_table
+        with self.engine.begin() as connection:
+            updated = connection.execute(
+                jobs.update()
+                .where(jobs.c.job_id == job_id, jobs.c.status == ExtractionJobStatusEnum.RUNNING.value)
+                .values(status=ExtractionJobStatusEnum.SUCCEEDED.value, result=result, error=None, finished_at=_utcnow())
+            )
+            if updated.rowcount == 0:
+                # The job was requeued or finished by someone else (e.g. requeue_lost_jobs) meanwhile
+                status = self._current_status(connection, job_id)
+                LOGGER.warning("Extraction job %s is no longer running (%s); result discarded", job_id, status)
+                return status
+        return ExtractionJobStatusEnum.SUCCEEDED.value
+
+    def mark_attempt_failed(self, job_id: str, error: str, retry_backoff_s: float, permanent: bool = False) -> Optional[str]:
+        """
+        Requeues the running job with a linear backoff, or fails it once it is out of
+        attempts (or right away when permanent). Returns the job's status afterwards.
+        """
+        jobs = extraction_jobs_table
+        now = _utcnow()
+        with self.engine.begin() as connection:
+            job = connection.execute(select(jobs.c.attempts, jobs.c.max_attempts).where(jobs.c.job_id == job_id)).fetchone()
+            if job is None:
+                return None
+            if job.attempts < job.max_attempts and not permanent:
+                status = ExtractionJobStatusEnum.QUEUED.value
+                values = {"available_at": now + datetime.timedelta(seconds=retry_backoff_s * job.attempts)}
+            else:
+                status = ExtractionJobStatusEnum.FAILED.value
+                values = {"finished_at": now}
+            updated = connection.execute(
+                jobs.update()
+                .where(jobs.c.job_id == job_id, jobs.c.status == ExtractionJobStatusEnum.RUNNING.value)
+                .values(status=status, error=error, **values)
+            )
+            if updated.rowcount == 0:
+                status = self._current_status(connection, job_id)
+                LOGGER.warning("Extraction job %s is no longer running (%s); failure not recorded", job_id, status)
+        return status
+
+    def release_job(self, job_id: str) -> None:
+        """Puts a job interrupted by shutdown back in the queue, without counting the attempt."""
+        jobs = extraction_jobs_table
+        with self.engine.begin() as connection:
+            connection.execute(
+                jobs.update()
+                .where(jobs.c.job_id == job_id, jobs.c.status == ExtractionJobStatusEnum.RUNNING.value)
+                .values(status=ExtractionJobStatusEnum.QUEUED.value, attempts=jobs.c.attempts - 1, available_at=_utcnow())
+            )
+
+    def requeue_lost_jobs(self, retry_backoff_s: float) -> int:
+        """Jobs still running well past their deadline belong to a worker that died; retry or fail them."""
+        jobs = extraction_jobs_table
+        now = _utcnow()
+        with self.engine.connect() as connection:
+            running = connection.execute(
+                select(jobs.c.job_id, jobs.c.started_at, jobs.c.deadline_s).where(jobs.c.status == ExtractionJobStatusEnum.RUNNING.value)
+            ).fetchall()
+        lost = [
+            row.job_id for row in running
+            if row.started_at is not None and row.started_at + datetime.timedelta(seconds=row.deadline_s + LOST_JOB_GRACE_S) < now
+        ]
+        for job_id in lost:
+            LOGGER.warning("Extraction job %s was lost by its worker, retrying", job_id)
+            self.mark_attempt_failed(job_id, "Worker lost while running the job", retry_backoff_s)
+        return len(lost)
@@ -0,0 +1,135 @@
+"""
+Background worker pool that runs the queued video extraction jobs.
+
+The pool is a bounded number of worker tasks started on the application's
+event loop (from the FastAPI lifespan), the same loop that serves the
+extraction endpoints: the model's async client is bound to the loop that first
+uses it, so it must never be shared with a second loop. Each attempt is an
+async model call wrapped in asyncio.wait_for, so the per-job deadline really
+cancels it. Job state lives in ExtractionJobRepo, which lets several processes
+share one Postgres queue.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from core.logger import CORRELATION_ID, LOGGER
+from core.settings import SETTINGS
+from agents.stages_extractor_agent.domain.schemas import ExtractionJobStatusEnum, StagesExtractInputDetails
+from agents.stages_extractor_agent.infrastructure.jobs.extraction_job_repo import ExtractionJobRepo
+from agents.stages_extractor_agent.infrastructure.tools.stages_extract_agent_tools import aextract_stages
+
+
+class ExtractionWorkerPool:
+
+    def __init__(self, repo: ExtractionJobRepo, workers: int):
+        self.repo = repo
+        self.workers = workers
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        # Loop time of the last lost-job sweep, shared so any idle worker can run the next one
+        self._lost_jobs_checked_at = float("-inf")
+
+    def start(self) -> None:
+        """Starts the worker tasks on the running event loop; call it from the application lifespan."""
+        if any(not task.done() for task in self._tasks):
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(index), name=f"extraction-worker-{index}") for index in range(self.workers)]
+        LOGGER.info("Started %s extraction workers", self.workers)
+
+    async def stop(self) -> None:
+        if not self._tasks:
+            return
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        LOGGER.info("Stopped extraction workers")
+
+    def notify(self) -> None:
+        """Wakes an idle worker; called after a job is submitted (from any thread)."""
+        if self._loop is not None and self._wake is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(self.repo.claim_next_job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                LOGGER.error("Extraction worker %s could not claim a job: %s", index, e, exc_info=True)
+                job = None
+
+            if job is None:
+                await self._idle()
+                continue
+            try:
+                await self._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Bookkeeping failed (database down...); the job is left running and
+                # requeue_lost_jobs picks it up once it is past its deadline
+                LOGGER.error("Extraction worker %s could not record job %s: %s", index, job["job_id"], e, exc_info=True)
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=SETTINGS.extraction_job_poll_interval_s)
+            self._wake.clear()
+        except asyncio.TimeoutError:
+            await self._requeue_lost_jobs()
+
+    async def _requeue_lost_jobs(self) -> None:
+        """Runs the lost-job sweep at most once per poll interval, from whichever worker is idle."""
+        now = self._loop.time()
+        if now - self._lost_jobs_checked_at < SETTINGS.extraction_job_poll_interval_s:
+            return
+        self._lost_jobs_checked_at = now
+        try:
+            await asyncio.to_thread(self.repo.requeue_lost_jobs, SETTINGS.extraction_job_retry_backoff_s)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LOGGER.error("Could not requeue lost extraction jobs: %s", e, exc_info=True)
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        job_id = job["job_id"]
+        # Each worker is its own task, so this only tags the records of this job
+        CORRELATION_ID.set(job_id)
+        try:
+            request = StagesExtractInputDetails.model_validate_json(job["request_json"])
+        except ValueError as e:
+            # Retrying cannot fix a malformed request
+            error = f"Invalid request: {e}"
+            status = await asyncio.to_thread(self.repo.mark_attempt_failed, job_id, error, SETTINGS.extraction_job_retry_backoff_s, True)
+            LOGGER.error("Extraction job %s has an invalid request; job is now %s", job_id, status)
+            return
+
+        LOGGER.info("Running extraction job %s (attempt %s/%s)", job_id, job['attempts'], job['max_attempts'])
+        try:
+            result = await asyncio.wait_for(aextract_stages(request), timeout=job["deadline_s"])
+        except asyncio.TimeoutError:
+            error = f"Deadline of {job['deadline_s']}s exceeded"
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back without counting this attempt
+            await asyncio.shield(asyncio.to_thread(self.repo.release_job, job_id))
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            status = await asyncio.to_thread(self.repo.mark_succeeded, job_id, result)
+            if status == ExtractionJobStatusEnum.SUCCEEDED.value:
+                LOGGER.info("Extraction job %s succeeded", job_id)
+            return
+
+        status = await asyncio.to_thread(self.repo.mark_attempt_failed, job_id, error, SETTINGS.extraction_job_retry_backoff_s)
+        log = LOGGER.warning if status == ExtractionJobStatusEnum.QUEUED.value else LOGGER.error
+        log("Extraction job %s attempt %s failed (%s); job is now %s", job_id, job["attempts"], error, status)
+
+EXTRACTION_JOB_REPO = ExtractionJobRepo(SETTINGS.extraction_jobs_db_url)
+EXTRACTION_WORKER_POOL = ExtractionWorkerPool(EXTRACTION_JOB_REPO, workers=SETTINGS.extraction_workers)
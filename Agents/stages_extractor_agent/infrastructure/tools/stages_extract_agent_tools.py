@@ -1,46 +1,319 @@
+import asyncio
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain_google_vertexai import ChatVertexAI
 from langchain_core.messages import HumanMessage
+from langchain_core.tools import StructuredTool
+from pydantic import ValidationError
 from dotenv import load_dotenv
 
-from agents.stages_extractor_agent.domain.schemas import StagesExtractInputDetails
+from agents.stages_extractor_agent.domain.schemas import StagesExtractInputDetails, StagesExtractorAgentResponse, StagesWorkflow
+from agents.stages_extractor_agent.infrastructure.cache.extraction_result_cache import EXTRACTION_RESULT_CACHE, make_cache_key
+from agents.stages_extractor_agent.infrastructure.external_services.stub_video_model import StubVideoModel
+from agents.stages_extractor_agent.infrastructure.tools.video_segments import (VideoSegment,
+                                                                               check_video_uri,
+                                                                               is_local_video,
+                                                                               local_video_path,
+                                                                               merge_segment_workflows,
+                                                                               plan_segments,
+                                                                               probe_local_duration,
+                                                                               segment_media_part,
+                                                                               segment_prompt,
+                                                                               split_local_video)
 from core.logger import LOGGER
+from core.output_parsing import parse_model_output
+from core.prompt_registry import PROMPT_REGISTRY
+from core.settings import SETTINGS
 
 load_dotenv()
 
+MODEL_NAME = "gemini-2.0-flash-001"
+TEMPERATURE = 0.3
+MAX_OUTPUT_TOKENS = 2000
+VIDEO_MIME_TYPE = "video/mp4"
+PROMPT_NAMESPACE = "stages_extractor_agent"
+EXTRACTION_PROMPT_NAME = "stages_extract_tool_prompt" # default variant, overridden by StagesExtractInputDetails.prompt_variant
+
+PROMPT_REGISTRY.register_directory(PROMPT_NAMESPACE, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts"))
+
 # Global variables for model initialization to optimize cold starts
 # These are initialized once per function instance
 model = None
+storage_client = None
+# ChatVertexAI creates its grpc.aio client on first async use and keeps it on the
+# instance, bound to that event loop: async callers get one model per loop
+_loop_models: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_model_lock = threading.Lock()
+
+def _create_model():
+    if SETTINGS.stages_extract_use_stub_model:
+        LOGGER.info("Stub video model initialized")
+        return StubVideoModel(delay_s=SETTINGS.stages_extract_stub_delay_s)
+    LOGGER.info("Vertex AI Model Initialized")
+    return ChatVertexAI(
+        model_name=MODEL_NAME,
+        temperature=TEMPERATURE,
+        max_output_tokens=MAX_OUTPUT_TOKENS,
+        # JSON mode: the answer is bare JSON, no fence or prose to strip
+        response_mime_type="application/json",
+        )
 
 def get_model():
     """Initializes Vertex AI and the GenerativeModel.
-    This function should be called once per instance to reduce cold start latency.
+    Sync callers share one instance; inside a running event loop the instance of that loop is returned.
     """
     global model
-    if model is None:
-        model = ChatVertexAI(
-            model_name="gemini-2.0-flash-001",
-            temperature=0.3,
-            max_output_tokens=2000,
-            )
-        LOGGER.info(f"Vertex AI Model Initialized")
-    return model
-
-def get_prompt():
-        
-        file_path = 'agents/stages_extractor_agent/infrastructure/prompts/stages_extract_tool_prompt.txt'
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _model_lock:
+        if loop is None:
+            if model is None:
+                model = _create_model()
+            return model
+        loop_model = _loop_models.get(loop)
+        if loop_model is None:
+            loop_model = _loop_models[loop] = _create_model()
+        return loop_model
+
+def get_prompt(prompt_variant: Optional[str] = None) -> str:
+    """Returns the extraction prompt (loaded once, reloaded when the file changes)."""
+    return PROMPT_REGISTRY.get(PROMPT_NAMESPACE, prompt_variant or EXTRACTION_PROMPT_NAME).content
+
+def get_video_generation(video_gcs_uri: str) -> Optional[str]:
+    """Returns the generation of the GCS object (modification time of a local file), so a re-uploaded
+    video is not served a stale cached result. None when the lookup is disabled or fails."""
+    global storage_client
+    if not SETTINGS.extraction_result_cache_resolve_generation:
+        return None
+    if is_local_video(video_gcs_uri):
+        try:
+            return str(os.stat(local_video_path(video_gcs_uri, SETTINGS.stages_extract_local_video_root)).st_mtime_ns)
+        except (OSError, ValueError):
+            return None
+    if not video_gcs_uri.startswith("gs://"):
+        return None
+    try:
+        from google.cloud import storage
+    except ImportError:
+        return None
+    try:
+        if storage_client is None:
+            storage_client = storage.Client()
+        bucket_name, _, blob_name = video_gcs_uri[len("gs://"):].partition("/")
+        blob = storage_client.bucket(bucket_name).get_blob(blob_name)
+        return str(blob.generation) if blob is not None else None
+    except Exception as e:
+        LOGGER.warning("Could not read the generation of %s: %s", video_gcs_uri, e)
+        return None
+
+def _model_name() -> str:
+    return "stub" if SETTINGS.stages_extract_use_stub_model else MODEL_NAME
+
+def _cache_key(request: StagesExtractInputDetails, prompt: str) -> Optional[str]:
+    """Key of the cached result for this request, or None when the cache is not used."""
+    if not SETTINGS.extraction_result_cache_enabled:
+        return None
+    video_generation = request.video_generation or get_video_generation(request.video_gcs_uri)
+    return make_cache_key(request.video_gcs_uri, video_generation, prompt, _model_name(), TEMPERATURE, MAX_OUTPUT_TOKENS)
+
+def _cached_result(request: StagesExtractInputDetails, prompt: str) -> Tuple[Optional[str], Optional[str]]:
+    """Returns (cached result or None, cache key to store the fresh result under)."""
+    cache_key = _cache_key(request, prompt)
+    if cache_key is None:
+        return None, None
+    if request.bypass_cache:
+        EXTRACTION_RESULT_CACHE.record_bypass()
+        return None, cache_key
+    cached = EXTRACTION_RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        LOGGER.info("Returning the cached stages for %s", request.video_gcs_uri)
+    return cached, cache_key
+
+def _video_part(request: StagesExtractInputDetails) -> Dict[str, Any]:
+    return {
+        "type": "media",
+        "file_uri": request.video_gcs_uri,
+        "mime_type": VIDEO_MIME_TYPE,}
 
+def _build_video_message(video_part: Dict[str, Any], prompt: str) -> HumanMessage:
+    text_part = {
+        "type": "text",
+        "text": prompt
+        }
+    
+    return HumanMessage(
+        content=[video_part, text_part]
+        )
+
+def _extract_part(request: StagesExtractInputDetails, prompt: str, video_part: Dict[str, Any]) -> str:
+    """One model call for the video part, served from (and stored in) the persistent extraction result cache."""
+    cached, cache_key = _cached_result(request, prompt)
+    if cached is not None:
+        return cached
+    LLM = get_model()
+    response = LLM.invoke([_build_video_message(video_part, prompt)])
+    LOGGER.info("Successfully generated the stages from provided video.")
+    result = str(response.content)
+    if cache_key is not None:
+        EXTRACTION_RESULT_CACHE.put(cache_key, request.video_gcs_uri, _model_name(), result)
+    return result
+
+async def _aextract_part(request: StagesExtractInputDetails, prompt: str, video_part: Dict[str, Any]) -> str:
+    """Async variant of _extract_part."""
+    cached, cache_key = await asyncio.to_thread(_cached_result, request, prompt)
+    if cached is not None:
+        return cached
+    LLM = get_model()
+    response = await LLM.ainvoke([_build_video_message(video_part, prompt)])
+    LOGGER.info("Successfully generated the stages from provided video.")
+    result = str(response.content)
+    if cache_key is not None:
+        await asyncio.to_thread(EXTRACTION_RESULT_CACHE.put, cache_key, request.video_gcs_uri, _model_name(), result)
+    return result
+
+def _segment_attempt_request(request: StagesExtractInputDetails, attempt: int) -> StagesExtractInputDetails:
+    # A retry must not be answered from the cache with the output that just failed to parse
+    return request if attempt == 1 else request.model_copy(update={"bypass_cache": True})
+
+def _segment_workflow(raw_output: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    workflow = parse_extraction_output(raw_output).response
+    if isinstance(workflow, dict):
+        return workflow, None
+    return None, "the output is not a JSON workflow"
+
+def _extract_segment(request: StagesExtractInputDetails, prompt: str, segment: VideoSegment,
+                     total: int) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Extracts one time window, retrying a failed attempt. Returns (workflow, None) or (None, error)."""
+    error = None
+    for attempt in range(1, SETTINGS.extraction_segment_max_attempts + 1):
         try:
-            with open(file_path, 'r') as file:
-                prompt_content = file.read()
-            LOGGER.info(f"Prompt imported successfully:\n{prompt_content}")
-            return prompt_content
-        except FileNotFoundError:
-            LOGGER.error(f"Prompt file not found: {file_path}")
-            raise Exception(f"Prompt file not found: {file_path}")
+            workflow, error = _segment_workflow(_extract_part(
+                _segment_attempt_request(request, attempt), segment_prompt(prompt, segment, total),
+                segment_media_part(request.video_gcs_uri, VIDEO_MIME_TYPE, segment),
+            ))
+            if workflow is not None:
+                return workflow, None
         except Exception as e:
-            LOGGER.error(f"Error reading prompt file: {e}")
-            raise Exception(f"Error reading prompt file: {e}")
+            error = f"{type(e).__name__}: {e}"
+        LOGGER.warning("Segment %s of %s failed (attempt %s): %s", segment.label, request.video_gcs_uri, attempt, error)
+    return None, error
+
+async def _aextract_segment(request: StagesExtractInputDetails, prompt: str, segment: VideoSegment, total: int,
+                            semaphore: asyncio.Semaphore) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Async variant of _extract_segment, at most `semaphore` segments at a time."""
+    error = None
+    async with semaphore:
+        for attempt in range(1, SETTINGS.extraction_segment_max_attempts + 1):
+            try:
+                workflow, error = _segment_workflow(await _aextract_part(
+                    _segment_attempt_request(request, attempt), segment_prompt(prompt, segment, total),
+                    segment_media_part(request.video_gcs_uri, VIDEO_MIME_TYPE, segment),
+                ))
+                if workflow is not None:
+                    return workflow, None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            LOGGER.warning("Segment %s of %s failed (attempt %s): %s", segment.label, request.video_gcs_uri, attempt, error)
+    return None, error
+
+def _plan_request_segments(request: StagesExtractInputDetails, duration_s: Optional[float]) -> Optional[List[VideoSegment]]:
+    """The windows to extract, or None when the video is extracted in one piece."""
+    if duration_s is None:
+        LOGGER.warning("Duration of %s is unknown, extracting it in one piece", request.video_gcs_uri)
+        return None
+    segments = plan_segments(duration_s, request.segment_length_s, SETTINGS.extraction_segment_max_count)
+    if len(segments) == 1:
+        return None
+    LOGGER.info("Extracting %s in %s segments", request.video_gcs_uri, len(segments))
+    return segments
+
+def _merge_segment_results(request: StagesExtractInputDetails, segments: List[VideoSegment],
+                           results: List[Tuple[Optional[Dict[str, Any]], Optional[str]]]) -> str:
+    workflows = [workflow for workflow, _ in results]
+    errors = [error for _, error in results]
+    if not any(workflows):
+        raise RuntimeError(f"Every segment of {request.video_gcs_uri} failed, last error: {errors[-1]}")
+    return json.dumps(merge_segment_workflows(workflows, segments, errors))
+
+def _extract_segmented(request: StagesExtractInputDetails) -> str:
+    """Extracts the video window by window on a thread pool and returns the merged workflow as JSON.
+    Sync callers never start an event loop: the async model client stays with the loop that created it."""
+    prompt = get_prompt(request.prompt_variant)
+    local = is_local_video(request.video_gcs_uri)
+    duration_s = request.video_duration_s
+    if duration_s is None and local:
+        duration_s = probe_local_duration(local_video_path(request.video_gcs_uri, SETTINGS.stages_extract_local_video_root))
+    segments = _plan_request_segments(request, duration_s)
+    if segments is None:
+        return _extract_part(request, prompt, _video_part(request))
+
+    with tempfile.TemporaryDirectory(prefix="video_segments_") as segments_dir:
+        if local:
+            split_local_video(local_video_path(request.video_gcs_uri, SETTINGS.stages_extract_local_video_root), segments, segments_dir)
+        with ThreadPoolExecutor(max_workers=SETTINGS.extraction_segment_max_concurrency,
+                                thread_name_prefix="video-segment") as executor:
+            # copy_context keeps the correlation id in the segment logs
+            results = list(executor.map(
+                lambda segment: contextvars.copy_context().run(_extract_segment, request, prompt, segment, len(segments)),
+                segments,
+            ))
+    return _merge_segment_results(request, segments, results)
+
+async def _aextract_segmented(request: StagesExtractInputDetails) -> str:
+    """Async variant of _extract_segmented: the windows are extracted concurrently on the event loop."""
+    prompt = get_prompt(request.prompt_variant)
+    local = is_local_video(request.video_gcs_uri)
+    duration_s = request.video_duration_s
+    if duration_s is None and local:
+        duration_s = await asyncio.to_thread(probe_local_duration, local_video_path(request.video_gcs_uri, SETTINGS.stages_extract_local_video_root))
+    segments = _plan_request_segments(request, duration_s)
+    if segments is None:
+        return await _aextract_part(request, prompt, _video_part(request))
+
+    semaphore = asyncio.Semaphore(SETTINGS.extraction_segment_max_concurrency)
+    with tempfile.TemporaryDirectory(prefix="video_segments_") as segments_dir:
+        if local:
+            await asyncio.to_thread(split_local_video, local_video_path(request.video_gcs_uri, SETTINGS.stages_extract_local_video_root), segments, segments_dir)
+        results = await asyncio.gather(*(
+            _aextract_segment(request, prompt, segment, len(segments), semaphore) for segment in segments
+        ))
+    return _merge_segment_results(request, segments, list(results))
+
+def extract_stages(request: StagesExtractInputDetails) -> str:
+    """Runs the extraction model on the video and returns its raw output. Errors are raised.
+    With segment_length_s set, the video is extracted in parallel time windows and merged.
+    A URI that is neither gs:// nor a file under the allowed local root raises ValueError."""
+    check_video_uri(request.video_gcs_uri, SETTINGS.stages_extract_local_video_root)
+    if request.segment_length_s is not None:
+        return _extract_segmented(request)
+    return _extract_part(request, get_prompt(request.prompt_variant), _video_part(request))
+
+async def aextract_stages(request: StagesExtractInputDetails) -> str:
+    """Async variant of extract_stages."""
+    check_video_uri(request.video_gcs_uri, SETTINGS.stages_extract_local_video_root)
+    if request.segment_length_s is not None:
+        return await _aextract_segmented(request)
+    return await _aextract_part(request, get_prompt(request.prompt_variant), _video_part(request))
+
+def parse_extraction_output(raw_output: str) -> StagesExtractorAgentResponse:
+    """Turns the raw extraction model output (JSON, possibly in a ``` fence) into the API response.
+    A workflow is validated against StagesWorkflow; one that does not fit is returned as parsed."""
+    parsed = parse_model_output(raw_output)
+    if isinstance(parsed, dict):
+        try:
+            parsed = StagesWorkflow.model_validate(parsed).model_dump()
+        except ValidationError as e:
+            LOGGER.warning("Extraction output does not match the workflow schema: %s", e)
+    return StagesExtractorAgentResponse(response=parsed)
 
 def process_video(request: StagesExtractInputDetails) -> str:
     """HTTP Cloud Function that processes a video GCS URI to extract workflow stages
@@ -53,28 +326,32 @@ def process_video(request: StagesExtractInputDetails) -> str:
         The extracted workflow as JSON, or an error message.
     """
     
-    video_mime_type = "video/mp4"
-    STAGE_GENERATION_PROMPT = get_prompt()
-    LLM = get_model()
+    try:
+        return extract_stages(request)
+    except Exception as e:
+        LOGGER.error("An error occurred during content generation: %s", e)
+        return f"Error during video processing: {e}"
+
+async def aprocess_video(request: StagesExtractInputDetails) -> str:
+    """HTTP Cloud Function that processes a video GCS URI to extract workflow stages
+    and steps using Gemini 2.0 Flash.
+
+    Args:
+        request (flask.Request): The request object. Expects a JSON payload
+                                 with 'video_gcs_uri'.
+    Returns:
+        The extracted workflow as JSON, or an error message.
+    """
 
-    video_part = {
-        "type": "media",
-        "file_uri": request.video_gcs_uri,
-        "mime_type": video_mime_type,}
-    
-    text_part = {
-        "type": "text",
-        "text": STAGE_GENERATION_PROMPT
-        }
-    
-    message = HumanMessage(
-        content=[video_part, text_part]
-        )
-    
     try:
-        response = LLM.invoke([message])
-        LOGGER.info(f"Successfully generated the stages from provided video.")
-        return str(response.content)
+        return await aextract_stages(request)
     except Exception as e:
-        LOGGER.error(f"An error occurred during content generation: {e}")
-        return f"Error during video processing: {e}"
\ No newline at end of file
+        LOGGER.error("An error occurred during content generation: %s", e)
+        return f"Error during video processing: {e}"
+
+
+# --- Tools exposed to the agent (sync + async implementations) ---
+
+STAGES_EXTRACT_AGENT_TOOLS = [
+    StructuredTool.from_function(func=process_video, coroutine=aprocess_video),
+]
@@ -0,0 +1,202 @@
+"""
+Helpers for the segmented extraction of long videos.
+
+A long video is cut into fixed time windows that are extracted in parallel:
+- GCS videos are never downloaded, each request carries the window as
+  `video_metadata` start/end offsets on the media part;
+- local files are cut with ffmpeg (stream copy, no re-encoding) and sent inline.
+  They are only accepted when STAGES_EXTRACT_LOCAL_VIDEO_ROOT is set, and
+  only under that directory: otherwise any caller could have the server
+  read an arbitrary file and send it to the model.
+The per-segment workflows are then merged into one ordered workflow: a stage
+cut by a window boundary (same stage name on both sides) is joined, repeated
+steps are dropped and stages/steps are renumbered.
+"""
+
+import math
+import os
+import re
+import shutil
+import subprocess
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from core.logger import LOGGER
+
+GCS_SCHEME = "gs://"
+LOCAL_SCHEME = "file://"
+STEP_NUMBER_PATTERN = re.compile(r"^\s*step\s*\d+(\.\d+)*\s*[:.\-)]\s*", re.IGNORECASE)
+
+SEGMENT_PROMPT_TEMPLATE = """
+
+##Segment:
+This request covers only the part of the video from {start} to {end} (segment {number} of {total}).
+Describe only the stages and steps visible in this time window; the rest of the video is analyzed separately.
+If an activity is already in progress when the window starts, keep the stage name it would have had from the beginning."""
+
+
+@dataclass
+class VideoSegment:
+    index: int
+    start_s: float
+    end_s: float
+    local_path: Optional[str] = None # set when the segment was cut to a local file
+
+    @property
+    def label(self) -> str:
+        return f"{format_timestamp(self.start_s)}-{format_timestamp(self.end_s)}"
+
+
+def format_timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def is_local_video(video_uri: str) -> bool:
+    return video_uri.startswith(LOCAL_SCHEME) or "://" not in video_uri
+
+
+def local_video_path(video_uri: str, allowed_root: str) -> str:
+    """
+    Real path of a local video (symlinks and '..' resolved). Raises ValueError
+    when local videos are disabled (empty `allowed_root`) or the file is outside it.
+    """
+    if not allowed_root:
+        raise ValueError(f"Local video files are not accepted, expected a {GCS_SCHEME} URI: {video_uri}")
+    root = os.path.realpath(allowed_root)
+    path = os.path.realpath(video_uri[len(LOCAL_SCHEME):] if video_uri.startswith(LOCAL_SCHEME) else video_uri)
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"Video file is outside of the allowed directory: {video_uri}")
+    return path
+
+
+def check_video_uri(video_uri: str, local_root: str) -> None:
+    """Raises ValueError unless the URI is a gs:// object, or a local file under `local_root`."""
+    if is_local_video(video_uri):
+        local_video_path(video_uri, local_root)
+    elif not video_uri.startswith(GCS_SCHEME):
+        raise ValueError(f"Unsupported video URI, expected a {GCS_SCHEME} URI: {video_uri}")
+
+
+def plan_segments(duration_s: float, segment_length_s: float, max_segments: int) -> List[VideoSegment]:
+    """Windows of `segment_length_s` covering the video; widened so there are at most `max_segments`."""
+    segment_length_s = max(segment_length_s, duration_s / max_segments)
+    count = max(1, math.ceil(duration_s / segment_length_s))
+    return [
+        VideoSegment(index=index, start_s=index * segment_length_s, end_s=min(duration_s, (index + 1) * segment_length_s))
+        for index in range(count)
+    ]
+
+
+def segment_prompt(prompt: str, segment: VideoSegment, total: int) -> str:
+    return prompt + SEGMENT_PROMPT_TEMPLATE.format(
+        start=format_timestamp(segment.start_s), end=format_timestamp(segment.end_s), number=segment.index + 1, total=total,
+    )
+
+
+def segment_media_part(video_uri: str, mime_type: str, segment: VideoSegment) -> Dict[str, Any]:
+    if segment.local_path is not None:
+        with open(segment.local_path, "rb") as file:
+            return {"type": "media", "data": file.read(), "mime_type": mime_type}
+    return {
+        "type": "media",
+        "file_uri": video_uri,
+        "mime_type": mime_type,
+        "video_metadata": {
+            "start_offset": {"seconds": int(segment.start_s)},
+            "end_offset": {"seconds": math.ceil(segment.end_s)},
+        },
+    }
+
+
+def probe_local_duration(path: str) -> Optional[float]:
+    """Duration of a local video with ffprobe, or None when ffprobe is missing or fails."""
+    if shutil.which("ffprobe") is None:
+        LOGGER.warning("ffprobe is not installed, cannot read the video duration")
+        return None
+    try:
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", path],
+            capture_output=True, text=True, check=True, timeout=60,
+        ).stdout
+        return float(output.strip())
+    except (subprocess.SubprocessError, ValueError) as e:
+        LOGGER.warning("Could not read the duration of %s: %s", path, e)
+        return None
+
+
+def split_local_video(path: str, segments: Sequence[VideoSegment], output_dir: str) -> None:
+    """Cuts each segment of a local video to its own file in `output_dir` and sets its `local_path`."""
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg is required to split local videos into segments")
+    extension = os.path.splitext(path)[1] or ".mp4"
+    for segment in segments:
+        segment_path = os.path.join(output_dir, f"segment_{segment.index:04d}{extension}")
+        subprocess.run(
+            ["ffmpeg", "-v", "error", "-y", "-ss", str(segment.start_s), "-i", path,
+             "-t", str(segment.end_s - segment.start_s), "-c", "copy", segment_path],
+            check=True, timeout=600,
+        )
+        segment.local_path = segment_path
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def _strip_step_number(step: str) -> str:
+    return STEP_NUMBER_PATTERN.sub("", step).strip()
+
+
+def merge_segment_workflows(workflows: Sequence[Optional[Dict[str, Any]]], segments: Sequence[VideoSegment],
+                            errors: Sequence[Optional[str]]) -> Dict[str, Any]:
+    """Merges the per-segment workflows (None for a failed segment) into one ordered workflow."""
+    process_title = None
+    summaries: List[str] = []
+    stages: List[Dict[str, Any]] = []
+
+    for workflow in workflows:
+        if not isinstance(workflow, dict):
+            continue
+        process_title = process_title or workflow.get("process_title")
+        summary = workflow.get("video_analysis_summary")
+        if isinstance(summary, str) and summary and summary not in summaries:
+            summaries.append(summary)
+
+        for stage in workflow.get("stages") or []:
+            if not isinstance(stage, dict):
+                continue
+            steps = [_strip_step_number(step) for step in stage.get("steps") or [] if isinstance(step, str)]
+            stage_name = str(stage.get("stage_name", ""))
+            if stages and _normalize(stages[-1]["stage_name"]) == _normalize(stage_name):
+                # The same stage on both sides of a window boundary
+                previous = stages[-1]
+            else:
+                previous = {"stage_name": stage_name, "stage_description": stage.get("stage_description", ""), "steps": []}
+                stages.append(previous)
+            seen = {_normalize(step) for step in previous["steps"]}
+            for step in steps:
+                if _normalize(step) not in seen:
+                    seen.add(_normalize(step))
+                    previous["steps"].append(step)
+
+    for stage_number, stage in enumerate(stages, start=1):
+        stage["stage_number"] = stage_number
+        stage["steps"] = [f"Step {stage_number}.{step_number}: {step}" for step_number, step in enumerate(stage["steps"], start=1)]
+
+    analyzed = sum(1 for workflow in workflows if isinstance(workflow, dict))
+    completeness_check = f"Merged from {analyzed} of {len(segments)} segments ({segments[0].label} to {segments[-1].label})."
+    missing = [f"{segment.label} ({error})" for segment, workflow, error in zip(segments, workflows, errors) if not isinstance(workflow, dict)]
+    if missing:
+        completeness_check += " Segments not analyzed: " + "; ".join(missing) + "."
+
+    return {
+        "process_title": process_title,
+        "video_analysis_summary": " ".join(summaries),
+        "stages": [
+            {"stage_number": stage["stage_number"], "stage_name": stage["stage_name"],
+             "stage_description": stage["stage_description"], "steps": stage["steps"]}
+            for stage in stages
+        ],
+        "completeness_check": completeness_check,
+    }
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException, status
+
+from core.settings import SETTINGS
+from agents.stages_extractor_agent.domain.schemas import (ExtractionJob,
+                                                          ExtractionJobStatusEnum,
+                                                          ExtractionJobSubmitRequest,
+                                                          StagesExtractInputDetails,
+                                                          StagesExtractorAgentResponse)
+from agents.stages_extractor_agent.infrastructure.jobs.extraction_worker import EXTRACTION_JOB_REPO, EXTRACTION_WORKER_POOL
+from agents.stages_extractor_agent.infrastructure.tools.stages_extract_agent_tools import get_prompt, parse_extraction_output
+from agents.stages_extractor_agent.infrastructure.tools.video_segments import check_video_uri
+
+EXTRACTION_JOBS_WEBHOOK = APIRouter()
+
+
+def _to_job_model(job: dict) -> ExtractionJob:
+    request = StagesExtractInputDetails.model_validate_json(job["request_json"])
+    return ExtractionJob(video_gcs_uri=request.video_gcs_uri, **job)
+
+
+def _get_job_or_404(job_id: str) -> dict:
+    job = EXTRACTION_JOB_REPO.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Extraction job {job_id} not found")
+    return job
+
+
+@EXTRACTION_JOBS_WEBHOOK.post("/extraction_jobs", response_model=ExtractionJob, status_code=status.HTTP_202_ACCEPTED)
+def submit_extraction_job(request: ExtractionJobSubmitRequest):
+    """
+    Queues a video stage extraction and returns immediately with the job id.
+    Poll GET /extraction_jobs/{job_id} and fetch the output from /extraction_jobs/{job_id}/result.
+    """
+    try:
+        get_prompt(request.prompt_variant)
+    except KeyError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e.args[0]))
+    try:
+        check_video_uri(request.video_gcs_uri, SETTINGS.stages_extract_local_video_root)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    job = EXTRACTION_JOB_REPO.create_job(
+        StagesExtractInputDetails(**request.model_dump(include=set(StagesExtractInputDetails.model_fields))),
+        max_attempts=request.max_attempts or SETTINGS.extraction_job_max_attempts,
+        deadline_s=request.deadline_s or SETTINGS.extraction_job_deadline_s,
+    )
+    EXTRACTION_WORKER_POOL.notify()
+    return _to_job_model(job)
+
+
+@EXTRACTION_JOBS_WEBHOOK.get("/extraction_jobs/{job_id}", response_model=ExtractionJob)
+def get_extraction_job(job_id: str):
+    return _to_job_model(_get_job_or_404(job_id))
+
+
+@EXTRACTION_JOBS_WEBHOOK.get("/extraction_jobs/{job_id}/result", response_model=StagesExtractorAgentResponse)
+def get_extraction_job_result(job_id: str):
+    """Returns the extracted stages; 409 while the job is still queued/running, 422 if it failed."""
+    job = _get_job_or_404(job_id)
+    if job["status"] == ExtractionJobStatusEnum.FAILED.value:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Extraction job failed: {job['error']}")
+    if job["status"] != ExtractionJobStatusEnum.SUCCEEDED.value:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Extraction job is {job['status']}")
+
+    return parse_extraction_output(job["result"])
@@ -1,15 +1,90 @@
 from dotenv import load_dotenv
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 
-from agents.stages_extractor_agent.domain.schemas import (QueryRequest, StagesExtractorAgentResponse)
+from core.agent_streaming import SSE_HEADERS
+from core.logger import LOGGER
+from core.settings import SETTINGS
+from agents.stages_extractor_agent.domain.schemas import (QueryRequest, StagesExtractBatchRequest, StagesExtractInputDetails, StagesExtractorAgentResponse)
+from agents.stages_extractor_agent.infrastructure.cache.extraction_result_cache import EXTRACTION_RESULT_CACHE
 from agents.stages_extractor_agent.infrastructure.external_services.langgraph_stages_extractor_agent import LANGGRAPH_STAGES_EXTRACT_AGENT
+from agents.stages_extractor_agent.infrastructure.jobs.batch_extraction import astream_batch_extraction
+from agents.stages_extractor_agent.infrastructure.tools.stages_extract_agent_tools import aextract_stages, get_prompt, parse_extraction_output
+from agents.stages_extractor_agent.infrastructure.tools.video_segments import check_video_uri
 
 load_dotenv()
 
 STAGES_EXTRACT_AGENT_WEBHOOK = APIRouter()
 
 
+def _validate_prompt_variant(request: QueryRequest | StagesExtractInputDetails) -> None:
+    try:
+        if isinstance(request, QueryRequest):
+            LANGGRAPH_STAGES_EXTRACT_AGENT.get_prompt(request.prompt_variant)
+        else:
+            get_prompt(request.prompt_variant)
+    except KeyError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e.args[0]))
+
+
+def _validate_video_uris(*video_uris: str) -> None:
+    try:
+        for video_uri in video_uris:
+            check_video_uri(video_uri, SETTINGS.stages_extract_local_video_root)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
 @STAGES_EXTRACT_AGENT_WEBHOOK.post("/invoke_stages_extract_agent", response_model=StagesExtractorAgentResponse)
-def invoke_agent(request: QueryRequest):
-    response = LANGGRAPH_STAGES_EXTRACT_AGENT.invoke_agent(request)
+async def invoke_agent(request: QueryRequest):
+    _validate_prompt_variant(request)
+    response = await LANGGRAPH_STAGES_EXTRACT_AGENT.ainvoke_agent(request)
     return response
+
+
+@STAGES_EXTRACT_AGENT_WEBHOOK.post("/extract_stages", response_model=StagesExtractorAgentResponse)
+async def extract_stages(request: StagesExtractInputDetails):
+    """
+    Structured extraction: runs the extraction model once on the given video,
+    without the agent's own LLM calls. Use /invoke_stages_extract_agent for free-text requests.
+    """
+    _validate_prompt_variant(request)
+    _validate_video_uris(request.video_gcs_uri)
+    try:
+        raw_output = await aextract_stages(request)
+    except Exception as e:
+        LOGGER.error("Stage extraction failed for %s: %s", request.video_gcs_uri, e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Error during video processing: {e}")
+    return parse_extraction_output(raw_output)
+
+
+@STAGES_EXTRACT_AGENT_WEBHOOK.post("/extract_stages/batch")
+async def extract_stages_batch(request: StagesExtractBatchRequest):
+    """
+    Extracts the stages of several videos concurrently and streams Server-Sent Events:
+    start, one result per video (StagesExtractBatchItemResult, in completion order) and done.
+    A failed video is reported in its own result event and does not stop the batch.
+    """
+    if len(request.video_gcs_uris) > SETTINGS.extraction_batch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"A batch can contain at most {SETTINGS.extraction_batch_max_items} videos",
+        )
+    _validate_video_uris(*request.video_gcs_uris)
+    return StreamingResponse(astream_batch_extraction(request), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@STAGES_EXTRACT_AGENT_WEBHOOK.post("/invoke_stages_extract_agent/stream")
+async def stream_agent(request: QueryRequest):
+    """
+    Streams the agent run as Server-Sent Events: start, tool_start, tool_end,
+    token and a final event carrying the StagesExtractorAgentResponse (or error).
+    Keep-alive comments are sent while the video is being processed.
+    """
+    _validate_prompt_variant(request)
+    return StreamingResponse(LANGGRAPH_STAGES_EXTRACT_AGENT.astream_agent(request), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@STAGES_EXTRACT_AGENT_WEBHOOK.get("/extraction_result_cache_stats")
+def extraction_result_cache_stats():
+    return EXTRACTION_RESULT_CACHE.stats()
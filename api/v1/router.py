@@ -1,7 +1,9 @@
 # app/api/v1/router.py
 from fastapi import APIRouter
 from agents.budget_agent.infrastructure.webhooks.webhook import BUDGET_AGENT_WEBHOOK
+from agents.budget_agent.infrastructure.webhooks.statement_import_webhook import STATEMENT_IMPORT_WEBHOOK
 from agents.stages_extractor_agent.infrastructure.webhooks.webhook import STAGES_EXTRACT_AGENT_WEBHOOK
+from agents.stages_extractor_agent.infrastructure.webhooks.extraction_jobs_webhook import EXTRACTION_JOBS_WEBHOOK
 
 api_router = APIRouter()
 
@@ -11,8 +13,20 @@ api_router.include_router(
     tags=["Budget Agent"]
 )
 
+api_router.include_router(
+    STATEMENT_IMPORT_WEBHOOK,
+    prefix="/webhooks/budget-agent",
+    tags=["Statement Import"]
+)
+
 api_router.include_router(
     STAGES_EXTRACT_AGENT_WEBHOOK,
     prefix="/webhooks/stages-extract-agent",
     tags=["Stages Extract Agent"]
 )
+
+api_router.include_router(
+    EXTRACTION_JOBS_WEBHOOK,
+    prefix="/webhooks/stages-extract-agent",
+    tags=["Stages Extraction Jobs"]
+)
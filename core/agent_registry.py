@@ -0,0 +1,59 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from core.logger import LOGGER
+
+
+class AgentRegistry:
+    """
+    Process-wide registry of compiled agents.
+
+    Each agent is registered with a builder (creates the model client, tools and
+    compiled graph) and a fingerprint function. The compiled agent is built once
+    and reused by every request; it is rebuilt only when the fingerprint changes
+    (e.g. the prompt file or the model config was modified).
+    """
+
+    def __init__(self):
+        self._builders: Dict[str, Tuple[Callable[[], Any], Callable[[], Hashable]]] = {}
+        self._agents: Dict[str, Tuple[Hashable, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, builder: Callable[[], Any], fingerprint: Callable[[], Hashable], replace: bool = True) -> None:
+        """Registers (or, unless `replace` is False, replaces) the builder used for the agent called `name`."""
+        with self._lock:
+            if not replace and name in self._builders:
+                return
+            self._builders[name] = (builder, fingerprint)
+            self._agents.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """Returns the compiled agent, building it on first use or when its fingerprint changed."""
+        if name not in self._builders:
+            raise KeyError(f"Agent not registered: {name}")
+
+        builder, fingerprint = self._builders[name]
+        current_fingerprint = fingerprint()
+
+        cached = self._agents.get(name)
+        if cached is not None and cached[0] == current_fingerprint:
+            return cached[1]
+
+        with self._lock:
+            # Another thread may have rebuilt the agent while we were waiting
+            cached = self._agents.get(name)
+            if cached is not None and cached[0] == current_fingerprint:
+                return cached[1]
+
+            LOGGER.info("Building agent '%s'", name)
+            agent = builder()
+            self._agents[name] = (current_fingerprint, agent)
+            return agent
+
+    def warm_up(self) -> None:
+        """Builds every registered agent, so the first request does not pay the setup cost."""
+        for name in list(self._builders):
+            self.get(name)
+
+
+AGENT_REGISTRY = AgentRegistry()
@@ -0,0 +1,111 @@
+"""
+Server-Sent Events streaming of LangGraph agent runs.
+
+`stream_agent_run` turns the `astream_events` of a compiled agent into SSE
+frames: tool call start/finish with a short result summary, the answer
+tokens as the model produces them, and a final event with the parsed
+response. A "start" frame goes out before the agent runs, so time to first
+byte does not depend on the model, and keep-alive comments are sent while a
+slow tool (e.g. a video extraction) is running.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from core.logger import LOGGER
+
+# Seconds without any event after which a keep-alive comment is sent
+SSE_KEEPALIVE_INTERVAL_S = 15.0
+# Characters of a tool result included in its "tool_end" summary
+TOOL_RESULT_SUMMARY_CHARS = 300
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Formats one SSE frame; `data` is sent as JSON."""
+    if isinstance(data, BaseModel):
+        data = data.model_dump(mode="json")
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _summarize_tool_output(output: Any) -> Dict[str, Any]:
+    content = getattr(output, "content", output)
+    text = content if isinstance(content, str) else json.dumps(content, default=str)
+    return {
+        "status": getattr(output, "status", "success"),
+        "length": len(text),
+        "preview": text[:TOOL_RESULT_SUMMARY_CHARS],
+        "truncated": len(text) > TOOL_RESULT_SUMMARY_CHARS,
+    }
+
+
+def _token_text(chunk: Any) -> str:
+    content = getattr(chunk, "content", "")
+    if isinstance(content, str):
+        return content
+    # Multi-part content (e.g. Gemini): keep the text parts only
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+async def stream_agent_run(
+    agent: Any,
+    inputs: Dict[str, Any],
+    parse_final: Callable[[Dict[str, Any]], BaseModel],
+    config: Optional[Dict[str, Any]] = None,
+    on_final: Optional[Callable[[Dict[str, Any], BaseModel], None]] = None,
+) -> AsyncIterator[str]:
+    """
+    Runs `agent` with `inputs` and yields SSE frames:
+    start, tool_start, tool_end, token, final (or error).
+    `parse_final` turns the final graph state into the response model, and
+    `on_final` (optional) receives the final state and the parsed response.
+    """
+
+    yield sse_event("start", {})
+
+    queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            async for event in agent.astream_events(inputs, config=config, version="v2"):
+                kind = event["event"]
+                if kind == "on_tool_start":
+                    await queue.put(sse_event("tool_start", {"run_id": event["run_id"], "name": event["name"], "input": event["data"].get("input")}))
+                elif kind == "on_tool_end":
+                    await queue.put(sse_event("tool_end", {"run_id": event["run_id"], "name": event["name"], **_summarize_tool_output(event["data"].get("output"))}))
+                elif kind == "on_chat_model_stream":
+                    text = _token_text(event["data"]["chunk"])
+                    if text:
+                        await queue.put(sse_event("token", {"text": text}))
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    # End of the root run: its output is the final graph state
+                    final_state = event["data"]["output"]
+                    parsed_response = parse_final(final_state)
+                    if on_final is not None:
+                        on_final(final_state, parsed_response)
+                    await queue.put(sse_event("final", parsed_response))
+        except Exception as e:
+            LOGGER.error("Error while streaming agent run: %s", e, exc_info=True)
+            await queue.put(sse_event("error", {"detail": str(e)}))
+        finally:
+            await queue.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            try:
+                frame = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_INTERVAL_S)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if frame is None:
+                break
+            yield frame
+    finally:
+        # The client went away: stop the agent run instead of letting it finish unobserved
+        if not producer.done():
+            producer.cancel()
@@ -1,9 +1,184 @@
+"""
+Application logging.
+
+Records are put on an in-process queue by a QueueHandler on the root logger,
+and a QueueListener thread formats and writes them, so a request thread never
+blocks on log I/O. Messages use lazy %-style arguments: the message is only
+built for records that pass the level and sampling filters, when they are
+queued; JSON encoding and writing happen in the listener thread. Pass
+`LazySQL(stmt)` to log a SQLAlchemy statement, it is rendered the same way.
+
+Every record carries the correlation id of the request that emitted it (see
+`CorrelationIdMiddleware`, added in main.py). Output is one JSON object per
+line (LOG_FORMAT=json, default) or the previous plain text format
+(LOG_FORMAT=text). Hot loggers can be sampled with LOG_SAMPLE_RATES, e.g.
+{"core.logger.sql": 0.01, "httpx": 0.1}; warnings and errors are never sampled.
+"""
+
+import atexit
+import contextvars
+import datetime
+import json
 import logging # Import the logging module
+import queue
+import random
+import sys
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from core.settings import SETTINGS
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+CORRELATION_ID_HEADER = "X-Request-ID"
+
+# Id of the request being handled; copied into every record emitted while handling it
+CORRELATION_ID: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("correlation_id", default=None)
+
+
+class LazySQL:
+    """Renders a SQLAlchemy statement with its bound values only if the log record is actually written."""
+
+    __slots__ = ("statement",)
+
+    def __init__(self, statement: Any):
+        self.statement = statement
+
+    def __str__(self) -> str:
+        try:
+            return str(self.statement.compile(compile_kwargs={"literal_binds": True}))
+        except Exception:
+            # Some bound values (e.g. dates on some dialects) cannot be rendered as literals
+            return str(self.statement)
+
+
+class CorrelationIdFilter(logging.Filter):
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = CORRELATION_ID.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of the records below WARNING of the configured loggers (longest name prefix wins)."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def _rate_for(self, logger_name: str) -> float:
+        name = logger_name
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class DeferredFormattingQueueHandler(QueueHandler):
+    """
+    Queues the record with its message already built. Unlike the stock
+    QueueHandler, the record is not copied and the exception is left for the
+    formatter: this queue never leaves the process. The message itself must be
+    built here, after the filters and before the caller goes on: the arguments
+    are often mutable (e.g. a payload dict updated right after being logged).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", None),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        correlation_id = getattr(record, "correlation_id", None)
+        return f"{text} [{correlation_id}]" if correlation_id else text
+
+
+class CorrelationIdMiddleware:
+    """
+    ASGI middleware: takes the request's X-Request-ID (or generates one), makes it
+    the correlation id of everything logged while handling the request, including
+    streamed responses, and echoes it back in the response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header_name = CORRELATION_ID_HEADER.lower().encode()
+        correlation_id = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == header_name),
+            None,
+        ) or uuid.uuid4().hex
+
+        async def send_with_correlation_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (header_name, correlation_id.encode("latin-1"))]
+            await send(message)
+
+        token = CORRELATION_ID.set(correlation_id)
+        try:
+            await self.app(scope, receive, send_with_correlation_id)
+        finally:
+            CORRELATION_ID.reset(token)
+
 
 class LoggerSettings:
     def logger_config(self):
         # --- Logging Configuration ---
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        formatter = JsonFormatter() if SETTINGS.log_format == "json" else TextFormatter(TEXT_FORMAT)
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(formatter)
+
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        queue_handler = DeferredFormattingQueueHandler(log_queue)
+        # Filters run in the emitting thread, where the request context is available
+        queue_handler.addFilter(CorrelationIdFilter())
+        queue_handler.addFilter(SamplingFilter(SETTINGS.log_sample_rates))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(SETTINGS.log_level.upper())
+
+        self.listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        self.listener.start()
+        # Flush whatever is still queued when the process exits
+        atexit.register(self.listener.stop)
+
         LOGGER = logging.getLogger(__name__)
         return LOGGER
 
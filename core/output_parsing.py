@@ -0,0 +1,109 @@
+"""
+Parsing of model answers into the API response models, shared by every agent.
+
+The answer is usually JSON, sometimes wrapped in a ``` / ```json fence or in a
+sentence of prose. It is parsed in one pass: the fence (if any) is located with
+two string searches, the JSON is decoded once (with orjson when it is
+installed), and only string values that themselves hold a JSON object or array
+(a tool result the model passed through as a string) are decoded again; the
+tree is not walked at all when the text holds no such string.
+Anything else stays a string: unlike the former `.replace("json", "")`
+cleanup, values that merely contain "json" or look like numbers are kept as is.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Type, TypeVar, Union
+
+from pydantic import BaseModel, ValidationError
+
+from core.logger import LOGGER
+
+try:
+    import orjson
+except ImportError: # optional, only faster
+    orjson = None
+
+ResponseModel = TypeVar("ResponseModel", bound=BaseModel)
+ParsedOutput = Union[Dict[str, Any], List[Any], str]
+
+FENCE = "```"
+JSON_CLOSERS = {"{": "}", "[": "]"}
+# A string value holding JSON shows up in the raw text as "{ or "[
+NESTED_JSON_PATTERN = re.compile(r'"[{\[]')
+
+
+def json_loads(text: Union[str, bytes]) -> Any:
+    """json.loads, through orjson when available. Both raise a ValueError subclass on invalid input."""
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+def message_text(content: Any) -> str:
+    """Text of a message content: a plain string, or the text parts of multi-part content (e.g. Gemini)."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else part.get("text", "") for part in content if isinstance(part, (str, dict)))
+    return str(content)
+
+
+def extract_json_text(text: str) -> str:
+    """The content of the first fenced block, or the whole text when there is no fence."""
+    # str.find rather than a regex: a lazy regex over a large tool dump is slower than decoding it
+    start = text.find(FENCE)
+    if start < 0:
+        return text.strip()
+    start += len(FENCE)
+    line_end = text.find("\n", start)
+    if line_end >= 0 and text[start:line_end].strip().isalpha():
+        start = line_end + 1 # skip the language tag, e.g. ```json
+    end = text.find(FENCE, start)
+    return text[start:end if end >= 0 else len(text)].strip()
+
+
+def _decode_nested(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _decode_nested(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode_nested(item) for item in value]
+    if isinstance(value, str) and value[:1] in JSON_CLOSERS:
+        try:
+            return _decode_nested(json_loads(value))
+        except ValueError:
+            return value
+    return value
+
+
+def _outermost_json(text: str) -> str:
+    """The span from the first '{' / '[' to its last closing counterpart, for JSON surrounded by prose."""
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        return ""
+    start = min(starts)
+    end = text.rfind(JSON_CLOSERS[text[start]])
+    return text[start:end + 1] if end > start else ""
+
+
+def parse_model_output(content: Any) -> ParsedOutput:
+    """Decodes the JSON of a model answer; returns the (unfenced) text when it holds no JSON."""
+    text = extract_json_text(message_text(content))
+    candidate = text if text[:1] in JSON_CLOSERS else _outermost_json(text)
+    if candidate:
+        try:
+            parsed = json_loads(candidate)
+        except ValueError:
+            return text
+        # Walking the decoded tree costs more than decoding it: skip it when no string can hold JSON
+        return _decode_nested(parsed) if NESTED_JSON_PATTERN.search(candidate) else parsed
+    return text
+
+
+def to_response_model(content: Any, response_model: Type[ResponseModel]) -> ResponseModel:
+    """Wraps the parsed answer in `response_model` (a model with a single `response` field)."""
+    parsed = parse_model_output(content)
+    try:
+        return response_model(response=parsed)
+    except ValidationError:
+        # e.g. a JSON list of scalars: hand the client the raw text rather than failing the request
+        LOGGER.warning("Model answer does not fit %s, returning it as text", response_model.__name__)
+        return response_model(response=message_text(content))
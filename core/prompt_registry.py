@@ -0,0 +1,122 @@
+"""
+Process-wide registry of the prompt files.
+
+Every agent registers its `infrastructure/prompts/` directory once (paths are
+resolved from the agent package, not from the working directory). All `.txt`
+files in it are loaded up front, and each one is tagged with a short content
+hash that caches and traces key on. A prompt whose file changed on disk is
+reloaded on the next `get`. The files are stat-ed at most once per
+`check_interval_s`, so a request normally costs no syscall at all.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from core.logger import LOGGER
+from core.settings import SETTINGS
+
+PROMPT_FILE_SUFFIX = ".txt"
+# Prompt names come from requests: plain file names only, never a path
+PROMPT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+
+@dataclass(frozen=True)
+class Prompt:
+    namespace: str # e.g. "budget_agent"
+    name: str # file name without suffix, e.g. "prompt_2"
+    path: str
+    content: str
+    content_hash: str # first 12 hex chars of the sha256 of the content
+    mtime: float
+
+    @property
+    def version(self) -> str:
+        return f"{self.namespace}/{self.name}@{self.content_hash}"
+
+
+class PromptRegistry:
+
+    def __init__(self, check_interval_s: float):
+        self.check_interval_s = check_interval_s
+        self._directories: Dict[str, str] = {}
+        self._prompts: Dict[Tuple[str, str], Prompt] = {}
+        self._checked_at: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def register_directory(self, namespace: str, directory: str) -> None:
+        """Loads every prompt file in `directory` under `namespace`; a no-op if it is already registered."""
+        directory = os.path.abspath(directory)
+        with self._lock:
+            if self._directories.get(namespace) == directory:
+                return
+            self._directories[namespace] = directory
+            for file_name in sorted(os.listdir(directory)):
+                if file_name.endswith(PROMPT_FILE_SUFFIX):
+                    self._load(namespace, file_name[:-len(PROMPT_FILE_SUFFIX)])
+
+    def get(self, namespace: str, name: str) -> Prompt:
+        """Returns the prompt, reloading it if its file changed. Raises KeyError for an unknown prompt."""
+        key = (namespace, name)
+        prompt = self._prompts.get(key)
+        now = time.monotonic()
+        if prompt is not None and now - self._checked_at.get(key, 0.0) < self.check_interval_s:
+            return prompt
+
+        if not PROMPT_NAME_PATTERN.match(name):
+            raise KeyError(f"Invalid prompt name '{name}'")
+        with self._lock:
+            if namespace not in self._directories:
+                raise KeyError(f"No prompts registered for '{namespace}'")
+            self._checked_at[key] = now
+            prompt = self._prompts.get(key)
+            try:
+                mtime = os.path.getmtime(self._path(namespace, name))
+            except OSError:
+                mtime = None
+            if mtime is None:
+                if prompt is not None:
+                    # The file went away: keep serving the last good version
+                    LOGGER.warning("Prompt file of %s is missing, keeping the loaded version", prompt.version)
+                    return prompt
+                raise KeyError(f"Unknown prompt '{name}' for '{namespace}', available: {self.names(namespace)}")
+            if prompt is None or prompt.mtime != mtime:
+                prompt = self._load(namespace, name)
+            return prompt
+
+    def names(self, namespace: str) -> List[str]:
+        return sorted(name for prompt_namespace, name in self._prompts if prompt_namespace == namespace)
+
+    def _path(self, namespace: str, name: str) -> str:
+        return os.path.join(self._directories[namespace], name + PROMPT_FILE_SUFFIX)
+
+    def _load(self, namespace: str, name: str) -> Prompt:
+        """Reads one prompt file; called with the lock held."""
+        path = self._path(namespace, name)
+        mtime = os.path.getmtime(path)
+        with open(path, "r") as file:
+            content = file.read()
+        prompt = Prompt(
+            namespace=namespace,
+            name=name,
+            path=path,
+            content=content,
+            content_hash=hashlib.sha256(content.encode("utf-8")).hexdigest()[:12],
+            mtime=mtime,
+        )
+        previous: Optional[Prompt] = self._prompts.get((namespace, name))
+        self._prompts[(namespace, name)] = prompt
+        self._checked_at[(namespace, name)] = time.monotonic()
+        if previous is None:
+            LOGGER.info("Loaded prompt %s (%s chars)", prompt.version, len(content))
+        else:
+            LOGGER.info("Reloaded prompt %s -> %s", previous.version, prompt.content_hash)
+        LOGGER.debug("Prompt %s:\n%s", prompt.version, content)
+        return prompt
+
+
+PROMPT_REGISTRY = PromptRegistry(check_interval_s=SETTINGS.prompt_reload_check_interval_s)
@@ -0,0 +1,152 @@
+"""
+In-process cache of final agent responses for read-only queries.
+
+Entries are keyed by the normalized query text, the agent's prompt version
+and a data version supplied by the caller, so any write to the underlying
+data makes older answers unreachable. An optional local TF-IDF matcher
+(no network, no model) also serves near-identical phrasings of a cached query.
+"""
+
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Words that carry no meaning for the matcher; "list all my categories" == "list all categories"
+STOPWORDS = frozenset({
+    "a", "an", "the", "my", "me", "i", "please", "can", "could", "would", "you", "show", "tell",
+    "of", "for", "in", "on", "to", "is", "are", "what", "whats", "do", "does", "all", "how",
+})
+
+# Verbs that make a query a write; such queries are never served from or stored in the cache
+# (a write that slips past this is still caught afterwards from the tool calls of the run)
+MUTATING_QUERY_PATTERN = re.compile(
+    r"\b(add|added|adding|create|insert|record|update|change|edit|modify|set|rename|delete|remove|undo|import)\b"
+)
+
+
+def normalize_query(query: str) -> str:
+    """Lower-cases, strips accents/punctuation and collapses whitespace."""
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = re.sub(r"[^\w\s]", " ", query)
+    return " ".join(query.split())
+
+
+def is_mutating_query(normalized_query: str) -> bool:
+    return MUTATING_QUERY_PATTERN.search(normalized_query) is not None
+
+
+def _terms(normalized_query: str) -> Counter:
+    return Counter(token for token in normalized_query.split() if token not in STOPWORDS)
+
+
+@dataclass
+class _Entry:
+    expires_at: float
+    version: Hashable
+    terms: Counter
+    response: Any
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of agent responses.
+
+    `similarity_threshold` enables the TF-IDF cosine matcher; 0 disables it
+    and only exact (normalized) matches are served.
+    """
+
+    def __init__(self, ttl_s: float, max_entries: int, similarity_threshold: float = 0.0):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[Tuple[str, Hashable], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0}
+
+    def get(self, normalized_query: str, version: Hashable) -> Optional[Any]:
+        """Returns the cached response for the query at `version`, or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((normalized_query, version))
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end((normalized_query, version))
+                self._counters["exact_hits"] += 1
+                return entry.response
+
+            if self.similarity_threshold > 0:
+                match = self._most_similar(normalized_query, version, now)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self._counters["similar_hits"] += 1
+                    return self._entries[match].response
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, normalized_query: str, version: Hashable, response: Any) -> None:
+        if self.ttl_s <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            key = (normalized_query, version)
+            self._entries[key] = _Entry(time.monotonic() + self.ttl_s, version, _terms(normalized_query), response)
+            self._entries.move_to_end(key)
+            self._counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._counters["bypassed"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._counters["exact_hits"] + self._counters["similar_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "similarity_threshold": self.similarity_threshold,
+            }
+
+    def _most_similar(self, normalized_query: str, version: Hashable, now: float) -> Optional[Tuple[str, Hashable]]:
+        """TF-IDF cosine over the live entries of the same version; called with the lock held."""
+        candidates = [(key, entry) for key, entry in self._entries.items() if entry.version == version and entry.expires_at > now]
+        query_terms = _terms(normalized_query)
+        if not candidates or not query_terms:
+            return None
+
+        document_frequency = Counter(term for _, entry in candidates for term in entry.terms)
+        document_frequency.update(query_terms.keys())
+        document_count = len(candidates) + 1
+
+        def weights(terms: Counter) -> Dict[str, float]:
+            return {term: count * (math.log((document_count + 1) / (document_frequency[term] + 1)) + 1) for term, count in terms.items()}
+
+        def norm(vector: Dict[str, float]) -> float:
+            return math.sqrt(sum(weight * weight for weight in vector.values()))
+
+        query_vector = weights(query_terms)
+        query_norm = norm(query_vector)
+        best_key, best_score = None, self.similarity_threshold
+        for key, entry in candidates:
+            entry_vector = weights(entry.terms)
+            entry_norm = norm(entry_vector)
+            if not entry_norm:
+                continue
+            score = sum(weight * entry_vector.get(term, 0.0) for term, weight in query_vector.items()) / (query_norm * entry_norm)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
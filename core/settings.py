@@ -1,3 +1,5 @@
+from typing import Dict
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from sqlalchemy.engine import URL
 
@@ -12,6 +14,10 @@ class ApplicationSettings(BaseSettings):
     new_db_password: str
     new_db_name: str
     new_db_pool: int = 5
+    new_db_max_overflow: int = 10
+    new_db_pool_timeout: int = 30
+    new_db_pool_recycle: int = 1800
+    new_db_pool_pre_ping: bool = True
     # gcp_region: str
     gcp_project_id: str
     gcp_location: str
@@ -19,6 +25,45 @@ class ApplicationSettings(BaseSettings):
     google_cloud_location: str
     google_genai_use_vertexai: bool
     google_application_credentials: str
+    statement_import_chunk_size: int = 5000
+    category_budget_cache_ttl_s: float = 60.0
+    category_budget_cache_max_entries: int = 256
+    category_budget_cache_notify: bool = False # broadcast budget writes to the other workers (LISTEN/NOTIFY)
+    response_cache_enabled: bool = False # with several workers, only safe together with CATEGORY_BUDGET_CACHE_NOTIFY
+    response_cache_ttl_s: float = 300.0
+    response_cache_max_entries: int = 512
+    response_cache_similarity_threshold: float = 0.0
+    fast_path_enabled: bool = True
+    tool_max_concurrency: int = 8 # parallel tool calls per agent run (max_concurrency run config)
+    tool_result_format: str = "columnar" # "columnar", "csv" or "json" (row objects)
+    tool_result_max_tokens: int = 4000 # approximate tokens of one read tool result, extra rows are cut
+    prompt_reload_check_interval_s: float = 2.0
+    log_level: str = "INFO"
+    log_format: str = "json" # or "text"
+    log_sample_rates: Dict[str, float] = {} # logger name prefix -> fraction of DEBUG/INFO records kept
+    stages_extract_use_stub_model: bool = False
+    stages_extract_stub_delay_s: float = 0.0
+    stages_extract_local_video_root: str = "" # local video files are only read under this directory; empty: gs:// URIs only
+    extraction_jobs_db_url: str = "sqlite:///extraction_jobs.db" # or a postgresql:// URL
+    extraction_workers: int = 2
+    extraction_job_max_attempts: int = 3
+    extraction_job_deadline_s: float = 600.0
+    extraction_job_retry_backoff_s: float = 10.0
+    extraction_job_poll_interval_s: float = 2.0
+    extraction_result_cache_enabled: bool = True
+    extraction_result_cache_db_url: str = "sqlite:///extraction_jobs.db" # or a postgresql:// URL
+    extraction_result_cache_ttl_s: float = 7 * 24 * 3600.0
+    extraction_result_cache_max_entries: int = 1000
+    extraction_result_cache_resolve_generation: bool = True # look up the GCS object generation for the cache key
+    extraction_batch_max_concurrency: int = 4
+    extraction_batch_max_items: int = 100
+    extraction_segment_max_concurrency: int = 4
+    extraction_segment_max_attempts: int = 2
+    extraction_segment_max_count: int = 48
+    conversation_threads_db_url: str = "sqlite:///conversations.db" # or a postgresql:// URL
+    conversation_max_history_tokens: int = 8000 # approximate tokens of history sent to the model per call
+    conversation_thread_idle_ttl_s: float = 24 * 3600.0
+    conversation_thread_eviction_interval_s: float = 300.0
 
 
 
@@ -1,11 +1,46 @@
 # app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from api.v1.router import api_router
 from dotenv import load_dotenv
 
+from core.agent_registry import AGENT_REGISTRY
+from core.logger import LOGGER, CorrelationIdMiddleware
+from core.settings import SETTINGS
+from agents.budget_agent.infrastructure.db.postgres.category_budget_cache import CATEGORY_BUDGET_CACHE
+from agents.budget_agent.infrastructure.db.postgres.engine_registry import ENGINE_REGISTRY
+from agents.budget_agent.infrastructure.db.postgres.monthly_summary import ensure_monthly_summary_table
+from agents.stages_extractor_agent.infrastructure.jobs.extraction_worker import EXTRACTION_JOB_REPO, EXTRACTION_WORKER_POOL
+
 load_dotenv()
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile every agent once, before the first request is served
+    try:
+        AGENT_REGISTRY.warm_up()
+    except Exception as e:
+        LOGGER.error("Error while warming up agents: %s", e, exc_info=True)
+    ENGINE_REGISTRY.get_engine(SETTINGS.postgres_connection_string)
+    try:
+        ensure_monthly_summary_table()
+    except Exception as e:
+        LOGGER.error("Error while preparing the monthly summary table: %s", e, exc_info=True)
+    if SETTINGS.category_budget_cache_notify:
+        CATEGORY_BUDGET_CACHE.start_listener(SETTINGS.postgres_connection_string)
+    try:
+        EXTRACTION_JOB_REPO.ensure_table()
+        EXTRACTION_WORKER_POOL.start()
+    except Exception as e:
+        LOGGER.error("Error while starting the extraction job workers: %s", e, exc_info=True)
+    yield
+    await EXTRACTION_WORKER_POOL.stop()
+    CATEGORY_BUDGET_CACHE.stop_listener()
+    ENGINE_REGISTRY.dispose_all()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CorrelationIdMiddleware)
 
 app.include_router(api_router, prefix="/api/v1")
@@ -0,0 +1,107 @@
+"""
+Benchmark of model answer parsing (see core/output_parsing.py).
+
+Parses a large fenced tool dump into BudgetAgentResponse with:
+- the former cleanup: .replace("json", "").replace("\\n", "").replace("```", "")
+  followed by a recursive json.loads of every string leaf (deep_json_eval);
+- core.output_parsing with orjson (when installed) and with the stdlib json.
+
+The dump is generated: `make_tool_dump` builds the same 0.95 MB answer (5000
+transactions, seeded) on every run; --write-fixture saves it to a file and
+--fixture parses a saved (or captured) answer instead.
+
+Usage (from the repository root, with the application settings available):
+    python scripts/bench_output_parsing.py [--rows 5000] [--fixture FILE] [--write-fixture FILE]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.output_parsing as output_parsing
+from agents.budget_agent.domain.schemas import BudgetAgentResponse
+
+CATEGORIES = ["food", "rent", "json exports"] # "json exports" is what the former cleanup corrupted
+
+
+def make_tool_dump(rows: int = 5000, seed: int = 0) -> str:
+    """A fenced JSON answer echoing a large tool result, as the agents used to receive it."""
+    generator = random.Random(seed)
+    transactions = [
+        {
+            "id": index,
+            "date": f"2025-0{1 + index % 9}-1{index % 10}",
+            "description": f"Grocery store purchase {index}",
+            "category": generator.choice(CATEGORIES),
+            "amount": round(generator.uniform(1, 500), 2),
+            "account": "checking",
+        }
+        for index in range(rows)
+    ]
+    return "```json\n" + json.dumps({"transactions": transactions, "summary": f"{rows} rows"}, indent=2) + "\n```"
+
+
+def _former_deep_json_eval(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {key: _former_deep_json_eval(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_former_deep_json_eval(item) for item in data]
+    if isinstance(data, str):
+        try:
+            return _former_deep_json_eval(json.loads(data))
+        except (json.JSONDecodeError, TypeError):
+            return data
+    return data
+
+
+def former_parse(content: str) -> BudgetAgentResponse:
+    cleaned = content.replace("json", "").replace("\n", "").replace("```", "").strip()
+    return BudgetAgentResponse(response=_former_deep_json_eval(cleaned))
+
+
+def shared_parse(content: str) -> BudgetAgentResponse:
+    return output_parsing.to_response_model(content, BudgetAgentResponse)
+
+
+def _best_ms(func: Callable[[str], Any], content: str) -> float:
+    return min(timeit.repeat(lambda: func(content), number=5, repeat=3)) / 5 * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--fixture", help="parse this saved answer instead of a generated one")
+    parser.add_argument("--write-fixture", help="save the generated answer to this file and exit")
+    args = parser.parse_args()
+
+    if args.fixture:
+        with open(args.fixture, encoding="utf-8") as file:
+            content = file.read()
+    else:
+        content = make_tool_dump(args.rows)
+    if args.write_fixture:
+        with open(args.write_fixture, "w", encoding="utf-8") as file:
+            file.write(content)
+        print(f"Wrote {len(content) / 1e6:.2f} MB to {args.write_fixture}")
+        return
+
+    print(f"Answer size: {len(content) / 1e6:.2f} MB")
+    print(f"former cleanup + deep_json_eval: {_best_ms(former_parse, content):.1f} ms")
+    orjson = output_parsing.orjson
+    if orjson is not None:
+        print(f"core.output_parsing (orjson): {_best_ms(shared_parse, content):.1f} ms")
+    output_parsing.orjson = None
+    try:
+        print(f"core.output_parsing (json): {_best_ms(shared_parse, content):.1f} ms")
+    finally:
+        output_parsing.orjson = orjson
+
+
+if __name__ == "__main__":
+    main()
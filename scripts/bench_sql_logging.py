@@ -0,0 +1,74 @@
+"""
+Micro-benchmark of statement logging on the request thread (see core/logger.py).
+
+Compares, per logged query, with DEBUG disabled on the SQL logger:
+- eager: the former f-string that compiled the statement with literal binds
+  whether or not the record was written;
+- lazy: SQL_LOGGER.debug("... %s", LazySQL(stmt)), rendered only when written.
+and, for an INFO record that is written, the cost left on the calling thread:
+a synchronous StreamHandler versus the queue handler of core.logger.
+
+Usage (from the repository root, with the application settings available):
+    python scripts/bench_sql_logging.py [--iterations 2000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+
+from core.logger import LOGGER, TEXT_FORMAT, LazySQL
+from agents.budget_agent.domain.budget_entity import transaction_details_table
+from agents.budget_agent.infrastructure.db.postgres.budget_repo import SQL_LOGGER
+
+PAYLOAD = {"id": 1, "category": "food", "amount_inr": 120.5, "description": "lunch with the team at the office cafe"}
+
+
+def _per_call_us(func, iterations: int) -> float:
+    return timeit.timeit(func, number=iterations) / iterations * 1e6
+
+
+def bench_disabled_sql_logging(iterations: int) -> None:
+    table = transaction_details_table
+    stmt = select(table).where(table.c.category == "food", table.c.amount_inr > 100).order_by(table.c.transaction_date).limit(50)
+    SQL_LOGGER.setLevel(logging.INFO)
+    eager = _per_call_us(
+        lambda: SQL_LOGGER.debug(f"Executing SQL (query_transactions): {stmt.compile(compile_kwargs={'literal_binds': True})}"),
+        iterations,
+    )
+    lazy = _per_call_us(lambda: SQL_LOGGER.debug("Executing SQL (query_transactions): %s", LazySQL(stmt)), iterations)
+    print(f"DEBUG disabled: eager {eager:.1f} us/query, lazy {lazy:.2f} us/query")
+
+
+def bench_written_info_record(iterations: int) -> None:
+    root = logging.getLogger()
+    queue_handlers = list(root.handlers)
+    with open(os.devnull, "w") as sink:
+        stream_handler = logging.StreamHandler(sink)
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        root.handlers = [stream_handler]
+        try:
+            synchronous = _per_call_us(lambda: LOGGER.info(f"Fetched transaction: {PAYLOAD}"), iterations)
+        finally:
+            root.handlers = queue_handlers
+        queued = _per_call_us(lambda: LOGGER.info("Fetched transaction: %s", PAYLOAD), iterations)
+    print(f"INFO written: synchronous handler {synchronous:.1f} us/record, queued {queued:.1f} us/record on the caller thread")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    bench_disabled_sql_logging(args.iterations)
+    # The queued records are written to stderr by the listener thread
+    logging.getLogger().setLevel(logging.INFO)
+    bench_written_info_record(args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Test setup: the code imports the agents package as `agents` while the
+directory is `Agents/` (the app is run on case-insensitive file systems), and
+the settings need the connection variables of a deployment. Both are provided
+here when missing, so the suite runs from a plain checkout.
+"""
+
+import importlib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+for name, value in {
+    "GOOGLE_API_KEY": "test",
+    "NEW_DB_HOST": "localhost",
+    "NEW_DB_PORT": "5432",
+    "NEW_DB_USERNAME": "test",
+    "NEW_DB_PASSWORD": "test",
+    "NEW_DB_NAME": "test",
+    "GCP_PROJECT_ID": "test-project",
+    "GCP_LOCATION": "us-central1",
+    "GOOGLE_CLOUD_PROJECT": "test-project",
+    "GOOGLE_CLOUD_LOCATION": "us-central1",
+    "GOOGLE_GENAI_USE_VERTEXAI": "false",
+    "GOOGLE_APPLICATION_CREDENTIALS": "",
+}.items():
+    os.environ.setdefault(name, value)
+
+if "agents" not in sys.modules:
+    try:
+        importlib.import_module("agents")
+    except ModuleNotFoundError:
+        sys.modules["agents"] = importlib.import_module("Agents")
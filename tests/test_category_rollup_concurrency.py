@@ -0,0 +1,94 @@
+"""
+Concurrent expenses in one category must all be rolled up into its budget row
+(the rollup is a single atomic UPDATE, see BudgetRepo._update_category_budget).
+Needs a Postgres database: set BUDGET_TEST_DATABASE_URL to a postgresql:// URL.
+The tables are created if missing; only the rows of a throwaway category are written.
+"""
+
+import datetime
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import delete, select
+
+from agents.budget_agent.application.budget_usecase import BudgetAgentUsecase
+from agents.budget_agent.domain.budget_entity import (category_budget_table,
+                                                       metadata,
+                                                       monthly_category_summary_table,
+                                                       transaction_details_table)
+from agents.budget_agent.domain.interface import AllRepositories
+from agents.budget_agent.domain.schemas import TableNameEnum
+from agents.budget_agent.infrastructure.db.postgres.budget_repo import BudgetRepo
+from agents.budget_agent.infrastructure.db.postgres.db_context import SQLAlchemyConnection
+from agents.budget_agent.infrastructure.db.postgres.engine_registry import ENGINE_REGISTRY
+
+DB_URL = os.environ.get("BUDGET_TEST_DATABASE_URL")
+WRITERS = 10
+EXPENSES_PER_WRITER = 5
+BUDGET_INR = 100000.0
+
+pytestmark = pytest.mark.skipif(not DB_URL, reason="BUDGET_TEST_DATABASE_URL is not set")
+
+
+class _TestDatabaseConnection(SQLAlchemyConnection):
+    def fetch_tenant_engine(self):
+        return ENGINE_REGISTRY.get_engine(DB_URL)
+
+
+@pytest.fixture
+def category():
+    engine = ENGINE_REGISTRY.get_engine(DB_URL)
+    metadata.create_all(engine)
+    category = f"concurrency-{uuid.uuid4().hex[:12]}"
+    yield category
+    with engine.begin() as connection:
+        for table in (transaction_details_table, monthly_category_summary_table, category_budget_table):
+            connection.execute(delete(table).where(table.c.category == category))
+
+
+def _category_row(category: str):
+    with ENGINE_REGISTRY.get_engine(DB_URL).connect() as connection:
+        return connection.execute(select(category_budget_table).where(category_budget_table.c.category == category)).one()
+
+
+def test_parallel_expenses_are_all_rolled_up(category):
+    usecase = BudgetAgentUsecase(AllRepositories(repo_context=_TestDatabaseConnection, budget_repo=BudgetRepo()))
+    budget = usecase.handle_add_item(TableNameEnum.CATEGORY_BUDGET_OVERVIEW, {"category": category, "budget_inr": BUDGET_INR})
+    amounts = [float(amount) for amount in range(1, WRITERS * EXPENSES_PER_WRITER + 1)]
+    start = threading.Barrier(WRITERS)
+
+    def add_expenses(writer: int) -> None:
+        start.wait()
+        for amount in amounts[writer::WRITERS]:
+            usecase.handle_add_item(TableNameEnum.TRANSACTION_DETAILS, {
+                "transaction_date": datetime.date.today(), "category": category, "amount_inr": amount, "type": "expense",
+            })
+
+    updated_rows = []
+
+    def raise_budget(writer: int) -> None:
+        # Budget edits race with the rollups: each updated row must stay consistent with its own total_spent_inr
+        start.wait()
+        for step in range(EXPENSES_PER_WRITER):
+            updated_rows.append(usecase.handle_update_item(TableNameEnum.CATEGORY_BUDGET_OVERVIEW, {
+                "id": budget.id, "update_data": {"budget_inr": BUDGET_INR + writer * EXPENSES_PER_WRITER + step + 1},
+            }))
+
+    with ThreadPoolExecutor(max_workers=WRITERS) as executor:
+        list(executor.map(add_expenses, range(WRITERS)))
+    row = _category_row(category)
+    assert row.total_spent_inr == pytest.approx(sum(amounts))
+    assert row.remaining_budget_inr == pytest.approx(BUDGET_INR - sum(amounts))
+
+    start = threading.Barrier(WRITERS)
+    with ThreadPoolExecutor(max_workers=WRITERS) as executor:
+        list(executor.map(lambda writer: add_expenses(writer) if writer % 2 else raise_budget(writer), range(WRITERS)))
+    row = _category_row(category)
+    spent = sum(amounts) + sum(amount for writer in range(1, WRITERS, 2) for amount in amounts[writer::WRITERS])
+    assert row.total_spent_inr == pytest.approx(spent)
+    assert row.remaining_budget_inr == pytest.approx(row.budget_inr - spent)
+    for updated in updated_rows:
+        assert updated.remaining_budget_inr == pytest.approx(updated.budget_inr - updated.total_spent_inr)
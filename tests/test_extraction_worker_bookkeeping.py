@@ -0,0 +1,137 @@
+"""
+The extraction workers must outlive a bad job: a malformed request fails that
+job for good, a database error while recording a result is logged, and a late
+result never overwrites a job that was requeued in the meantime.
+"""
+
+import asyncio
+import time
+
+from sqlalchemy import update
+
+from core.settings import SETTINGS
+from agents.stages_extractor_agent.domain.extraction_job_entity import extraction_jobs_table
+from agents.stages_extractor_agent.domain.schemas import StagesExtractInputDetails
+from agents.stages_extractor_agent.infrastructure.jobs import extraction_worker
+from agents.stages_extractor_agent.infrastructure.jobs.extraction_job_repo import ExtractionJobRepo
+from agents.stages_extractor_agent.infrastructure.jobs.extraction_worker import ExtractionWorkerPool
+
+REQUEST = StagesExtractInputDetails(video_gcs_uri="gs://bucket/video.mp4")
+
+
+def _repo(tmp_path) -> ExtractionJobRepo:
+    repo = ExtractionJobRepo(f"sqlite:///{tmp_path / 'jobs.db'}")
+    repo.ensure_table()
+    return repo
+
+
+async def _wait_for_status(repo, job_id, status):
+    deadline = time.monotonic() + 10
+    while (job := await asyncio.to_thread(repo.get_job, job_id))["status"] != status:
+        assert time.monotonic() < deadline, f"job is {job['status']}, expected {status}"
+        await asyncio.sleep(0.02)
+    return job
+
+
+def test_invalid_request_fails_the_job_and_the_worker_keeps_going(tmp_path, monkeypatch):
+    repo = _repo(tmp_path)
+    pool = ExtractionWorkerPool(repo, workers=1)
+
+    async def extract(request):
+        return "stages"
+
+    monkeypatch.setattr(extraction_worker, "aextract_stages", extract)
+
+    async def app():
+        pool.start()
+        try:
+            broken = await asyncio.to_thread(repo.create_job, REQUEST, 3, 30.0)
+            with repo.engine.begin() as connection:
+                connection.execute(
+                    update(extraction_jobs_table).where(extraction_jobs_table.c.job_id == broken["job_id"]).values(request_json="{")
+                )
+            pool.notify()
+            broken = await _wait_for_status(repo, broken["job_id"], "failed")
+
+            good = await asyncio.to_thread(repo.create_job, REQUEST, 3, 30.0)
+            pool.notify()
+            return broken, await _wait_for_status(repo, good["job_id"], "succeeded")
+        finally:
+            await pool.stop()
+
+    broken, good = asyncio.run(app())
+    assert broken["attempts"] == 1
+    assert broken["error"].startswith("Invalid request")
+    assert good["result"] == "stages"
+
+
+def test_worker_survives_a_database_error_while_recording_a_result(tmp_path, monkeypatch):
+    repo = _repo(tmp_path)
+    pool = ExtractionWorkerPool(repo, workers=1)
+    calls = []
+
+    async def extract(request):
+        return "stages"
+
+    def flaky_mark_succeeded(job_id, result):
+        calls.append(job_id)
+        if len(calls) == 1:
+            raise RuntimeError("database is down")
+        return ExtractionJobRepo.mark_succeeded(repo, job_id, result)
+
+    monkeypatch.setattr(extraction_worker, "aextract_stages", extract)
+    monkeypatch.setattr(repo, "mark_succeeded", flaky_mark_succeeded)
+
+    async def app():
+        pool.start()
+        try:
+            first = await asyncio.to_thread(repo.create_job, REQUEST, 3, 30.0)
+            pool.notify()
+            deadline = time.monotonic() + 10
+            while not calls:
+                assert time.monotonic() < deadline, "the first job was never run"
+                await asyncio.sleep(0.02)
+            second = await asyncio.to_thread(repo.create_job, REQUEST, 3, 30.0)
+            pool.notify()
+            await _wait_for_status(repo, second["job_id"], "succeeded")
+            return await asyncio.to_thread(repo.get_job, first["job_id"])
+        finally:
+            await pool.stop()
+
+    first = asyncio.run(app())
+    # Left running for requeue_lost_jobs to retry
+    assert first["status"] == "running"
+
+
+def test_late_result_does_not_overwrite_a_requeued_job(tmp_path):
+    repo = _repo(tmp_path)
+    job = repo.create_job(REQUEST, 3, 30.0)
+    assert repo.claim_next_job()["job_id"] == job["job_id"]
+    assert repo.mark_attempt_failed(job["job_id"], "Worker lost while running the job", 0.0) == "queued"
+
+    assert repo.mark_succeeded(job["job_id"], "late stages") == "queued"
+    assert repo.mark_attempt_failed(job["job_id"], "late error", 0.0) == "queued"
+    job = repo.get_job(job["job_id"])
+    assert job["status"] == "queued"
+    assert job["result"] is None
+    assert job["error"] == "Worker lost while running the job"
+
+
+def test_any_idle_worker_requeues_lost_jobs(tmp_path, monkeypatch):
+    repo = _repo(tmp_path)
+    pool = ExtractionWorkerPool(repo, workers=2)
+    sweeps = []
+    monkeypatch.setattr(SETTINGS, "extraction_job_poll_interval_s", 0.05)
+    monkeypatch.setattr(repo, "requeue_lost_jobs", lambda retry_backoff_s: sweeps.append(retry_backoff_s) or 0)
+
+    async def app():
+        pool.start()
+        try:
+            # Worker 0 is gone for good; the other one must take over the sweep
+            pool._tasks[0].cancel()
+            await asyncio.sleep(0.5)
+        finally:
+            await pool.stop()
+
+    asyncio.run(app())
+    assert 2 <= len(sweeps) <= 11
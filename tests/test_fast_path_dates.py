@@ -0,0 +1,17 @@
+import datetime
+
+import pytest
+
+from agents.budget_agent.infrastructure.external_services.fast_path_router import parse_relative_date
+
+TODAY = datetime.date(2025, 6, 18) # a Wednesday
+
+
+@pytest.mark.parametrize("phrase, expected", [
+    ("last week", (datetime.date(2025, 6, 9), datetime.date(2025, 6, 15))),
+    ("1 week ago", (datetime.date(2025, 6, 9), datetime.date(2025, 6, 15))),
+    ("two weeks ago", (datetime.date(2025, 6, 2), datetime.date(2025, 6, 8))),
+    ("3 days ago", (datetime.date(2025, 6, 15), datetime.date(2025, 6, 15))),
+])
+def test_relative_dates(phrase, expected):
+    assert parse_relative_date(phrase.split(), TODAY) == expected
@@ -0,0 +1,37 @@
+import logging
+import queue
+
+from core.logger import DeferredFormattingQueueHandler, SamplingFilter
+
+
+def _queue_logger(name: str, *filters: logging.Filter):
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+    handler = DeferredFormattingQueueHandler(log_queue)
+    for log_filter in filters:
+        handler.addFilter(log_filter)
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger, log_queue
+
+
+def test_message_is_built_before_the_arguments_change():
+    logger, log_queue = _queue_logger("tests.logger.snapshot")
+    payload = {"category": "food"}
+    logger.info("Adding item with payload: %s", payload)
+    payload["remaining_budget_inr"] = 10.0
+
+    record = log_queue.get_nowait()
+    assert record.getMessage() == "Adding item with payload: {'category': 'food'}"
+    assert record.args is None
+
+
+def test_sampled_out_records_are_never_formatted():
+    class Unrenderable:
+        def __str__(self):
+            raise AssertionError("a dropped record was formatted")
+
+    logger, log_queue = _queue_logger("tests.logger.sampled", SamplingFilter({"tests.logger.sampled": 0.0}))
+    logger.debug("Executing SQL: %s", Unrenderable())
+    assert log_queue.empty()
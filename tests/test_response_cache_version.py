@@ -0,0 +1,60 @@
+import datetime
+import os
+import time
+import types
+
+import pytest
+from sqlalchemy import text
+
+from core.settings import SETTINGS
+from agents.budget_agent.domain.schemas import BudgetAgentResponse, QueryRequest
+from agents.budget_agent.infrastructure.db.postgres.category_budget_cache import CategoryBudgetCache
+from agents.budget_agent.infrastructure.db.postgres.data_version import BUDGET_DATA_NOTIFY_CHANNEL, BUDGET_DATA_VERSION
+from agents.budget_agent.infrastructure.db.postgres.engine_registry import ENGINE_REGISTRY
+from agents.budget_agent.infrastructure.external_services import langgraph_budget_agent
+
+DB_URL = os.environ.get("BUDGET_TEST_DATABASE_URL")
+QUERY = QueryRequest(query="how much did I spend this month")
+
+
+class _FakeDate(datetime.date):
+    current = datetime.date(2025, 6, 30)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+def test_cached_answers_do_not_outlive_the_day(monkeypatch):
+    monkeypatch.setattr(SETTINGS, "response_cache_enabled", True)
+    monkeypatch.setattr(langgraph_budget_agent, "datetime", types.SimpleNamespace(date=_FakeDate))
+    agent = langgraph_budget_agent.LANGGRAPH_BUDGET_AGENT
+
+    _, normalized_query, version = agent._cache_lookup(QUERY)
+    agent._cache_store(normalized_query, version, {"messages": []}, BudgetAgentResponse(response={"total": 10}))
+    assert agent._cache_lookup(QUERY)[0].response == {"total": 10}
+
+    monkeypatch.setattr(_FakeDate, "current", datetime.date(2025, 7, 1))
+    assert agent._cache_lookup(QUERY)[0] is None
+
+
+@pytest.mark.skipif(not DB_URL, reason="BUDGET_TEST_DATABASE_URL is not set")
+def test_writes_of_other_workers_bump_the_data_version():
+    listener = CategoryBudgetCache(ttl_s=60, max_entries=10)
+    version = BUDGET_DATA_VERSION.current
+    listener.start_listener(DB_URL)
+    try:
+        deadline = time.monotonic() + 10
+        # The listener bumps the version once it listens, for what it may have missed
+        while BUDGET_DATA_VERSION.current == version:
+            assert time.monotonic() < deadline, "the listener did not start"
+            time.sleep(0.05)
+        version = BUDGET_DATA_VERSION.current
+        # What another worker's committed write sends
+        with ENGINE_REGISTRY.get_engine(DB_URL).begin() as connection:
+            connection.execute(text("SELECT pg_notify(:channel, '')"), {"channel": BUDGET_DATA_NOTIFY_CHANNEL})
+        while BUDGET_DATA_VERSION.current == version:
+            assert time.monotonic() < deadline, "the notification was not applied"
+            time.sleep(0.05)
+    finally:
+        listener.stop_listener()
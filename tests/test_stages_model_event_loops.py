@@ -0,0 +1,81 @@
+"""
+The real ChatVertexAI keeps its grpc.aio client on the instance, bound to the
+event loop that first used it. These tests point it at an unreachable
+endpoint: every call must fail on the connection, never on the event loop.
+"""
+
+import asyncio
+import functools
+import time
+import weakref
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+from langchain_google_vertexai import ChatVertexAI
+
+from core.settings import SETTINGS
+from agents.stages_extractor_agent.domain.schemas import StagesExtractInputDetails
+from agents.stages_extractor_agent.infrastructure.jobs.extraction_job_repo import ExtractionJobRepo
+from agents.stages_extractor_agent.infrastructure.jobs.extraction_worker import ExtractionWorkerPool
+from agents.stages_extractor_agent.infrastructure.tools import stages_extract_agent_tools as tools
+
+LOOP_ERRORS = ("Event loop is closed", "different event loop", "attached to a different loop")
+
+
+@pytest.fixture
+def unreachable_vertex_model(monkeypatch):
+    monkeypatch.setattr(SETTINGS, "stages_extract_use_stub_model", False)
+    monkeypatch.setattr(SETTINGS, "extraction_result_cache_enabled", False)
+    monkeypatch.setattr(tools, "ChatVertexAI", functools.partial(
+        ChatVertexAI, project="test-project", location="us-central1", credentials=AnonymousCredentials(),
+        api_endpoint="localhost:1", max_retries=0,
+    ))
+    monkeypatch.setattr(tools, "model", None)
+    monkeypatch.setattr(tools, "_loop_models", weakref.WeakKeyDictionary())
+
+
+def _assert_connection_error(error: BaseException) -> None:
+    assert not any(message in str(error) for message in LOOP_ERRORS), repr(error)
+
+
+def test_each_event_loop_gets_its_own_model(unreachable_vertex_model):
+    async def call():
+        llm = tools.get_model()
+        assert isinstance(llm, ChatVertexAI)
+        with pytest.raises(Exception) as error:
+            await llm.ainvoke("ping")
+        return llm, error.value
+
+    first_model, first_error = asyncio.run(call())
+    second_model, second_error = asyncio.run(call())
+
+    assert first_model is not second_model
+    _assert_connection_error(first_error)
+    _assert_connection_error(second_error)
+
+
+def test_worker_jobs_and_direct_calls_share_the_app_loop(unreachable_vertex_model, tmp_path):
+    repo = ExtractionJobRepo(f"sqlite:///{tmp_path / 'jobs.db'}")
+    repo.ensure_table()
+    pool = ExtractionWorkerPool(repo, workers=1)
+    request = StagesExtractInputDetails(video_gcs_uri="gs://bucket/video.mp4")
+
+    async def app():
+        pool.start()
+        try:
+            job = await asyncio.to_thread(repo.create_job, request, 1, 30.0)
+            pool.notify()
+            deadline = time.monotonic() + 30
+            while (await asyncio.to_thread(repo.get_job, job["job_id"]))["status"] != "failed":
+                assert time.monotonic() < deadline, "the job did not finish"
+                await asyncio.sleep(0.05)
+            # An endpoint call after the worker used the model, on the same loop
+            with pytest.raises(Exception) as direct_error:
+                await tools.aextract_stages(request)
+            return await asyncio.to_thread(repo.get_job, job["job_id"]), direct_error.value
+        finally:
+            await pool.stop()
+
+    job, direct_error = asyncio.run(app())
+    _assert_connection_error(Exception(job["error"]))
+    _assert_connection_error(direct_error)
@@ -0,0 +1,35 @@
+import asyncio
+import json
+import weakref
+
+import pytest
+
+from core.settings import SETTINGS
+from agents.stages_extractor_agent.domain.schemas import StagesExtractInputDetails
+from agents.stages_extractor_agent.infrastructure.tools import stages_extract_agent_tools as tools
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    monkeypatch.setattr(SETTINGS, "stages_extract_use_stub_model", True)
+    monkeypatch.setattr(SETTINGS, "stages_extract_stub_delay_s", 0.0)
+    monkeypatch.setattr(SETTINGS, "extraction_result_cache_enabled", False)
+    monkeypatch.setattr(tools, "model", None)
+    monkeypatch.setattr(tools, "_loop_models", weakref.WeakKeyDictionary())
+
+
+REQUEST = StagesExtractInputDetails(video_gcs_uri="gs://bucket/video.mp4", segment_length_s=60, video_duration_s=180)
+
+
+def test_sync_segmented_extraction_merges_every_window(stub_model):
+    workflow = json.loads(tools.extract_stages(REQUEST))
+    assert workflow["completeness_check"].startswith("Merged from 3 of 3 segments")
+
+
+def test_sync_segmented_extraction_inside_a_running_loop(stub_model):
+    async def handler():
+        # e.g. a sync tool called by an async caller: no nested event loop may be started
+        return tools.extract_stages(REQUEST)
+
+    workflow = json.loads(asyncio.run(handler()))
+    assert workflow["completeness_check"].startswith("Merged from 3 of 3 segments")
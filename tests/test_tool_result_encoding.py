@@ -0,0 +1,37 @@
+import datetime
+import json
+
+from langchain_core.messages import AIMessage
+from pydantic_core import to_jsonable_python
+
+from agents.budget_agent.infrastructure.external_services.langgraph_budget_agent import LangGraphBudgetAgent
+from agents.budget_agent.infrastructure.tools.tool_result_encoding import encode_rows, expand_columnar_rows
+
+ROWS = [
+    {"id": 1, "transaction_date": datetime.date(2025, 6, 1), "category": "food", "amount_inr": 120.5, "location": None},
+    {"id": 2, "transaction_date": datetime.date(2025, 6, 2), "category": "travel", "amount_inr": 40.0, "location": "hyd"},
+]
+
+
+def _agent_answer(text: str):
+    return LangGraphBudgetAgent._parse_response(None, {"messages": [AIMessage(content=text)]}).response
+
+
+def test_columnar_answer_reaches_the_client_as_row_objects():
+    text, _ = encode_rows(ROWS, "columnar", max_tokens=4000, refine_hint="refine")
+    assert _agent_answer(text) == to_jsonable_python(ROWS)
+
+
+def test_cursor_and_note_are_kept_next_to_the_items():
+    text, shown = encode_rows(ROWS, "columnar", max_tokens=60, refine_hint="refine",
+                              extra={"next_cursor": {"transaction_date": datetime.date(2025, 6, 1), "id": 1}})
+    response = _agent_answer(text)
+    assert response["items"] == to_jsonable_python(ROWS[:shown])
+    assert response["next_cursor"] == {"transaction_date": "2025-06-01", "id": 1}
+    assert response["total_rows"] == len(ROWS) and "refine" in response["note"]
+
+
+def test_other_answers_are_unchanged():
+    for answer in ({"id": 1, "category": "food"}, {"columns": ["a", "b"], "rows": [[1]]}, [{"columns": ["a"], "rows": [[1]]}], "done"):
+        assert expand_columnar_rows(answer) == answer
+    assert _agent_answer(json.dumps({"message": "Deleted"})) == {"message": "Deleted"}
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from core.settings import SETTINGS
+from agents.stages_extractor_agent.domain.schemas import StagesExtractInputDetails
+from agents.stages_extractor_agent.infrastructure.tools import stages_extract_agent_tools as tools
+from agents.stages_extractor_agent.infrastructure.tools.video_segments import check_video_uri, local_video_path
+
+
+@pytest.fixture
+def video_root(tmp_path):
+    root = tmp_path / "videos"
+    root.mkdir()
+    (root / "demo.mp4").write_bytes(b"video")
+    (tmp_path / "secret.txt").write_text("secret")
+    os.symlink(tmp_path / "secret.txt", root / "link.mp4")
+    return root
+
+
+def test_gcs_uris_are_accepted_without_a_local_root():
+    check_video_uri("gs://bucket/video.mp4", "")
+
+
+@pytest.mark.parametrize("video_uri", ["/etc/passwd", "file:///etc/passwd", "videos/demo.mp4", "https://example.com/video.mp4"])
+def test_everything_else_is_rejected_without_a_local_root(video_uri):
+    with pytest.raises(ValueError):
+        check_video_uri(video_uri, "")
+
+
+def test_local_files_are_resolved_under_the_root(video_root):
+    assert local_video_path(f"file://{video_root}/demo.mp4", str(video_root)) == os.path.realpath(video_root / "demo.mp4")
+
+
+@pytest.mark.parametrize("name", ["../secret.txt", "link.mp4"])
+def test_local_files_escaping_the_root_are_rejected(video_root, name):
+    with pytest.raises(ValueError, match="outside of the allowed directory"):
+        local_video_path(f"{video_root}/{name}", str(video_root))
+
+
+def test_extraction_rejects_the_uri_before_reading_the_file(monkeypatch):
+    monkeypatch.setattr(SETTINGS, "stages_extract_local_video_root", "")
+    monkeypatch.setattr(tools, "probe_local_duration", lambda path: pytest.fail("the file was probed"))
+    with pytest.raises(ValueError):
+        tools.extract_stages(StagesExtractInputDetails(video_gcs_uri="/etc/passwd", segment_length_s=60))
+    assert tools.get_video_generation("/etc/passwd") is None